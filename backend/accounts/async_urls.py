@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    # profiles
+    path('profiles/<int:pk>/', async_views.async_profile_detail_view, name='async-profile-detail'),
+
+    # listing followers and followed
+    path('users/<int:pk>/followers/', async_views.async_follower_list_view, name='async-follower-list'),
+    path('users/<int:pk>/followed/', async_views.async_followed_list_view, name='async-followed-list'),
+]
@@ -0,0 +1,23 @@
+from accounts import views
+from core.async_views import AsyncAPIViewMixin, AsyncListModelMixin, AsyncRetrieveModelMixin
+
+# Async variants of the read endpoints of accounts/views.py, see core/async_views.py.
+
+
+class AsyncProfileDetailView(AsyncAPIViewMixin, AsyncRetrieveModelMixin, views.ProfileDetailView):
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_retrieve(request, super().aretrieve, *args, **kwargs)
+
+async_profile_detail_view = AsyncProfileDetailView.as_view()
+
+
+class AsyncFollowerListView(AsyncAPIViewMixin, AsyncListModelMixin, views.FollowerListView):
+    pass
+
+async_follower_list_view = AsyncFollowerListView.as_view()
+
+
+class AsyncFollowedListView(AsyncAPIViewMixin, AsyncListModelMixin, views.FollowedListView):
+    pass
+
+async_followed_list_view = AsyncFollowedListView.as_view()
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 from django.db.models import Q
 from accounts.models import User, Profile, Follow
+from accounts.search import people_search_q, rank_people, search_people
 
 class UserFilter(filters.FilterSet):
     class Meta:
@@ -18,9 +19,10 @@ class ProfileFilter(filters.FilterSet):
     search = filters.CharFilter(method='filter_search', label='Search by Profile Name or Bio or Username')
         
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(name__icontains=value) | Q(bio__icontains=value) | Q(user__username__icontains=value)
+        queryset = queryset.filter(
+            people_search_q(value, queryset.db, user_path='user', profile_path='') | Q(bio__icontains=value)
         )
+        return rank_people(queryset, value, user_path='user', profile_path='')
 
 
 class FollowerFilter(filters.FilterSet):
@@ -32,9 +34,7 @@ class FollowerFilter(filters.FilterSet):
     created_at = filters.DateFromToRangeFilter()
     
     def filter_search(self, queryset, name, value):     
-        return queryset.filter(
-            Q(follower__username__icontains=value) | Q(follower__profile__name__icontains=value)
-        )
+        return search_people(queryset, value, user_path='follower', ranked=True)
         
         
 class FollowedFilter(filters.FilterSet):
@@ -46,7 +46,5 @@ class FollowedFilter(filters.FilterSet):
     created_at = filters.DateFromToRangeFilter()
     
     def filter_search(self, queryset, name, value):     
-        return queryset.filter(
-            Q(followed__username__icontains=value) | Q(followed__profile__name__icontains=value)
-        )
+        return search_people(queryset, value, user_path='followed', ranked=True)
 
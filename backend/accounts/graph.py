@@ -0,0 +1,177 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from django.conf import settings
+from accounts.models import Follow
+from core.cache import bump_version, get_versions
+
+# Follow graph
+# The ids a user follows (FOLLOWING) and is followed by (FOLLOWERS) are loaded
+# once into sorted arrays and kept in a per process LRU cache, so membership is
+# a binary search and friends of friends are merged in Python instead of with
+# SQL self-joins over Follow.
+# Every entry remembers the 'follows' version of its user in the shared cache
+# (see core/cache.py). The Follow receivers bump it and drop the local entry,
+# so the other worker processes load the ids again on their next read. Entries
+# also expire after FOLLOW_GRAPH_MAX_AGE seconds, in case a version is lost.
+# The cache holds at most FOLLOW_GRAPH_MAX_IDS ids in total; a longer list, like
+# the followers of a popular user, is read from the database and not kept.
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+# ids of one IN query of filter_followers
+FILTER_BATCH_SIZE = 1000
+
+# (column matched with the user, column read)
+_COLUMNS = {
+    FOLLOWING: ('follower_id', 'followed_id'),
+    FOLLOWERS: ('followed_id', 'follower_id'),
+}
+
+
+class AdjacencyCache:
+    """LRU mapping of (direction, user id) to a sorted id array, bounded by the ids it holds."""
+
+    def __init__(self, max_ids, max_age):
+        self.max_ids = max_ids
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry_version, loaded_at, ids = entry
+            if entry_version != version or time.monotonic() - loaded_at > self.max_age:
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return ids
+
+    def set(self, key, version, ids):
+        with self.lock:
+            self._pop(key)
+            if len(ids) > self.max_ids:
+                return
+            self.entries[key] = (version, time.monotonic(), ids)
+            self.size += len(ids)
+            while self.size > self.max_ids:
+                self._pop(next(iter(self.entries)))
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[2])
+
+    def discard(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+adjacency_cache = AdjacencyCache(settings.FOLLOW_GRAPH_MAX_IDS, settings.FOLLOW_GRAPH_MAX_AGE)
+
+
+def get_adjacency(direction, user_ids) -> dict:
+    """Sorted id arrays of `user_ids` in `direction`, loading the missing ones with one query."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    # versions are read before the rows, so a follow written in between only
+    # makes the entry reload on the next read
+    versions = dict(zip(user_ids, get_versions([('follows', user_id) for user_id in user_ids])))
+    adjacency, missing = {}, []
+    for user_id in user_ids:
+        ids = adjacency_cache.get((direction, user_id), versions[user_id])
+        if ids is None:
+            missing.append(user_id)
+        else:
+            adjacency[user_id] = ids
+
+    if missing:
+        matched, read = _COLUMNS[direction]
+        loaded = {user_id: [] for user_id in missing}
+        rows = Follow.objects.filter(**{f'{matched}__in': missing}).order_by(matched, read).values_list(matched, read)
+        for user_id, other_id in rows.iterator():
+            loaded[user_id].append(other_id)
+        for user_id, ids in loaded.items():
+            adjacency[user_id] = array('q', ids)
+            adjacency_cache.set((direction, user_id), versions[user_id], adjacency[user_id])
+    return adjacency
+
+
+def get_following(user_id) -> array:
+    return get_adjacency(FOLLOWING, [user_id])[user_id]
+
+
+def get_followers(user_id) -> array:
+    return get_adjacency(FOLLOWERS, [user_id])[user_id]
+
+
+def contains(ids, user_id) -> bool:
+    index = bisect_left(ids, user_id)
+    return index < len(ids) and ids[index] == user_id
+
+
+def is_following(user_id, other_ids) -> dict:
+    """Whether `user_id` follows each one of `other_ids`, e.g. the authors of a page."""
+    following = get_following(user_id)
+    return {other_id: contains(following, other_id) for other_id in other_ids}
+
+
+def is_mutual(user_id, other_id) -> bool:
+    """Whether both users follow each other."""
+    following = get_adjacency(FOLLOWING, [user_id, other_id])
+    return contains(following[user_id], other_id) and contains(following[other_id], user_id)
+
+
+def filter_followers(user_id, other_ids) -> list:
+    """The ones of `other_ids` who follow `user_id`, sorted."""
+    # an IN query over the (follower, followed) unique index, so the followers
+    # of a popular user are checked without loading all of them
+    other_ids = list(other_ids)
+    followers = []
+    for start in range(0, len(other_ids), FILTER_BATCH_SIZE):
+        batch = other_ids[start:start + FILTER_BATCH_SIZE]
+        followers.extend(
+            Follow.objects.filter(followed_id=user_id, follower_id__in=batch)
+            .order_by('follower_id').values_list('follower_id', flat=True)
+        )
+    return sorted(followers)
+
+
+def get_followed_by(user_id, viewer_id) -> list:
+    """Ids of the users `viewer_id` follows who follow `user_id`."""
+    return filter_followers(user_id, get_following(viewer_id))
+
+
+def suggest_users(user_id, limit) -> list:
+    """
+    People `user_id` may know: the users followed by the ones they follow,
+    as (id, overlap) pairs ranked by how many of them follow each one.
+    """
+    following = get_following(user_id)
+    overlap = Counter()
+    for ids in get_adjacency(FOLLOWING, following).values():
+        overlap.update(ids)
+    overlap.pop(user_id, None)
+    candidates = [(other_id, count) for other_id, count in overlap.items() if not contains(following, other_id)]
+    candidates.sort(key=lambda candidate: (-candidate[1], candidate[0]))
+    return candidates[:limit]
+
+
+def invalidate(follower_id, followed_id):
+    bump_version('follows', follower_id)
+    bump_version('follows', followed_id)
+    adjacency_cache.discard((FOLLOWING, follower_id))
+    adjacency_cache.discard((FOLLOWERS, followed_id))
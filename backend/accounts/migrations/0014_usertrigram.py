@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# frozen copies of accounts.search as of this migration
+
+POSTGRES_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS accounts_user_username_trgm_idx ON accounts_user USING gin ((UPPER(username::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS accounts_profile_name_trgm_idx ON accounts_profile USING gin ((UPPER(name::text)) gin_trgm_ops)",
+]
+
+
+def get_trigrams(*values):
+    trigrams = set()
+    for value in values:
+        value = (value or '').lower()
+        trigrams.update(value[i:i + 3] for i in range(len(value) - 2))
+    return trigrams
+
+
+def index_people(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRES_TRIGRAM_SQL:
+            schema_editor.execute(sql)
+        return
+    User = apps.get_model('accounts', 'User')
+    UserTrigram = apps.get_model('accounts', 'UserTrigram')
+    users = User.objects.values_list('id', 'username', 'profile__name')
+    for user_id, username, name in users.iterator():
+        UserTrigram.objects.bulk_create([
+            UserTrigram(user_id=user_id, trigram=trigram) for trigram in get_trigrams(username, name)
+        ])
+
+
+def unindex_people(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_user_username_trgm_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS accounts_profile_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('trigram', 'user')},
+            },
+        ),
+        migrations.RunPython(index_people, unindex_people),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from core.mixins import CounterFieldsMixin
 
 # Create your models here.
 
@@ -25,27 +26,37 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('follower', 'followed')
+        indexes = [
+            models.Index(fields=['followed', '-created_at', '-id']),
+            models.Index(fields=['follower', '-created_at', '-id']),
+        ]
 
 
-class Profile(models.Model):
+class Profile(CounterFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=20, null=True, blank=True)
     bio = models.CharField(max_length=150, null=True, blank=True)
     picture = models.FileField(upload_to='profile_pictures/', default='/profile_pictures/default_profile_picture.png')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # denormalized counters, kept up to date by the receivers in the signal modules
+    total_followers = models.PositiveIntegerField(default=0)
+    total_following = models.PositiveIntegerField(default=0)
+    total_posts = models.PositiveIntegerField(default=0)
+
+    counter_fields = ('total_followers', 'total_following', 'total_posts')
     
     def __str__(self) -> str:
         return f'{self.name} {self.id}'
-    
-    @property
-    def total_followers(self) -> int:
-        return self.user.followers.all().count()
-    
-    @property
-    def total_following(self) -> int:
-        return self.user.following.all().count()
-    
-    @property
-    def total_posts(self) -> int:
-        return self.user.posts.all().count()
+
+
+class UserTrigram(models.Model):
+    # n-gram side table used by accounts/search.py on databases without pg_trgm
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = ('trigram', 'user')
+
+    def __str__(self) -> str:
+        return f'{self.trigram} -> {self.user_id}'
@@ -0,0 +1,94 @@
+from django.db import connections
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest
+from accounts.models import User, UserTrigram
+
+# People search: substring matching over User.username and Profile.name.
+# PostgreSQL: pg_trgm GIN indexes on UPPER(username) and UPPER(name), which is
+# exactly what the `icontains` lookup compiles to, so the lookups are indexed.
+# Other databases: the UserTrigram side table narrows the users down to the ones
+# having every trigram of the searched value before `icontains` checks them.
+
+POSTGRES_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS accounts_user_username_trgm_idx ON accounts_user USING gin ((UPPER(username::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS accounts_profile_name_trgm_idx ON accounts_profile USING gin ((UPPER(name::text)) gin_trgm_ops)",
+]
+
+
+def install_trigram_indexes(connection):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for sql in POSTGRES_TRIGRAM_SQL:
+                cursor.execute(sql)
+
+
+def uses_trigram_table(using) -> bool:
+    return connections[using].vendor != 'postgresql'
+
+
+def get_trigrams(*values) -> set:
+    trigrams = set()
+    for value in values:
+        value = (value or '').lower()
+        trigrams.update(value[i:i + 3] for i in range(len(value) - 2))
+    return trigrams
+
+
+def index_user_trigrams(user_id, using='default'):
+    user = User.objects.using(using).filter(id=user_id).values('username', 'profile__name').first()
+    UserTrigram.objects.using(using).filter(user_id=user_id).delete()
+    if user is not None:
+        UserTrigram.objects.using(using).bulk_create([
+            UserTrigram(user_id=user_id, trigram=trigram)
+            for trigram in get_trigrams(user['username'], user['profile__name'])
+        ])
+
+
+def _paths(user_path, profile_path):
+    user_prefix = f'{user_path}__' if user_path else ''
+    if profile_path is None:
+        profile_path = f'{user_prefix}profile'
+    name_path = f'{profile_path}__name' if profile_path else 'name'
+    return user_prefix, name_path
+
+
+def search_people(queryset, value, user_path='', profile_path=None, ranked=False):
+    """
+    Filter `queryset` down to the rows whose user (reached through `user_path`)
+    has `value` in their username or profile name. `profile_path` is only needed
+    when the profile is not reached through the user, e.g. for Profile itself.
+    With `ranked`, exact matches come first, then prefixes, then the rest.
+    """
+    queryset = queryset.filter(people_search_q(value, queryset.db, user_path, profile_path))
+    if ranked:
+        queryset = rank_people(queryset, value, user_path, profile_path)
+    return queryset
+
+
+def people_search_q(value, using, user_path='', profile_path=None) -> Q:
+    user_prefix, name_path = _paths(user_path, profile_path)
+    matches = Q(**{f'{user_prefix}username__icontains': value}) | Q(**{f'{name_path}__icontains': value})
+    trigrams = get_trigrams(value)
+    if trigrams and uses_trigram_table(using):
+        candidates = UserTrigram.objects.filter(trigram__in=trigrams).values('user').annotate(
+            matched=Count('trigram')
+        ).filter(matched=len(trigrams)).values('user')
+        matches &= Q(**{f'{user_prefix}id__in' if user_prefix else 'id__in': candidates})
+    return matches
+
+
+def rank_people(queryset, value, user_path='', profile_path=None):
+    user_prefix, name_path = _paths(user_path, profile_path)
+
+    def rank(path):
+        return Case(
+            When(**{f'{path}__iexact': value}, then=Value(3)),
+            When(**{f'{path}__istartswith': value}, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+
+    return queryset.annotate(
+        people_rank=Greatest(rank(f'{user_prefix}username'), rank(name_path))
+    ).order_by('-people_rank', '-id')
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from accounts.models import User, Profile, Follow
 from django.contrib.auth.hashers import check_password
 from accounts.mixins import UserValidationMixin
+from accounts.viewer import ViewerFieldsMixin, ViewerFieldsListSerializer
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -22,6 +23,10 @@ class UserSerializer(serializers.ModelSerializer):
             'is_active': {'read_only': True,},
         }
     
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('profile')
+
 
 class UserCreationSerializer(UserValidationMixin, serializers.ModelSerializer):
     class Meta:
@@ -83,7 +88,14 @@ class ProfileSerializer(serializers.ModelSerializer):
             'id': {'read_only': True},
             'user': {'read_only': True},
             'created_at': {'read_only': True},
+            'total_posts': {'read_only': True},
+            'total_followers': {'read_only': True},
+            'total_following': {'read_only': True},
         }   
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('user')
         
     def update(self, instance, validated_data):
         instance.name = validated_data.get('name', instance.name)
@@ -94,13 +106,36 @@ class ProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProfileSimpleSerializer(serializers.ModelSerializer):
+class ProfileSimpleSerializer(ViewerFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer()
+    is_following = serializers.SerializerMethodField(help_text='Whether you follow this user.')
+    is_own = serializers.SerializerMethodField(help_text='Whether this is your profile.')
+
     class Meta:
         model = Profile
         fields = [
-            'id', 'name', 'picture', 'user',
+            'id', 'name', 'picture', 'user', 'is_following', 'is_own',
         ]
+        list_serializer_class = ViewerFieldsListSerializer
+
+    def get_is_following(self, obj) -> bool:
+        return self.viewer_follows(obj.user_id)
+
+    def get_is_own(self, obj) -> bool:
+        return self.is_viewer(obj.user_id)
+
+    def add_viewer_fields(self, representations):
+        for data in representations:
+            user_id = data['user']['id']
+            data.update(is_following=self.viewer_follows(user_id), is_own=self.is_viewer(user_id))
+
+
+class SuggestedProfileSerializer(ProfileSimpleSerializer):
+    followed_by_count = serializers.IntegerField(read_only=True)
+    follows_you = serializers.BooleanField(read_only=True)
+
+    class Meta(ProfileSimpleSerializer.Meta):
+        fields = ProfileSimpleSerializer.Meta.fields + ['followed_by_count', 'follows_you']
 
 
 class MessageSerializer(serializers.Serializer):
@@ -146,9 +181,17 @@ class FollowerSerializer(serializers.ModelSerializer):
         model = Follow
         fields = ['profile', 'created_at']
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('follower__profile')
+
 
 class FollowedSerializer(serializers.ModelSerializer):
     profile = ProfileSimpleSerializer(source='followed.profile')    
     class Meta:
         model = Follow
         fields = ['profile', 'created_at']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('followed__profile')
@@ -1,6 +1,11 @@
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_save
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
 from accounts.models import Profile, User, Follow
+from accounts.search import index_user_trigrams, uses_trigram_table
+from accounts import graph
+from posts import feed
+from core.cache import bump_version, forget_related_id
 from django.core.exceptions import ValidationError
 
 @receiver(post_save, sender=User)
@@ -14,4 +19,70 @@ def signup_create_profile(sender, instance, created, **kwargs):
 def check_self_following(sender, instance, **kwargs):
     if instance.follower == instance.followed:
        raise ValidationError("You can not follow yourself.")
-   
\ No newline at end of file
+
+
+@receiver(post_save, sender=Follow)
+def increment_follow_counters(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.filter(user_id=instance.followed_id).update(total_followers=F('total_followers') + 1)
+        Profile.objects.filter(user_id=instance.follower_id).update(total_following=F('total_following') + 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counters(sender, instance, **kwargs):
+    Profile.objects.filter(user_id=instance.followed_id).update(total_followers=F('total_followers') - 1)
+    Profile.objects.filter(user_id=instance.follower_id).update(total_following=F('total_following') - 1)
+    # an author back at FEED_FANOUT_LIMIT followers is fanned out again
+    feed.follower_removed(instance.followed_id)
+
+
+# people search trigrams
+
+def _updates_field(update_fields, field_name) -> bool:
+    return update_fields is None or field_name in update_fields
+
+
+@receiver(post_save, sender=User)
+def index_username_trigrams(sender, instance, created, using, update_fields, **kwargs):
+    # new users are indexed when their profile is created
+    if not created and uses_trigram_table(using) and _updates_field(update_fields, 'username'):
+        index_user_trigrams(instance.id, using)
+
+
+@receiver(post_save, sender=Profile)
+def index_profile_name_trigrams(sender, instance, created, using, update_fields, **kwargs):
+    if uses_trigram_table(using) and _updates_field(update_fields, 'name'):
+        index_user_trigrams(instance.user_id, using)
+
+
+# response cache invalidation (see core/cache.py)
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    bump_version('user', instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_profile(sender, instance, created, **kwargs):
+    bump_version('user', instance.user_id)
+    if created:
+        forget_related_id('profile-user', instance.pk)
+
+
+@receiver(post_delete, sender=Profile)
+def invalidate_deleted_profile(sender, instance, **kwargs):
+    bump_version('user', instance.user_id)
+    forget_related_id('profile-user', instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_counters(sender, instance, **kwargs):
+    bump_version('user', instance.follower_id)
+    bump_version('user', instance.followed_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    graph.invalidate(instance.follower_id, instance.followed_id)
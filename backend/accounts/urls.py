@@ -14,9 +14,11 @@ urlpatterns = [
     path('users/register/', views.user_registration_view, name='user-registration'),
     path('users/<int:pk>/update/', views.user_update_view, name='user-update'),
     path('users/<int:pk>/delete/', views.user_delete_view, name='user-delete'),
+    path('users/export/', views.user_export_view, name='user-export'),
 
     # profiles
     path('profiles/<int:pk>/', views.profile_detail_view, name='profile-detail'),
+    path('profiles/<int:pk>/page/', views.profile_page_view, name='profile-page'),
     path('profiles/<int:pk>/update/', views.profile_update_view, name='profile-update'),
     path('profiles/', views.profile_list_view, name='profile-list'),
 
@@ -27,4 +29,5 @@ urlpatterns = [
     # listing followers and followed
     path('users/<int:pk>/followers/', views.follower_list_view, name='follower-list'),
     path('users/<int:pk>/followed/', views.followed_list_view, name='followed-list'),
+    path('users/suggestions/', views.user_suggestion_list_view, name='user-suggestion-list'),
 ]
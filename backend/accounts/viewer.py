@@ -0,0 +1,74 @@
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+from accounts import graph
+
+# Viewer fields
+# Fields such as `is_liked` or `is_own` depend on the user sending the request.
+# A list serializer hands its whole page to `resolve_viewer_fields`, which loads
+# each relation of the viewer with one IN query into the serializer context; the
+# fields then only read the context. The users the viewer follows come from the
+# follow graph (accounts/graph.py).
+# Cached responses are shared by every user: they are serialized with
+# `'viewer': None` in the context, and `add_viewer_fields` fills the fields of
+# the current viewer into the cached data on each request.
+
+
+def get_viewer(context):
+    if 'viewer' in context:
+        return context['viewer']
+    user = getattr(context.get('request'), 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+class ViewerFieldsListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, BaseManager) else data
+        items = list(iterable)
+        self.child.resolve_viewer_fields(items)
+        return [self.child.to_representation(item) for item in items]
+
+
+class ViewerFieldsMixin:
+    """
+    Resolves the viewer fields of a page at once. Set
+    `list_serializer_class = ViewerFieldsListSerializer` in Meta.
+    """
+
+    @property
+    def viewer(self):
+        return get_viewer(self.context)
+
+    def resolve_viewer_fields(self, objects):
+        """Load the viewer relations of a page of objects into the context."""
+
+    def add_viewer_fields(self, representations):
+        """Set the viewer fields of serialized objects, e.g. read from the response cache."""
+
+    def resolve_viewer_flags(self, name, pks, load):
+        # context[name] maps each pk to whether `load(viewer, pks)` returned it
+        viewer = self.viewer
+        resolved = self.context.setdefault(name, {})
+        pks = [pk for pk in dict.fromkeys(pks) if pk not in resolved]
+        if viewer is None or not pks:
+            return resolved
+        found = set(load(viewer, pks))
+        resolved.update((pk, pk in found) for pk in pks)
+        return resolved
+
+    def get_viewer_flag(self, name, pk, load) -> bool:
+        if self.viewer is None:
+            return False
+        # a single object, or one that was not part of the page
+        return self.resolve_viewer_flags(name, [pk], load)[pk]
+
+    def is_viewer(self, user_id) -> bool:
+        viewer = self.viewer
+        return viewer is not None and viewer.id == user_id
+
+    def viewer_follows(self, user_id) -> bool:
+        viewer = self.viewer
+        if viewer is None:
+            return False
+        if 'viewer_following' not in self.context:
+            self.context['viewer_following'] = graph.get_following(viewer.id)
+        return graph.contains(self.context['viewer_following'], user_id)
@@ -1,11 +1,25 @@
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import generics, permissions, status
-from rest_framework.views import Response
+from rest_framework import serializers as drf_serializers
+from rest_framework.pagination import Cursor
+from rest_framework.views import APIView, Response
+from rest_framework.exceptions import ValidationError
 from accounts.models import User, Profile, Follow
 from accounts import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
 from accounts.filters import UserFilter, ProfileFilter, FollowerFilter, FollowedFilter
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
 from accounts.permissions import IsUser
+from accounts import graph
+from core.pagination import KeysetPagination
+from core.cache import CachedRetrieveMixin, get_related_id
+from core.upsert import create_unique, delete_unique
+from posts.models import Post
+from posts.serializers import PostSerializer
+from posts import export
 # Create your views here.
 
 class UserDetailView(generics.RetrieveAPIView):
@@ -19,6 +33,9 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
     filterset_class = UserFilter
+
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset())
     
 user_list_view = UserListView.as_view()
 
@@ -58,18 +75,121 @@ class UserDeleteView(generics.DestroyAPIView):
 user_delete_view = UserDeleteView.as_view()    
 
 
-class ProfileDetailView(generics.RetrieveAPIView):
+@extend_schema(
+    summary="Export your Data",
+    description=(
+        "Your profile, posts, comments, likes and follows as NDJSON: one JSON object per line, "
+        "with the kind of row in `type`. The rows are streamed as they are read."
+    ),
+    responses={(200, export.CONTENT_TYPE): OpenApiTypes.STR},
+)
+class UserExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        response = StreamingHttpResponse(export.export_user_data(request.user), content_type=export.CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="user-{request.user.id}.ndjson"'
+        return response
+
+user_export_view = UserExportView.as_view()
+
+
+class ProfileDetailView(CachedRetrieveMixin, generics.RetrieveAPIView):
     queryset = Profile.objects.all()
     serializer_class = serializers.ProfileSerializer
+
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset())
+
+    def get_cache_dependencies(self, pk):
+        user_id = get_related_id(
+            'profile-user', pk, lambda: Profile.objects.filter(pk=pk).values_list('user_id', flat=True).first()
+        )
+        if user_id is None:
+            return None
+        return [('user', user_id)]
     
 profile_detail_view = ProfileDetailView.as_view()
 
 
+PROFILE_PAGE_POSTS = 10
+FOLLOWED_BY_PREVIEW = 3
+
+
+@extend_schema(
+    summary="Profile Page",
+    description=(
+        "The profile, its first page of posts and up to 3 of the users you follow who follow it, in one request. "
+        "`posts_next` is the next page of the posts in the post list. "
+        "The profile and posts are cached for `PROFILE_PAGE_CACHE_TIMEOUT` seconds."
+    ),
+    responses=inline_serializer('ProfilePage', fields={
+        'profile': serializers.ProfileSerializer(),
+        'posts': PostSerializer(many=True),
+        'posts_next': drf_serializers.URLField(allow_null=True),
+        'followed_by': serializers.ProfileSimpleSerializer(many=True),
+        'followed_by_count': drf_serializers.IntegerField(),
+    }),
+)
+class ProfilePageView(ProfileDetailView):
+    # bumped with the user version (profile, follows, new and deleted posts), but
+    # edits, likes and comments of the posts only show up when the entry expires
+    cache_timeout_setting = 'PROFILE_PAGE_CACHE_TIMEOUT'
+
+    def get_posts_page(self, profile) -> dict:
+        posts = PostSerializer.setup_eager_loading(Post.objects.filter(author_id=profile.user_id))
+        posts = list(posts.order_by('-created_at', '-id')[:PROFILE_PAGE_POSTS + 1])
+        next_url = None
+        if len(posts) > PROFILE_PAGE_POSTS:
+            posts = posts[:PROFILE_PAGE_POSTS]
+            # the cursor of the post list (?author=) after the last post of the page
+            paginator = KeysetPagination()
+            paginator.ordering = ('-created_at', '-id')
+            paginator.base_url = self.request.build_absolute_uri(
+                f"{reverse('post-list-create')}?author={profile.user_id}&limit={PROFILE_PAGE_POSTS}"
+            )
+            next_url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=paginator.encode_position(posts[-1])))
+        context = self.get_serializer_context()
+        return {
+            'profile': self.get_serializer(profile).data,
+            'posts': PostSerializer(posts, many=True, context=context).data,
+            'posts_next': next_url,
+        }
+
+    def get_followed_by(self, user_id) -> dict:
+        # depends on the viewer, never cached
+        viewer = self.request.user
+        if not viewer.is_authenticated:
+            return {'followed_by': [], 'followed_by_count': 0}
+        user_ids = graph.get_followed_by(user_id, viewer.id)
+        if not user_ids:
+            return {'followed_by': [], 'followed_by_count': 0}
+        preview = Profile.objects.filter(user_id__in=user_ids).select_related('user').order_by('-total_followers', 'id')
+        preview = serializers.ProfileSimpleSerializer(preview[:FOLLOWED_BY_PREVIEW], many=True, context=self.get_viewer_context()).data
+        return {'followed_by': preview, 'followed_by_count': len(user_ids)}
+
+    def retrieve(self, request, *args, **kwargs):
+        key, _ = self.get_cache_lookup(request)
+        data = cache.get(key) if key is not None else None
+        if data is None:
+            profile = self.get_object()
+            data = self.get_posts_page(profile)
+            if key is not None:
+                cache.set(key, data, self.get_cache_timeout())
+        PostSerializer(context=self.get_viewer_context()).add_viewer_fields(data['posts'])
+        return Response({**data, **self.get_followed_by(data['profile']['user']['id'])})
+
+profile_page_view = ProfilePageView.as_view()
+
+
 class ProfileListView(generics.ListAPIView):
     queryset = Profile.objects.all()
     serializer_class = serializers.ProfileSerializer
     filterset_class = ProfileFilter
 
+    def get_queryset(self):
+        return self.get_serializer_class().setup_eager_loading(super().get_queryset())
+
 profile_list_view = ProfileListView.as_view()
 
 
@@ -81,6 +201,49 @@ class ProfileUpdateView(generics.UpdateAPIView):
 profile_update_view = ProfileUpdateView.as_view()
 
 
+USER_SUGGESTIONS = 10
+MAX_USER_SUGGESTIONS = 50
+
+
+@extend_schema(
+    summary="People You May Know",
+    description=(
+        "Users followed by the people you follow, ranked by `followed_by_count`, how many of them follow each one. "
+        "`follows_you` tells whether they already follow you."
+    ),
+    parameters=[OpenApiParameter(
+        'limit', int, description=f'Users returned (default {USER_SUGGESTIONS}, at most {MAX_USER_SUGGESTIONS}).'
+    )],
+)
+class UserSuggestionListView(generics.ListAPIView):
+    serializer_class = serializers.SuggestedProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', USER_SUGGESTIONS))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        return max(0, min(limit, MAX_USER_SUGGESTIONS))
+
+    def list(self, request, *args, **kwargs):
+        suggestions = graph.suggest_users(request.user.id, self.get_limit())
+        user_ids = [user_id for user_id, _ in suggestions]
+        followers = set(graph.filter_followers(request.user.id, user_ids))
+        profiles = Profile.objects.select_related('user').in_bulk(user_ids, field_name='user_id')
+        results = []
+        for user_id, overlap in suggestions:
+            profile = profiles.get(user_id)
+            if profile is not None:
+                profile.followed_by_count = overlap
+                profile.follows_you = user_id in followers
+                results.append(profile)
+        return Response(self.get_serializer(results, many=True).data)
+
+user_suggestion_list_view = UserSuggestionListView.as_view()
+
+
 @extend_schema(
     summary="Follow a User",
     description="Endpoint for follow a specific user.",
@@ -98,15 +261,14 @@ class FollowUserView(generics.CreateAPIView):
 
     def create(self, request, *args, **kwargs):
         user_id = self.kwargs['pk']
-        if not User.objects.filter(id=user_id).exists():
-            return Response({'detail': 'The user does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        request.data['followed'] = user_id
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        if user_id == request.user.id:
+            raise ValidationError({'detail': ['You can not follow yourself.']})
+        if create_unique(Follow, User, user_id, follower_id=request.user.id, followed_id=user_id) is None:
+            if not User.objects.filter(id=user_id).exists():
+                return Response({'detail': 'The user does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            raise ValidationError({'detail': ['You are already following this user.']})
         message = serializers.MessageSerializer({'message': 'You have successfully followed the user.'})
-        headers = self.get_success_headers(serializer.data)
-        return Response(message.data, status=status.HTTP_201_CREATED, headers=headers)
+        return Response(message.data, status=status.HTTP_201_CREATED)
             
 follow_user_view = FollowUserView.as_view()
 
@@ -124,18 +286,12 @@ class UnfollowUserView(generics.DestroyAPIView):
     serializer_class = serializers.MessageSerializer
 
     def delete(self, request, pk):
-        request_user = request.user
-        try:
-            user = User.objects.get(pk=pk)
-        except User.DoesNotExist:
-            return Response({'detail': 'The user does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        if not request_user.following.filter(followed=user).exists():
+        if not delete_unique(Follow, follower_id=request.user.id, followed_id=pk):
+            if not User.objects.filter(pk=pk).exists():
+                return Response({'detail': 'The user does not exist.'}, status=status.HTTP_404_NOT_FOUND)
             return Response({'detail': 'You were not following this user.'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            follow = Follow.objects.get(follower=request_user, followed=user)
-            follow.delete()
-            serializer = serializers.MessageSerializer({'message': 'You have successfully unfollowed the user.'})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = serializers.MessageSerializer({'message': 'You have successfully unfollowed the user.'})
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 unfollow_user_view = UnfollowUserView.as_view()
 
@@ -144,10 +300,12 @@ class FollowerListView(generics.ListAPIView):
     queryset = Follow.objects.all()
     serializer_class = serializers.FollowerSerializer
     filterset_class = FollowerFilter
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user_followed_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(followed_id=user_followed_id)
          
 follower_list_view = FollowerListView.as_view()
@@ -157,10 +315,12 @@ class FollowedListView(generics.ListAPIView):
     queryset = Follow.objects.all()
     serializer_class = serializers.FollowedSerializer
     filterset_class = FollowedFilter
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         user_follower_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(follower_id=user_follower_id)
          
 followed_list_view = FollowedListView.as_view()
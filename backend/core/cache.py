@@ -0,0 +1,160 @@
+import hashlib
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.views import Response
+
+# Versioned response cache
+# every cached response depends on a few (kind, id) pairs such as ('post', 1) or
+# ('user', 2). Each pair has a version number in the cache, and the signal
+# modules bump it whenever something that the response shows changes, so stale
+# responses are never read again and simply expire.
+
+VERSION_KEY = 'version:{kind}:{pk}'
+RELATED_ID_KEY = 'related:{name}:{pk}'
+
+
+def check_shared_cache(processes):
+    """
+    Refuse a cache local to each process when the server runs several of them:
+    a version bumped by one process would never reach the others, which would
+    keep serving stale responses.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if processes > 1 and backend == 'django.core.cache.backends.locmem.LocMemCache':
+        raise ImproperlyConfigured(
+            f'{processes} worker processes can not share a local memory cache, set CACHE_URL to a shared cache '
+            '(e.g. rediscache://host:6379/1) or run a single worker.'
+        )
+
+
+def _new_version() -> int:
+    # unique even if a version key was evicted and has to be created again
+    return time.time_ns()
+
+
+def _bump_version(kind, pk):
+    key = VERSION_KEY.format(kind=kind, pk=pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump_version(kind, pk):
+    # bumped again after commit, so a response built from the old rows while
+    # the transaction was still open can not stay cached
+    _bump_version(kind, pk)
+    transaction.on_commit(lambda: _bump_version(kind, pk))
+
+
+def get_versions(dependencies) -> list:
+    keys = [VERSION_KEY.format(kind=kind, pk=pk) for kind, pk in dependencies]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_related_id(name, pk, get_value):
+    """Cache an immutable relation, like the author of a post."""
+    key = RELATED_ID_KEY.format(name=name, pk=pk)
+    value = cache.get(key)
+    if value is None:
+        value = get_value()
+        if value is not None:
+            cache.set(key, value, None)
+    return value
+
+
+def forget_related_id(name, pk):
+    # ids can be reused by the database once a row is deleted
+    cache.delete(RELATED_ID_KEY.format(name=name, pk=pk))
+
+
+class CachedRetrieveMixin:
+    """
+    Caches the serialized object of a retrieve view and answers with an ETag,
+    so clients sending it back in If-None-Match get a 304 without any query.
+    Bump `cache_serializer_version` when the serializer output changes.
+    """
+    cache_serializer_version = 1
+    cache_timeout_setting = 'RESPONSE_CACHE_TIMEOUT'
+
+    def get_cache_timeout(self) -> int:
+        return getattr(settings, self.cache_timeout_setting)
+
+    def get_serializer_context(self):
+        # the cached data is shared by every user, see add_viewer_fields
+        return {**super().get_serializer_context(), 'viewer': None}
+
+    def get_viewer_context(self) -> dict:
+        return super().get_serializer_context()
+
+    def has_viewer_fields(self) -> bool:
+        return hasattr(self.get_serializer_class(), 'add_viewer_fields')
+
+    def add_viewer_fields(self, data):
+        """Fill the fields depending on the request user into the cached data (see accounts/viewer.py)."""
+        if self.has_viewer_fields():
+            self.get_serializer_class()(context=self.get_viewer_context()).add_viewer_fields([data])
+        return data
+
+    def get_cache_dependencies(self, pk):
+        """Return the (kind, id) pairs the response depends on, or None to skip the cache."""
+        raise NotImplementedError
+
+    def get_cache_key(self, request, pk, versions) -> str:
+        # hyperlinks in the payload depend on the host
+        parts = [self.__class__.__name__, pk, self.cache_serializer_version, request.scheme, request.get_host(), *versions]
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'response:{digest}'
+
+    def get_cache_lookup(self, request):
+        """Return the cache key and ETag of the response, or (None, None) to skip the cache."""
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        dependencies = self.get_cache_dependencies(pk)
+        if dependencies is None:
+            return None, None
+        key = self.get_cache_key(request, pk, get_versions(dependencies))
+        etag = key.split(':')[1]
+        if self.has_viewer_fields() and request.user.is_authenticated:
+            etag = f'{etag}-{request.user.id}'
+        return key, f'"{etag}"'
+
+    def is_not_modified(self, request, etag) -> bool:
+        return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+    def retrieve(self, request, *args, **kwargs):
+        key, etag = self.get_cache_lookup(request)
+        if key is None:
+            return super().retrieve(request, *args, **kwargs)
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        data = cache.get(key)
+        if data is None:
+            data = super().retrieve(request, *args, **kwargs).data
+            cache.set(key, data, self.get_cache_timeout())
+        return Response(self.add_viewer_fields(data), headers={'ETag': etag})
+
+    async def acached_retrieve(self, request, aretrieve, *args, **kwargs):
+        """Same as `retrieve`, for async views building the response with `aretrieve`."""
+        key, etag = await sync_to_async(self.get_cache_lookup)(request)
+        if key is None:
+            return await aretrieve(request, *args, **kwargs)
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        data = await cache.aget(key)
+        if data is None:
+            data = (await aretrieve(request, *args, **kwargs)).data
+            await cache.aset(key, data, self.get_cache_timeout())
+        return Response(await sync_to_async(self.add_viewer_fields)(data), headers={'ETag': etag})
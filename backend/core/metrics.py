@@ -0,0 +1,208 @@
+import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+# Per endpoint request metrics (METRICS_ENABLED=True)
+# MetricsMiddleware records, for every resolved URL name, the request duration,
+# the number of SQL queries, the SQL time, the time spent building serializer
+# data and the response size. /api/metrics/ exposes them as Prometheus
+# histograms. They are kept per process, so each gunicorn worker reports its own.
+# When disabled the middleware removes itself and nothing below is installed.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+UNRESOLVED = '<unresolved>'
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # endpoint -> [cumulative bucket counts, count, sum]
+        self.values = {}
+
+    def observe(self, endpoint, value):
+        with self.lock:
+            counts, count, total = self.values.get(endpoint, ([0] * len(self.buckets), 0, 0))
+            counts = [bucket_count + (value <= bound) for bucket_count, bound in zip(counts, self.buckets)]
+            self.values[endpoint] = [counts, count + 1, total + value]
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            values = sorted(self.values.items())
+        for endpoint, (counts, count, total) in values:
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_count{{endpoint="{endpoint}"}} {count}')
+            lines.append(f'{self.name}_sum{{endpoint="{endpoint}"}} {total}')
+        return lines
+
+
+HISTOGRAMS = {
+    'duration': Histogram('http_request_duration_seconds', 'Time to build the response.', DURATION_BUCKETS),
+    'queries': Histogram('http_request_queries', 'SQL queries run by a request.', QUERY_BUCKETS),
+    'sql_time': Histogram('http_request_sql_duration_seconds', 'Time spent running SQL queries.', DURATION_BUCKETS),
+    'serializer_time': Histogram(
+        'http_request_serializer_duration_seconds', 'Time spent building serializer data.', DURATION_BUCKETS
+    ),
+    'size': Histogram('http_response_size_bytes', 'Size of the response body.', SIZE_BUCKETS),
+}
+
+
+class RequestStats:
+    __slots__ = ('queries', 'sql_time', 'serializer_time', 'in_serializer')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.in_serializer = False
+
+
+# a context variable follows the request into sync_to_async threads too
+current_stats = ContextVar('current_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - start
+
+
+def add_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed_data(data_property):
+    def data(self):
+        stats = current_stats.get()
+        if stats is None or stats.in_serializer:
+            return data_property.fget(self)
+        stats.in_serializer = True
+        start = time.perf_counter()
+        try:
+            return data_property.fget(self)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+            stats.in_serializer = False
+    return property(data)
+
+
+_installed = False
+
+
+def install():
+    """Hook the query and serializer timers, once per process."""
+    global _installed
+    if _installed:
+        return
+    from rest_framework.serializers import Serializer, ListSerializer
+    # DRF has no hook around building the data, the property is wrapped instead
+    for serializer_class in (Serializer, ListSerializer):
+        serializer_class.data = timed_data(serializer_class.data)
+    connection_created.connect(add_query_recorder)
+    for connection in connections.all(initialized_only=True):
+        add_query_recorder(connection)
+    _installed = True
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, start = RequestStats(), time.perf_counter()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.record(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats, start = RequestStats(), time.perf_counter()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.record(request, response, stats, time.perf_counter() - start)
+
+    def record(self, request, response, stats, duration):
+        resolver_match = getattr(request, 'resolver_match', None)
+        endpoint = resolver_match.view_name if resolver_match else UNRESOLVED
+        HISTOGRAMS['duration'].observe(endpoint, duration)
+        HISTOGRAMS['queries'].observe(endpoint, stats.queries)
+        HISTOGRAMS['sql_time'].observe(endpoint, stats.sql_time)
+        HISTOGRAMS['serializer_time'].observe(endpoint, stats.serializer_time)
+        if not response.streaming:
+            HISTOGRAMS['size'].observe(endpoint, len(response.content))
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries"',
+                f'serializer;dur={stats.serializer_time * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ])
+        return response
+
+
+def render_pool_stats() -> list:
+    from core.postgresql_pool.pool import get_pool_stats
+    pool_stats = get_pool_stats()
+    if not pool_stats:
+        return []
+    lines = ['# HELP db_pool_connections Connections of the database pool.', '# TYPE db_pool_connections gauge']
+    for alias, stats in pool_stats.items():
+        for state in ('idle', 'in_use'):
+            lines.append(f'db_pool_connections{{alias="{alias}",state="{state}"}} {stats[state]}')
+    for counter in ('connections_opened', 'connections_discarded', 'checkouts', 'waits', 'timeouts'):
+        lines += [f'# TYPE db_pool_{counter}_total counter']
+        lines += [f'db_pool_{counter}_total{{alias="{alias}"}} {stats[counter]}' for alias, stats in pool_stats.items()]
+    return lines
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponse(status=401)
+    lines = []
+    for histogram in HISTOGRAMS.values():
+        lines += histogram.render()
+    lines += render_pool_stats()
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,17 @@
+class CounterFieldsMixin:
+    """
+    Keeps denormalized counter columns out of regular saves.
+
+    Counters are only written through atomic ``F()`` updates (see the signal
+    modules), so saving an instance that was loaded earlier must not write its
+    stale counter values back to the database.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        return super().save(*args, **kwargs)
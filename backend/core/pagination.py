@@ -0,0 +1,220 @@
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination that can also run from async views."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [obj async for obj in queryset[self.offset:self.offset + self.limit]]
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on every ordering field, (created_at, id) by default.
+
+    DRF's CursorPagination only stores the first ordering field in the cursor and
+    skips ties with an offset; here the cursor holds the whole key, so each page
+    is a single range scan over the matching composite index.
+    An ordering already applied to the queryset by the filterset replaces the
+    default one.
+    Requests with an ``offset`` are still served by LimitOffsetPagination, so old
+    clients keep working.
+    The total ``count`` costs a scan of every matching row, so it is only
+    returned with ``?count=true``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    count_query_param = 'count'
+    count_description = 'Also return the total number of results.'
+    legacy_pagination_class = AsyncLimitOffsetPagination
+    legacy = None
+    count = None
+    count_queryset = None
+
+    def get_legacy_paginator(self, request):
+        if self.legacy is None and request is not None and 'offset' in request.query_params:
+            self.legacy = self.legacy_pagination_class()
+        return self.legacy
+
+    def get_ordering(self, request, queryset, view):
+        # an ordering applied by the filterset (e.g. ?ordering=rank) wins
+        if queryset.query.order_by and all(isinstance(field, str) for field in queryset.query.order_by):
+            ordering = tuple(queryset.query.order_by)
+        else:
+            ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        legacy = self.get_legacy_paginator(request)
+        if legacy is not None:
+            queryset = queryset.order_by(*self.get_ordering(request, queryset, view))
+            return legacy.paginate_queryset(queryset, request, view)
+
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        if self.count_queryset is not None:
+            self.count = self.count_queryset.count()
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        legacy = self.get_legacy_paginator(request)
+        if legacy is not None:
+            queryset = queryset.order_by(*self.get_ordering(request, queryset, view))
+            return await legacy.apaginate_queryset(queryset, request, view)
+
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        if self.count_queryset is not None:
+            self.count = await self.count_queryset.acount()
+        return self.set_page([obj async for obj in queryset])
+
+    def wants_count(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true')
+
+    def get_page_queryset(self, queryset, request, view):
+        """Build the query of the requested page plus one row, to know if another page follows."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        if self.wants_count(request):
+            self.count_queryset = queryset.order_by()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse, self.position = False, None
+        else:
+            self.reverse = self.cursor.reverse
+            self.position = self.decode_position(queryset, self.cursor.position)
+
+        if self.reverse:
+            queryset = queryset.order_by(*[self._reverse_field(field) for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.get_position_filter(self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > self.page_size
+        if self.reverse:
+            self.page = list(reversed(self.page))
+            self.has_next, self.has_previous = self.position is not None, has_following_position
+        else:
+            self.has_next, self.has_previous = has_following_position, self.position is not None
+        return self.page
+
+    def get_position_filter(self, position, reverse):
+        keyset_filter = Q()
+        equal_fields = {}
+        for field, value in zip(self.ordering, position):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            keyset_filter |= Q(**equal_fields, **{lookup: value})
+            equal_fields[name] = value
+        return keyset_filter
+
+    def get_next_link(self):
+        if self.legacy is not None:
+            return self.legacy.get_next_link()
+        if not self.has_next:
+            return None
+        position = self.encode_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if self.legacy is not None:
+            return self.legacy.get_previous_link()
+        if not self.has_previous:
+            return None
+        position = self.encode_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def encode_position(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return json.dumps(values)
+
+    def decode_position(self, queryset, position):
+        if position is None:
+            return None
+        try:
+            values = json.loads(position)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self._to_python(queryset, field.lstrip('-'), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = {
+            'count': {'type': 'integer', 'example': 123},
+            **response_schema['properties'],
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        legacy_parameters = self.legacy_pagination_class().get_schema_operation_parameters(view)
+        return parameters + [
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': self.count_description,
+                'schema': {'type': 'boolean'},
+            },
+        ] + [param for param in legacy_parameters if param['name'] == 'offset']
+
+    @staticmethod
+    def _reverse_field(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _to_python(queryset, name, value):
+        # an ordering on an annotation, e.g. the copy's created_at in the feed
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field.to_python(value)
+        try:
+            return queryset.model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            return value
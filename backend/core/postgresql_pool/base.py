@@ -0,0 +1,100 @@
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+from core.postgresql_pool.pool import ConnectionPool, close_pool, get_params_key, get_pool
+
+# PostgreSQL backend that takes its connections from a per process pool,
+# enabled with DATABASE_POOL=True (see core/settings.py). The connections Django
+# closes at the start and end of a request (close_old_connections, e.g. with
+# CONN_MAX_AGE=0) go back to the pool instead of closing the socket. Any other
+# close(), e.g. by the test runner before it drops the test database, closes
+# the socket and the idle connections of the pool.
+#
+# DATABASES['default']['POOL'] = {'min_size': 2, 'max_size': 10, 'timeout': 10}
+
+if is_psycopg3:
+    raise ImproperlyConfigured('core.postgresql_pool only supports psycopg2.')
+
+
+def _is_usable(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _reset(connection) -> bool:
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    connection_pool = None
+    returning_to_pool = False
+
+    def create_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+
+        def connect():
+            connection = self.Database.connect(**conn_params)
+            # same as the postgresql backend, see its get_new_connection()
+            psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+            return connection
+
+        return ConnectionPool(
+            connect,
+            min_size=options.get('min_size', 1),
+            max_size=options.get('max_size', 10),
+            timeout=options.get('timeout', 10),
+            check=_is_usable if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+            reset=_reset,
+        )
+
+    def get_pool(self, conn_params):
+        return get_pool(self.alias, get_params_key(conn_params), lambda: self.create_pool(conn_params))
+
+    def get_new_connection(self, conn_params):
+        isolation_level_value = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(isolation_level_value or IsolationLevel.READ_COMMITTED)
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level_value} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+        # the connection goes back to the pool it came from, even if the settings change
+        self.connection_pool = self.get_pool(conn_params)
+        connection = self.connection_pool.getconn()
+        if isolation_level_value is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def close_if_unusable_or_obsolete(self):
+        self.returning_to_pool = True
+        try:
+            super().close_if_unusable_or_obsolete()
+        finally:
+            self.returning_to_pool = False
+
+    def close(self):
+        super().close()
+        if not self.returning_to_pool:
+            close_pool(self.alias)
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection_pool.putconn(self.connection)
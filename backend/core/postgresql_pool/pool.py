@@ -0,0 +1,159 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A thread safe pool of DB-API connections, between `min_size` and `max_size` open.
+
+    `connect()` opens a connection, `check(connection)` tells if an idle connection
+    can still be used before it is handed out (None skips the check) and
+    `reset(connection)` makes a returned connection ready for reuse, or returns
+    False to have it closed.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0, check=None, reset=None):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError('The pool needs 0 <= min_size <= max_size and max_size >= 1.')
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.closed = False
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self.counters = {'connections_opened': 0, 'connections_discarded': 0, 'checkouts': 0, 'waits': 0, 'timeouts': 0}
+        for _ in range(min_size):
+            self._idle.append(self._open())
+            self._size += 1
+
+    def _open(self):
+        connection = self.connect()
+        with self._condition:
+            self.counters['connections_opened'] += 1
+        return connection
+
+    def _discard(self, connection):
+        # the lock is reentrant, close() discards while holding it
+        with self._condition:
+            self.counters['connections_discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        with self._condition:
+            deadline = time.monotonic() + self.timeout
+            if not self._idle and self._size >= self.max_size:
+                self.counters['waits'] += 1
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeout(f'No database connection was free after {self.timeout} seconds.')
+                self._condition.wait(remaining)
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                # the slot is taken now, the connection is opened outside the lock
+                connection = None
+                self._size += 1
+            self.counters['checkouts'] += 1
+
+        if connection is not None and self.check is not None and not self.check(connection):
+            self._discard(connection)
+            connection = None
+        if connection is None:
+            try:
+                connection = self._open()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+        return connection
+
+    def putconn(self, connection):
+        reusable = not self.closed and (self.reset is None or self.reset(connection))
+        if not reusable:
+            self._discard(connection)
+        with self._condition:
+            if reusable:
+                self._idle.append(connection)
+            else:
+                self._size -= 1
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+                self._size -= 1
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self.counters,
+            }
+
+
+# database alias -> (key of the connection parameters, pool)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_params_key(conn_params) -> tuple:
+    return tuple(sorted((name, repr(value)) for name, value in conn_params.items()))
+
+
+def get_pool(alias, params_key, create_pool):
+    """
+    The pool of `alias`. Once its connection parameters change, e.g. when the
+    test runner switches NAME to the test database, the old pool is closed and
+    a new one is created.
+    """
+    with _pools_lock:
+        entry = _pools.get(alias)
+        if entry is not None and entry[0] != params_key:
+            entry[1].close()
+            entry = None
+        if entry is None:
+            entry = _pools[alias] = (params_key, create_pool())
+        return entry[1]
+
+
+def close_pool(alias):
+    with _pools_lock:
+        entry = _pools.pop(alias, None)
+    if entry is not None:
+        entry[1].close()
+
+
+def get_pool_stats() -> dict:
+    """Stats of every pool open in this process, by database alias."""
+    with _pools_lock:
+        return {alias: pool.get_stats() for alias, (_, pool) in _pools.items()}
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for _, pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -25,12 +25,18 @@ USING_DATABASE = env('USING_DATABASE', default='sqlite3')
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-c(7o8j@(u31p4^m#cgvcbu-$9w9x1%j4wr17tvsy$59da+&rqk'
+SECRET_KEY = env('SECRET_KEY', default='django-insecure-c(7o8j@(u31p4^m#cgvcbu-$9w9x1%j4wr17tvsy$59da+&rqk')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env.bool('DEBUG', default=True)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=[])
+
+# only behind a proxy that sets X-Forwarded-Proto itself (the nginx of the production
+# profile, see deploy/nginx.conf), otherwise any client could claim https
+BEHIND_PROXY = env.bool('BEHIND_PROXY', default=False)
+if BEHIND_PROXY:
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 # Application definition
 
@@ -51,6 +57,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so it measures the whole request (removes itself unless METRICS_ENABLED)
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +98,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # seconds a connection is kept open for the next requests of the same worker thread
+        'CONN_MAX_AGE': env.int('CONN_MAX_AGE', default=0),
+        # check that a kept connection still works before reusing it
+        'CONN_HEALTH_CHECKS': env.bool('CONN_HEALTH_CHECKS', default=True),
     }
 }
 if USING_DATABASE == 'postgresql':
@@ -99,6 +111,34 @@ if USING_DATABASE == 'postgresql':
     DATABASES['default']["PASSWORD"] = env('DATABASE_PASSWORD')
     DATABASES['default']["HOST"] = env('DATABASE_HOST')
     DATABASES['default']["PORT"] = env('DATABASE_PORT')
+    # connection pool shared by the threads of a worker process, see core/postgresql_pool
+    if env.bool('DATABASE_POOL', default=False):
+        DATABASES['default']["ENGINE"] = 'core.postgresql_pool'
+        # connections go back to the pool at the end of every request
+        DATABASES['default']["CONN_MAX_AGE"] = 0
+        DATABASES['default']["POOL"] = {
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            # seconds to wait for a free connection before failing
+            'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10.0),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# e.g. CACHE_URL=rediscache://127.0.0.1:6379/1
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+# seconds a serialized detail response stays cached, see core/cache.py
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=300)
+# the profile page embeds posts whose likes and comments do not invalidate it
+PROFILE_PAGE_CACHE_TIMEOUT = env.int('PROFILE_PAGE_CACHE_TIMEOUT', default=30)
+# follow lists kept in memory by each process, see accounts/graph.py: the total
+# number of user ids held, and the seconds a list is used before it is read again
+FOLLOW_GRAPH_MAX_IDS = env.int('FOLLOW_GRAPH_MAX_IDS', default=1_000_000)
+FOLLOW_GRAPH_MAX_AGE = env.int('FOLLOW_GRAPH_MAX_AGE', default=300)
 
 
 # Password validation
@@ -136,9 +176,11 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# collectstatic copies the files here, they are served by nginx in production
+STATIC_ROOT = env('STATIC_ROOT', default=os.path.join(BASE_DIR, 'staticfiles'))
 
 # media files settings
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = env('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
 MEDIA_URL = '/media/'
 
 # Default primary key field type
@@ -181,6 +223,28 @@ SIMPLE_JWT = {
 }
 
 
+# home feed settings
+# posts of authors with more followers than FEED_FANOUT_LIMIT are not copied to
+# every follower feed, they are pulled when the feed is read instead
+FEED_FANOUT_LIMIT = env.int('FEED_FANOUT_LIMIT', default=10000)
+# how many recent posts of a user are copied to a feed when someone follows them
+FEED_BACKFILL_SIZE = env.int('FEED_BACKFILL_SIZE', default=200)
+
+
+# trending posts, see posts/trending.py
+# likes and comments lose half of their weight every TRENDING_HALF_LIFE hours.
+# run `manage.py recompute_trending` after changing it
+TRENDING_HALF_LIFE = env.float('TRENDING_HALF_LIFE', default=24)
+
+
+# request metrics, see core/metrics.py
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=False)
+# add a Server-Timing header (SQL, serializer and total time) to every response
+METRICS_SERVER_TIMING = env.bool('METRICS_SERVER_TIMING', default=False)
+# when set, /api/metrics/ requires the header `Authorization: Bearer <METRICS_TOKEN>`
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'DRF Social Network',
     # OTHER SETTINGS
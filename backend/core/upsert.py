@@ -0,0 +1,142 @@
+from django.db import connections, router, transaction, IntegrityError
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+# Single statement writes for rows guarded by a unique constraint (likes, follows).
+# Instead of checking with exists() before writing, the constraint decides:
+# an INSERT ... ON CONFLICT DO NOTHING RETURNING that returns nothing means the
+# row was already there, and a DELETE ... RETURNING that returns nothing means
+# there was nothing to delete. Concurrent requests can not raise IntegrityError
+# either way, and only the rows actually written are reported.
+# post_save/post_delete are sent by hand so the signal receivers (counters,
+# feed, cache) keep working; pre_save/pre_delete and cascades are not run.
+
+
+def supports_upsert(connection) -> bool:
+    if connection.vendor == 'postgresql':
+        return True
+    # RETURNING needs SQLite 3.35
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def _insert_sql(model, values, parent_model, parent_pks, parent_field, connection):
+    opts = model._meta
+    parent_opts = parent_model._meta
+    quote = connection.ops.quote_name
+    fields = [opts.get_field(name) for name in values]
+    columns = [quote(field.column) for field in fields]
+    selected = []
+    for field in fields:
+        if connection.vendor == 'postgresql':
+            # the SELECT list has no types for the INSERT to coerce from
+            selected.append(f'CAST(%s AS {field.db_type(connection)})')
+        else:
+            selected.append('%s')
+    returning = [quote(opts.pk.column)]
+    if parent_field is not None:
+        # the foreign key to the parent is filled from the selected parent rows
+        parent_column = quote(opts.get_field(parent_field).column)
+        columns.append(parent_column)
+        selected.append(quote(parent_opts.pk.column))
+        returning.append(parent_column)
+    sql = (
+        f"INSERT INTO {quote(opts.db_table)} ({', '.join(columns)}) "
+        f"SELECT {', '.join(selected)} FROM {quote(parent_opts.db_table)} "
+        f"WHERE {quote(parent_opts.pk.column)} IN ({', '.join(['%s'] * len(parent_pks))}) "
+        f"ON CONFLICT DO NOTHING RETURNING {', '.join(returning)}"
+    )
+    params = [field.get_db_prep_save(value, connection) for field, value in zip(fields, values.values())]
+    return sql, params + list(parent_pks)
+
+
+def insert_returning(model, parent_model, parent_pks, parent_field=None, **values) -> list:
+    """
+    Insert a `model` row with `values` for each of `parent_pks` whose
+    `parent_model` row exists, skipping the rows that already exist. With
+    `parent_field`, that foreign key is set to each parent pk. Returns the new
+    instances; no signals are sent.
+    """
+    parent_pks = list(parent_pks)
+    if not parent_pks:
+        return []
+    using = router.db_for_write(model)
+    connection = connections[using]
+    now = timezone.now()
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now_add', False):
+            values.setdefault(field.attname, now)
+    parent_attname = model._meta.get_field(parent_field).attname if parent_field is not None else None
+
+    if supports_upsert(connection):
+        sql, params = _insert_sql(model, values, parent_model, parent_pks, parent_field, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        if parent_attname is None:
+            return [model(pk=row[0], **values) for row in rows]
+        return [model(pk=row[0], **values, **{parent_attname: row[1]}) for row in rows]
+
+    instances = []
+    existing = parent_model._base_manager.using(using).filter(pk__in=parent_pks).values_list('pk', flat=True)
+    for parent_pk in existing:
+        instance = model(**values) if parent_attname is None else model(**values, **{parent_attname: parent_pk})
+        try:
+            with transaction.atomic(using=using):
+                model._base_manager.using(using).bulk_create([instance])
+        except IntegrityError:
+            continue
+        instances.append(instance)
+    return instances
+
+
+def delete_returning(model, fields=(), **lookup) -> list:
+    """
+    Delete the `model` rows matching `lookup` with a single DELETE. Returns
+    (pk, *fields) of each row it deleted; no signals are sent.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    opts = model._meta
+    quote = connection.ops.quote_name
+    queryset = model._base_manager.using(using).filter(**lookup)
+    columns = [quote(opts.pk.column)] + [quote(opts.get_field(name).column) for name in fields]
+
+    with connection.cursor() as cursor:
+        if supports_upsert(connection):
+            where, params = queryset.query.get_compiler(using).compile(queryset.query.where)
+            cursor.execute(
+                f"DELETE FROM {quote(opts.db_table)} WHERE {where} RETURNING {', '.join(columns)}", params
+            )
+            return [tuple(row) for row in cursor.fetchall()]
+        # without RETURNING, each row found is deleted by pk and kept if the
+        # DELETE still found it
+        deleted = []
+        for row in queryset.values_list('pk', *fields):
+            cursor.execute(f"DELETE FROM {quote(opts.db_table)} WHERE {quote(opts.pk.column)} = %s", [row[0]])
+            if cursor.rowcount:
+                deleted.append(tuple(row))
+        return deleted
+
+
+def create_unique(model, parent_model, parent_pk, **values):
+    """
+    Insert a `model` row with `values` unless it already exists or the
+    `parent_model` row it points to is gone. Returns the new instance, or None.
+    """
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        instances = insert_returning(model, parent_model, [parent_pk], **values)
+        if not instances:
+            return None
+        post_save.send(sender=model, instance=instances[0], created=True, update_fields=None, raw=False, using=using)
+    return instances[0]
+
+
+def delete_unique(model, **lookup) -> bool:
+    """Delete the `model` row matching `lookup` with a single DELETE. Returns whether it existed."""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        deleted = delete_returning(model, **lookup)
+        for pk, in deleted:
+            post_delete.send(sender=model, instance=model(pk=pk, **lookup), using=using, origin=None)
+    return bool(deleted)
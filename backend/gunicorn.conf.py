@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+from environ import Env
+
+# Production server, run from the backend directory with: gunicorn -c gunicorn.conf.py
+# every setting can be tuned with an environment variable, see deploy/production.env
+
+env = Env()
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# 'gthread' serves core.wsgi with `threads` threads per worker,
+# 'uvicorn.workers.UvicornWorker' serves core.asgi (needed by the /api/async/ views)
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread')
+wsgi_app = 'core.asgi:application' if 'uvicorn' in worker_class.lower() else 'core.wsgi:application'
+workers = env.int('GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1)
+threads = env.int('GUNICORN_THREADS', default=4)
+
+timeout = env.int('GUNICORN_TIMEOUT', default=30)
+graceful_timeout = env.int('GUNICORN_GRACEFUL_TIMEOUT', default=30)
+keepalive = env.int('GUNICORN_KEEPALIVE', default=5)
+# workers are restarted after this many requests, so a slow memory leak can not grow forever
+max_requests = env.int('GUNICORN_MAX_REQUESTS', default=1000)
+max_requests_jitter = env.int('GUNICORN_MAX_REQUESTS_JITTER', default=100)
+
+accesslog = env('GUNICORN_ACCESS_LOG', default='-')
+errorlog = '-'
+
+
+def on_starting(server):
+    # the response cache versions and the follow graph must be shared by the workers
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    django.setup()
+    from core.cache import check_shared_cache
+    check_shared_cache(server.cfg.workers)
+
+
+def worker_exit(server, worker):
+    # close the database connections (and pool) of the worker before it stops
+    from django.db import connections
+    from core.postgresql_pool.pool import close_pools
+    connections.close_all()
+    close_pools()
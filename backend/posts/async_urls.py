@@ -0,0 +1,15 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    # posts
+    path('', async_views.async_post_list_view, name='async-post-list'),
+    path('feed/', async_views.async_post_feed_view, name='async-post-feed-list'),
+    path('<int:pk>/', async_views.async_post_detail_view, name='async-post-detail'),
+    path('<int:pk>/like-list/', async_views.async_post_like_list_view, name='async-post-like-list'),
+
+    # comments in posts
+    path('<int:pk>/comments/', async_views.async_comment_list_view, name='async-comment-list'),
+    path('comments/<int:pk>/', async_views.async_comment_detail_view, name='async-comment-detail'),
+    path('comments/<int:pk>/like-list/', async_views.async_comment_like_list_view, name='async-comment-like-list'),
+]
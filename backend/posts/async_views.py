@@ -0,0 +1,48 @@
+from posts import views
+from core.async_views import AsyncAPIViewMixin, AsyncListModelMixin, AsyncRetrieveModelMixin
+
+# Async variants of the read endpoints of posts/views.py, see core/async_views.py.
+# They reuse the sync views, so querysets, filters and serializers stay the same.
+
+
+class AsyncPostListView(AsyncAPIViewMixin, AsyncListModelMixin, views.PostListCreateView):
+    pass
+
+async_post_list_view = AsyncPostListView.as_view()
+
+
+class AsyncPostFeedView(AsyncAPIViewMixin, AsyncListModelMixin, views.PostFeedView):
+    pass
+
+async_post_feed_view = AsyncPostFeedView.as_view()
+
+
+class AsyncPostDetailView(AsyncAPIViewMixin, AsyncRetrieveModelMixin, views.PostDetailView):
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_retrieve(request, super().aretrieve, *args, **kwargs)
+
+async_post_detail_view = AsyncPostDetailView.as_view()
+
+
+class AsyncCommentListView(AsyncAPIViewMixin, AsyncListModelMixin, views.CommentListCreateView):
+    pass
+
+async_comment_list_view = AsyncCommentListView.as_view()
+
+
+class AsyncCommentDetailView(AsyncAPIViewMixin, AsyncRetrieveModelMixin, views.CommentDetailView):
+    pass
+
+async_comment_detail_view = AsyncCommentDetailView.as_view()
+
+
+class AsyncPostLikeListView(AsyncAPIViewMixin, AsyncListModelMixin, views.PostLikeListView):
+    pass
+
+async_post_like_list_view = AsyncPostLikeListView.as_view()
+
+
+class AsyncCommentLikeListView(AsyncAPIViewMixin, AsyncListModelMixin, views.CommentLikeListView):
+    pass
+
+async_comment_like_list_view = AsyncCommentLikeListView.as_view()
@@ -0,0 +1,38 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from accounts.models import Profile, Follow
+from posts.models import Post, Comment, PostLike, CommentLike
+
+# Data export
+# Every row of a user as NDJSON: one JSON object per line, with the kind of row
+# in "type". Each table is read with iterator(chunk_size=...), which uses a
+# server-side cursor on PostgreSQL and fetches `chunk_size` rows at a time on
+# the other databases, so memory stays the same however many rows a user has.
+
+CHUNK_SIZE = 2000
+CONTENT_TYPE = 'application/x-ndjson'
+
+Tagging = Post.tags.through
+
+
+def get_export_querysets(user) -> list:
+    """(type, queryset of dicts) of every kind of row of `user`, in export order."""
+    return [
+        ('profile', Profile.objects.filter(user=user).values(
+            'id', 'user_id', 'user__username', 'user__email', 'name', 'bio', 'picture', 'created_at',
+        )),
+        ('post', Post.objects.filter(author=user).values('id', 'title', 'content', 'created_at', 'edited')),
+        ('post_tag', Tagging.objects.filter(post__author=user).values('post_id', 'tag_id', 'tag__name')),
+        ('comment', Comment.objects.filter(author=user).values('id', 'post_id', 'parent_id', 'content', 'created_at')),
+        ('post_like', PostLike.objects.filter(user=user).values('id', 'post_id', 'created_at')),
+        ('comment_like', CommentLike.objects.filter(user=user).values('id', 'comment_id', 'created_at')),
+        ('following', Follow.objects.filter(follower=user).values('id', 'followed_id', 'created_at')),
+        ('follower', Follow.objects.filter(followed=user).values('id', 'follower_id', 'created_at')),
+    ]
+
+
+def export_user_data(user, chunk_size=CHUNK_SIZE):
+    """Yield the NDJSON lines of every row of `user`."""
+    for kind, queryset in get_export_querysets(user):
+        for row in queryset.order_by('pk').iterator(chunk_size=chunk_size):
+            yield json.dumps({'type': kind, **row}, cls=DjangoJSONEncoder) + '\n'
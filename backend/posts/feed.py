@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db.models import F, Q
+from posts.models import Post, FeedItem
+from accounts.models import Follow, Profile
+
+# Home feed (fan-out on write)
+# every post is copied to the feed of each follower of its author when it is
+# created, so reading a feed is a single range scan over (user, -created_at).
+# authors with more than FEED_FANOUT_LIMIT followers are not fanned out, their
+# posts are pulled at read time instead. When an author drops back to the limit,
+# their recent posts are copied to every follower, so the posts written and the
+# follows made while they were pulled stay in the feeds.
+
+BATCH_SIZE = 1000
+
+
+def is_fanout_author(user_id) -> bool:
+    return Profile.objects.filter(
+        user_id=user_id, total_followers__lte=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def fan_out_post(post):
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(followed_id=post.author_id).values_list('follower_id', flat=True)
+    items = [
+        FeedItem(user_id=follower_id, post=post, author_id=post.author_id, created_at=post.created_at)
+        for follower_id in followers.iterator(chunk_size=BATCH_SIZE)
+    ]
+    FeedItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def get_backfill_posts(author_id) -> list:
+    posts = Post.objects.filter(author_id=author_id).order_by('-created_at')[:settings.FEED_BACKFILL_SIZE]
+    return list(posts.values_list('id', 'created_at'))
+
+
+def backfill_feed(follower_id, followed_id):
+    if not is_fanout_author(followed_id):
+        return
+    items = [
+        FeedItem(user_id=follower_id, post_id=post_id, author_id=followed_id, created_at=created_at)
+        for post_id, created_at in get_backfill_posts(followed_id)
+    ]
+    FeedItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def resume_fan_out(author_id):
+    """Backfill the feed of every follower of an author who is fanned out again."""
+    posts = get_backfill_posts(author_id)
+    if not posts:
+        return
+    followers = Follow.objects.filter(followed_id=author_id).values_list('follower_id', flat=True)
+    items = []
+    for follower_id in followers.iterator(chunk_size=BATCH_SIZE):
+        items += [
+            FeedItem(user_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in posts
+        ]
+        if len(items) >= BATCH_SIZE:
+            FeedItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            items = []
+    FeedItem.objects.bulk_create(items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def follower_removed(author_id):
+    # the follower counter was just decremented
+    total_followers = Profile.objects.filter(user_id=author_id).values_list('total_followers', flat=True).first()
+    if total_followers == settings.FEED_FANOUT_LIMIT:
+        resume_fan_out(author_id)
+
+
+def purge_feed(follower_id, followed_id):
+    FeedItem.objects.filter(user_id=follower_id, author_id=followed_id).delete()
+
+
+def get_feed_queryset(user, queryset=None):
+    if queryset is None:
+        queryset = Post.objects.all()
+    pulled_authors = list(Profile.objects.filter(
+        user__followers__follower=user, total_followers__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('user_id', flat=True))
+    if not pulled_authors:
+        # ordered on the copy, a range scan over the (user, -created_at) index
+        return queryset.filter(feed_items__user=user).annotate(
+            feed_created_at=F('feed_items__created_at')
+        ).order_by('-feed_created_at', '-id')
+    fanned_out = FeedItem.objects.filter(user=user).values('post_id')
+    return queryset.filter(Q(id__in=fanned_out) | Q(author__in=pulled_authors)).order_by('-created_at', '-id')
@@ -1,71 +1,96 @@
 from django_filters import rest_framework as filters
-from django.db.models import Q
 from posts.models import Post, Tag, Comment, PostLike, CommentLike
+from posts.search import search_posts
+from posts.tags import filter_posts_by_tags
+from accounts.search import search_people
 
 
-class PostFilter(filters.FilterSet):
+class OrderingFilterMixin:
+    # every choice is a column with a (column, -id) index, so ordering a page is a range
+    # scan, and the -id tie breaker keeps the keyset cursor unique
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(value, '-id')
+
+
+class PostFilter(OrderingFilterMixin, filters.FilterSet):
     class Meta:
         model = Post
-        fields = ['search_author', 'search_post', 'tags', 'created_at']
+        fields = ['author', 'search_author', 'search_post', 'tags', 'created_at', 'ordering']
         
+    author = filters.NumberFilter(field_name='author_id', label='Posts of this user id')
     created_at = filters.DateTimeFromToRangeFilter()
-    tags = filters.ModelMultipleChoiceFilter(field_name='tags', queryset=Tag.objects.all(), conjoined=True)
+    tags = filters.ModelMultipleChoiceFilter(
+        field_name='tags', queryset=Tag.objects.all(), method='filter_tags', label='Posts having every one of these tags',
+    )
     search_author = filters.CharFilter(method='filter_search_author', label='Search by Profile Name or Username of the Post Author')
     search_post = filters.CharFilter(method='filter_search_post', label='Search by Title or Content')
+    ordering = filters.ChoiceFilter(
+        choices=[
+            ('rank', 'Relevance'), ('-created_at', 'Most recent'),
+            ('-total_likes', 'Most liked'), ('-total_comments', 'Most commented'),
+        ],
+        method='filter_ordering', label='Ordering (rank is only available with search_post)',
+    )
         
     def filter_search_author(self, queryset, name, value):
-        return queryset.filter(
-            Q(author__profile__name__icontains=value) | Q(author__username__icontains=value)
-        )
+        return search_people(queryset, value, user_path='author')
         
     def filter_search_post(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value) | Q(content__icontains=value)
-        )
+        return search_posts(queryset, value)
+
+    def filter_tags(self, queryset, name, value):
+        return filter_posts_by_tags(queryset, [tag.pk for tag in value])
+
+    def filter_ordering(self, queryset, name, value):
+        if value == 'rank':
+            if 'search_rank' in queryset.query.annotations:
+                return queryset.order_by('-search_rank', '-id')
+            return queryset
+        return super().filter_ordering(queryset, name, value)
 
 
-class TagFilter(filters.FilterSet):
+class TagFilter(OrderingFilterMixin, filters.FilterSet):
     class Meta:
         model = Tag
-        fields = ['name']
+        fields = ['name', 'ordering']
     
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    ordering = filters.ChoiceFilter(choices=[('-total_posts', 'Most used')], method='filter_ordering', label='Ordering')
     
 
-class CommentFilter(filters.FilterSet):
+class CommentFilter(OrderingFilterMixin, filters.FilterSet):
     class Meta:
         model = Comment
-        fields = ['content', 'search_author', 'created_at']
+        fields = ['content', 'search_author', 'created_at', 'ordering']
 
     content = filters.CharFilter(field_name='content', lookup_expr='icontains')
     search_author = filters.CharFilter(method='filter_search_author', label='Search by Profile Name or Username of the Comment Author')
     created_at = filters.DateTimeFromToRangeFilter()
+    ordering = filters.ChoiceFilter(
+        choices=[('-created_at', 'Most recent'), ('-total_likes', 'Most liked')], method='filter_ordering', label='Ordering',
+    )
 
     def filter_search_author(self, queryset, name, value):
-        return queryset.filter(
-            Q(author__profile__name__icontains=value) | Q(author__username__icontains=value)
-        )
+        return search_people(queryset, value, user_path='author')
 
-class PostLikeFilter(filters.FilterSet):
+class PostLikeFilter(OrderingFilterMixin, filters.FilterSet):
     class Meta:
         model = PostLike
-        fields = ['search_user']
+        fields = ['search_user', 'ordering']
 
     search_user = filters.CharFilter(method='filter_search_user', label='Search by Profile Name or Username')
+    ordering = filters.ChoiceFilter(choices=[('-created_at', 'Most recent')], method='filter_ordering', label='Ordering')
 
     def filter_search_user(self, queryset, name, value):
-        return queryset.filter(
-            Q(user__profile__name__icontains=value) | Q(user__username__icontains=value)
-        )
+        return search_people(queryset, value, user_path='user', ranked=True)
         
-class CommentLikeFilter(filters.FilterSet):
+class CommentLikeFilter(OrderingFilterMixin, filters.FilterSet):
     class Meta:
         model = CommentLike
-        fields = ['search_user']
+        fields = ['search_user', 'ordering']
 
     search_user = filters.CharFilter(method='filter_search_user', label='Search by Profile Name or Username')
+    ordering = filters.ChoiceFilter(choices=[('-created_at', 'Most recent')], method='filter_ordering', label='Ordering')
 
     def filter_search_user(self, queryset, name, value):
-        return queryset.filter(
-            Q(user__profile__name__icontains=value) | Q(user__username__icontains=value)
-        )
+        return search_people(queryset, value, user_path='user', ranked=True)
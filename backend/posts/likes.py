@@ -0,0 +1,83 @@
+from django.db import router, transaction
+from django.db.models import F
+from posts.models import Post, PostLike, Comment, CommentLike
+from posts import trending
+from core.cache import bump_version
+from core.upsert import insert_returning, delete_returning
+
+# Like/dislike write path used by the bulk endpoints.
+# A whole batch costs a fixed number of queries: one SELECT to find the existing
+# targets, one INSERT ... ON CONFLICT DO NOTHING RETURNING (or DELETE ... RETURNING,
+# see core/upsert.py) and one UPDATE of the denormalized counters. Only the rows the write returned
+# are counted, so concurrent requests liking or disliking the same targets can
+# not count a like twice. Rows are written without model signals, so the
+# counters, cache versions and trending scores normally kept by
+# posts/signals.py are updated here in bulk instead.
+
+LIKED = 'liked'
+ALREADY_LIKED = 'already_liked'
+DISLIKED = 'disliked'
+NOT_LIKED = 'not_liked'
+NOT_FOUND = 'not_found'
+
+
+class LikeWriter:
+    def __init__(self, like_model, target_model, target_field, cache_kind=None, trending_weight=None):
+        self.like_model = like_model
+        self.target_model = target_model
+        self.target_field = target_field
+        self.cache_kind = cache_kind
+        self.trending_weight = trending_weight
+
+    def get_targets(self, ids) -> set:
+        return set(self.target_model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    def insert(self, user, ids) -> set:
+        """Insert the missing likes, returns the target ids actually inserted."""
+        # a target deleted since get_targets is skipped by the INSERT ... SELECT
+        likes = insert_returning(self.like_model, self.target_model, ids, parent_field=self.target_field, user_id=user.pk)
+        return {getattr(like, f'{self.target_field}_id') for like in likes}
+
+    def delete(self, user, ids) -> set:
+        """Delete the user's likes of `ids`, returns the target ids actually deleted."""
+        target_attname = f'{self.target_field}_id'
+        rows = delete_returning(self.like_model, fields=[target_attname], user_id=user.pk, **{f'{target_attname}__in': ids})
+        return {target_id for _, target_id in rows}
+
+    def changed(self, target_ids, delta):
+        if not target_ids:
+            return
+        self.target_model.objects.filter(pk__in=target_ids).update(total_likes=F('total_likes') + delta)
+        if self.trending_weight:
+            trending.add_weight(target_ids, self.trending_weight * delta)
+        if self.cache_kind:
+            for target_id in target_ids:
+                bump_version(self.cache_kind, target_id)
+
+    def like(self, user, ids) -> list:
+        ids = list(dict.fromkeys(ids))
+        using = router.db_for_write(self.like_model)
+        with transaction.atomic(using=using):
+            targets = self.get_targets(ids)
+            inserted = self.insert(user, [pk for pk in ids if pk in targets]) if targets else set()
+            self.changed([pk for pk in ids if pk in inserted], 1)
+        return [
+            {'id': pk, 'status': NOT_FOUND if pk not in targets else LIKED if pk in inserted else ALREADY_LIKED}
+            for pk in ids
+        ]
+
+    def dislike(self, user, ids) -> list:
+        ids = list(dict.fromkeys(ids))
+        using = router.db_for_write(self.like_model)
+        with transaction.atomic(using=using):
+            targets = self.get_targets(ids)
+            deleted = self.delete(user, [pk for pk in ids if pk in targets]) if targets else set()
+            self.changed([pk for pk in ids if pk in deleted], -1)
+        return [
+            {'id': pk, 'status': NOT_FOUND if pk not in targets else DISLIKED if pk in deleted else NOT_LIKED}
+            for pk in ids
+        ]
+
+
+post_likes = LikeWriter(PostLike, Post, 'post', cache_kind='post', trending_weight=trending.LIKE_WEIGHT)
+comment_likes = LikeWriter(CommentLike, Comment, 'comment')
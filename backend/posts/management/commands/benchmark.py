@@ -0,0 +1,266 @@
+import itertools
+import json
+import math
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from posts import urls as posts_urls
+from posts.likes import post_likes, comment_likes
+from posts.models import Post, Tag, PostLike, Comment, CommentLike
+from accounts import urls as accounts_urls
+from accounts.models import User, Profile, Follow
+
+BULK_SIZE = 100
+
+
+def allow_test_client():
+    # the test client sends requests to 'testserver', like the test runner allows it
+    return override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+
+
+class Scenario:
+    """
+    One request to benchmark. `prepare()` runs before each request and returns
+    the url args and data to use. Write requests are rolled back, so the
+    dataset is the same for every run.
+    """
+    def __init__(self, url_name, method='get', args=(), data=None, prepare=None, authenticated=True):
+        self.url_name = url_name
+        self.method = method
+        self.args = args
+        self.data = data
+        self.prepare = prepare
+        self.authenticated = authenticated
+
+    @property
+    def label(self) -> str:
+        return f'{self.method.upper()} {self.url_name}'
+
+    @property
+    def writes(self) -> bool:
+        return self.method != 'get'
+
+
+def percentile(samples, percent) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Send requests to every endpoint of posts/urls.py and accounts/urls.py using the data of the current '
+        'database (see generate_social_graph) and report the p50/p95/p99 latency and the queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Requests sent to each endpoint.')
+        parser.add_argument('--warmup', type=int, default=2, help='Requests sent to each endpoint before measuring.')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help='Only benchmark this URL name.')
+        parser.add_argument('--user', help='Email of the user sending the requests. Defaults to the one following the most users.')
+        parser.add_argument('--password', default='Benchmark123@', help='Password of that user, used by the token endpoint.')
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='JSON file of an earlier run to compare the results with.')
+
+    def handle(self, *args, **options):
+        self.password = options['password']
+        self.counter = itertools.count()
+        self.load_fixtures(options['user'])
+        scenarios = self.get_scenarios()
+
+        missing = self.get_url_names() - {scenario.url_name for scenario in scenarios}
+        if missing:
+            self.stderr.write(f'Not benchmarked: {", ".join(sorted(missing))}')
+        if options['endpoints']:
+            scenarios = [scenario for scenario in scenarios if scenario.url_name in options['endpoints']]
+
+        results = {}
+        self.stdout.write(f'{"endpoint":<32}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}{"errors":>8}')
+        with allow_test_client():
+            for scenario in scenarios:
+                results[scenario.label] = result = self.run_scenario(scenario, options['requests'], options['warmup'])
+                self.stdout.write(
+                    f'{scenario.label:<32}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                    f'{result["queries"]:>9.1f}{result["errors"]:>8}'
+                )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'rows': {model.__name__: model.objects.count() for model in (User, Follow, Post, Comment, PostLike, CommentLike)},
+            'endpoints': results,
+        }
+        if options['compare']:
+            self.compare(report, options['compare'])
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def get_url_names(self) -> set:
+        return {pattern.name for pattern in posts_urls.urlpatterns + accounts_urls.urlpatterns}
+
+    def load_fixtures(self, email):
+        users = User.objects.all()
+        self.user = users.filter(email=email).first() if email else users.order_by('-profile__total_following').first()
+        self.post = Post.objects.order_by('-total_likes', '-id').first()
+        self.comment = Comment.objects.order_by('-total_likes', '-id').first()
+        if self.user is None or self.post is None or self.comment is None:
+            raise CommandError('The database needs at least one user, post and comment, see generate_social_graph.')
+        self.other_user = users.exclude(id=self.user.id).order_by('-profile__total_followers').first()
+        if self.other_user is None:
+            raise CommandError('The database needs at least two users.')
+        self.profile = Profile.objects.get(user=self.user)
+        self.post_ids = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:BULK_SIZE])
+        self.tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True)[:3])
+        self.tag = Tag.objects.order_by('-total_posts', '-id').first()
+        if self.tag is None:
+            raise CommandError('The database needs at least one tag.')
+        self.comment_ids = list(Comment.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:BULK_SIZE])
+
+    def unique_name(self, prefix) -> str:
+        return f'{prefix}{time.time_ns()}{next(self.counter)}'
+
+    def new_post(self) -> dict:
+        post = Post.objects.create(author=self.user, title='Benchmark', content='Benchmark post.')
+        return {'args': [post.id]}
+
+    def get_scenarios(self) -> list:
+        user, post, comment = self.user, self.post, self.comment
+        return [
+            # posts
+            Scenario('post-list-create'),
+            Scenario('post-list-create', 'post', data={'title': 'Benchmark', 'content': 'Benchmark post.', 'tags': self.tag_ids}),
+            Scenario('post-feed-list'),
+            Scenario('post-trending-list'),
+            Scenario('post-detail', args=[post.id]),
+            Scenario('post-update', 'patch', data={'title': 'Benchmark updated'}, prepare=self.new_post),
+            Scenario('post-delete', 'delete', prepare=self.new_post),
+            Scenario('post-like-list', args=[post.id]),
+            Scenario('tag-list'),
+            Scenario('related-tag-list', args=[self.tag.id]),
+            Scenario('tag-post-list', args=[self.tag.id]),
+            Scenario('like-post', 'post', args=[post.id], prepare=lambda: PostLike.objects.filter(user=user, post=post).delete()),
+            Scenario('dislike-post', 'delete', args=[post.id], prepare=lambda: PostLike.objects.get_or_create(user=user, post=post)),
+            Scenario('bulk-like-post', 'post', data={'ids': self.post_ids}),
+            Scenario('bulk-dislike-post', 'post', data={'ids': self.post_ids}, prepare=lambda: post_likes.like(user, self.post_ids)),
+            Scenario('comment-list-create', args=[post.id]),
+            Scenario('comment-thread-list', args=[post.id]),
+            Scenario('comment-reply-list', args=[comment.id]),
+            Scenario('comment-list-create', 'post', args=[post.id], data={'content': 'Benchmark comment.'}),
+            Scenario('comment-detail', args=[comment.id]),
+            Scenario(
+                'comment-delete', 'delete',
+                prepare=lambda: {'args': [Comment.objects.create(author=user, post=post, content='Benchmark comment.').id]},
+            ),
+            Scenario('comment-like-list', args=[comment.id]),
+            Scenario('like-comment', 'post', args=[comment.id], prepare=lambda: CommentLike.objects.filter(user=user, comment=comment).delete()),
+            Scenario('dislike-comment', 'delete', args=[comment.id], prepare=lambda: CommentLike.objects.get_or_create(user=user, comment=comment)),
+            Scenario('bulk-like-comment', 'post', data={'ids': self.comment_ids}),
+            Scenario('bulk-dislike-comment', 'post', data={'ids': self.comment_ids}, prepare=lambda: comment_likes.like(user, self.comment_ids)),
+            # accounts
+            Scenario('token_obtain_pair', 'post', data={'email': user.email, 'password': self.password}, authenticated=False),
+            Scenario('token_refresh', 'post', prepare=lambda: {'data': {'refresh': str(RefreshToken.for_user(user))}}, authenticated=False),
+            Scenario('user-detail', args=[user.id]),
+            Scenario('user-list'),
+            Scenario(
+                'user-registration', 'post', authenticated=False,
+                prepare=lambda: {'data': {
+                    'username': (name := self.unique_name('benchmark')), 'email': f'{name}@example.com', 'password': 'Benchmark123@',
+                }},
+            ),
+            Scenario(
+                'user-update', 'patch', args=[user.id],
+                prepare=lambda: {'data': {'username': self.unique_name('renamed'), 'old_password': self.password}},
+            ),
+            Scenario('user-delete', 'delete', args=[user.id]),
+            Scenario('user-export'),
+            Scenario('profile-detail', args=[self.profile.id]),
+            Scenario('profile-update', 'patch', args=[self.profile.id], data={'bio': 'Benchmark bio.'}),
+            Scenario('profile-list'),
+            Scenario('profile-page', args=[self.profile.id]),
+            Scenario(
+                'follow-user', 'post', args=[self.other_user.id],
+                prepare=lambda: Follow.objects.filter(follower=user, followed=self.other_user).delete(),
+            ),
+            Scenario(
+                'unfollow-user', 'delete', args=[self.other_user.id],
+                prepare=lambda: Follow.objects.get_or_create(follower=user, followed=self.other_user),
+            ),
+            Scenario('follower-list', args=[self.other_user.id]),
+            Scenario('followed-list', args=[user.id]),
+            Scenario('user-suggestion-list'),
+        ]
+
+    def send(self, client, scenario):
+        """Send one request, returns its status code, duration and number of queries."""
+        with transaction.atomic():
+            prepared = scenario.prepare() if scenario.prepare else None
+            prepared = prepared if isinstance(prepared, dict) else {}
+            url = reverse(scenario.url_name, args=prepared.get('args', scenario.args))
+            data = prepared.get('data', scenario.data)
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                start = time.perf_counter()
+                if scenario.writes:
+                    response = client.generic(
+                        scenario.method.upper(), url, json.dumps(data or {}), content_type='application/json'
+                    )
+                else:
+                    response = client.get(url)
+                if response.streaming:
+                    # the rows are only read while the response is sent
+                    b''.join(response.streaming_content)
+                duration = time.perf_counter() - start
+            # writes are undone, the next request sees the same data
+            transaction.set_rollback(True)
+        return response.status_code, duration, len(queries)
+
+    def run_scenario(self, scenario, total, warmup) -> dict:
+        headers = {}
+        if scenario.authenticated:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        client = Client(**headers)
+        for _ in range(warmup):
+            self.send(client, scenario)
+
+        durations, query_counts, statuses = [], [], {}
+        for _ in range(total):
+            status_code, duration, query_count = self.send(client, scenario)
+            durations.append(duration * 1000)
+            query_counts.append(query_count)
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        return {
+            'p50_ms': percentile(durations, 50),
+            'p95_ms': percentile(durations, 95),
+            'p99_ms': percentile(durations, 99),
+            'mean_ms': sum(durations) / total,
+            'queries': sum(query_counts) / total,
+            'max_queries': max(query_counts),
+            'errors': sum(count for code, count in statuses.items() if int(code) >= 400),
+            'statuses': statuses,
+        }
+
+    def compare(self, report, path):
+        with open(path) as file:
+            previous = json.load(file)['endpoints']
+        self.stdout.write(f'\nCompared with {path}')
+        self.stdout.write(f'{"endpoint":<32}{"p50":>10}{"p95":>10}{"queries":>10}')
+        for label, result in report['endpoints'].items():
+            if label not in previous:
+                continue
+            before = previous[label]
+            self.stdout.write(
+                f'{label:<32}{self.change(before["p50_ms"], result["p50_ms"]):>10}'
+                f'{self.change(before["p95_ms"], result["p95_ms"]):>10}{result["queries"] - before["queries"]:>+10.1f}'
+            )
+
+    def change(self, before, after) -> str:
+        if not before:
+            return '-'
+        return f'{(after - before) / before * 100:+.0f}%'
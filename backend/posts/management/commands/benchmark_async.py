@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, AsyncClient
+from django.urls import reverse
+from posts.models import Post, Comment
+from accounts.models import Profile
+from posts.management.commands.benchmark import allow_test_client
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the requests per second of the sync (WSGI) read endpoints and their async (ASGI) '
+        'variants under concurrent load, using the data of the current database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests sent to each endpoint.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at the same time.')
+
+    def get_endpoints(self):
+        post = Post.objects.order_by('-total_comments').first()
+        comment = Comment.objects.order_by('-total_likes').first()
+        profile = Profile.objects.order_by('-total_followers').first()
+        if post is None or comment is None or profile is None:
+            raise CommandError('The database needs at least one post, comment and profile to benchmark.')
+        # (label, sync url name, async url name, url args)
+        return [
+            ('post list', 'post-list-create', 'async-post-list', []),
+            ('post detail', 'post-detail', 'async-post-detail', [post.id]),
+            ('comment list', 'comment-list-create', 'async-comment-list', [post.id]),
+            ('post like list', 'post-like-list', 'async-post-like-list', [post.id]),
+            ('comment like list', 'comment-like-list', 'async-comment-like-list', [comment.id]),
+            ('profile detail', 'profile-detail', 'async-profile-detail', [profile.id]),
+            ('follower list', 'follower-list', 'async-follower-list', [profile.user_id]),
+        ]
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(f'{total} requests per endpoint, {concurrency} concurrent')
+        self.stdout.write(f'{"endpoint":<20}{"wsgi req/s":>12}{"asgi req/s":>12}')
+        with allow_test_client():
+            for label, sync_name, async_name, url_args in self.get_endpoints():
+                sync_rps = self.run_sync(reverse(sync_name, args=url_args), total, concurrency)
+                async_rps = asyncio.run(self.run_async(reverse(async_name, args=url_args), total, concurrency))
+                self.stdout.write(f'{label:<20}{sync_rps:>12.1f}{async_rps:>12.1f}')
+
+    def run_sync(self, url, total, concurrency) -> float:
+        local = threading.local()
+
+        def send(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            return local.client.get(url).status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            statuses = list(executor.map(send, range(total)))
+        elapsed = time.perf_counter() - start
+        self.check_statuses(url, statuses)
+        return total / elapsed
+
+    async def run_async(self, url, total, concurrency) -> float:
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send():
+            async with semaphore:
+                # like the ASGI handler, every request gets its own thread for sync code
+                async with ThreadSensitiveContext():
+                    response = await client.get(url)
+            return response.status_code
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*[send() for _ in range(total)])
+        elapsed = time.perf_counter() - start
+        self.check_statuses(url, statuses)
+        return total / elapsed
+
+    def check_statuses(self, url, statuses):
+        failed = [code for code in statuses if code != 200]
+        if failed:
+            raise CommandError(f'{len(failed)} requests to {url} failed with status {failed[0]}.')
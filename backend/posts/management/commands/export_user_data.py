@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from posts.export import export_user_data, CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Write every row of a user (profile, posts, comments, likes and follows) as NDJSON, like GET /api/accounts/users/export/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Email or id of the user.')
+        parser.add_argument('--output', help='File to write. Defaults to the standard output.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched from the database at a time.')
+
+    def get_user(self, value):
+        lookup = {'pk': value} if value.isdigit() else {'email': value}
+        try:
+            return User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f'The user {value} does not exist.')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        lines = export_user_data(user, chunk_size=options['chunk_size'])
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} rows of {user} to {options["output"]}.'))
@@ -0,0 +1,334 @@
+import math
+import random
+import time
+from io import StringIO
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from posts.models import Post, Tag, PostLike, Comment, CommentLike, FeedItem
+from accounts.models import User, Profile, Follow, UserTrigram
+from posts.trending import recompute_scores
+from posts.tags import rebuild_tag_index
+from posts.threads import get_key
+from accounts.search import get_trigrams, uses_trigram_table
+
+WORDS = (
+    'about after again album always animal answer around autumn beach before better between bird black '
+    'blue board book bread bridge bright build camera candle carry castle center change city clean cloud '
+    'coffee color common concert corner country cover dance dark dinner dream early earth easy energy '
+    'evening family famous farm fast field final fire flower follow forest friend garden glass golden '
+    'great green group happy harbor heart heavy history holiday house idea island journey kitchen lake '
+    'language large later light little local market memory middle minute modern moment morning mountain '
+    'music nature night north ocean office orange paint paper party people picture place plant planet '
+    'poem quiet rain river road rock room round school science season second shadow simple small snow '
+    'song sound south space spring square stone story street summer sunset table team thing today travel '
+    'tree valley village voice water weekend welcome window winter wood world writing yellow young'
+).split()
+FIRST_NAMES = 'Ana Bruno Carla Daniel Elena Felipe Gabriel Helena Igor Julia Lucas Maria Nina Otto Paula Rafael Sofia Tiago'.split()
+LAST_NAMES = 'Almeida Barros Costa Dias Ferreira Gomes Lima Melo Nunes Pereira Rocha Santos Silva Souza Teixeira Vieira'.split()
+
+
+def zipf_cum_weights(count, alpha) -> list:
+    # the k-th most popular row is picked with a probability proportional to 1 / k^alpha
+    total, cum_weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += rank ** -alpha
+        cum_weights.append(total)
+    return cum_weights
+
+
+def zipf_rank(rng, count, alpha) -> int:
+    # a rank from 1 to count drawn like zipf_cum_weights, through the inverse of
+    # the continuous power-law CDF, so no table of weights is kept per row
+    u = rng.random()
+    if alpha == 1:
+        rank = count ** u
+    else:
+        rank = ((count ** (1 - alpha) - 1) * u + 1) ** (1 / (1 - alpha))
+    return max(1, min(int(rank), count))
+
+
+def get_stride(count) -> int:
+    # coprime with count, so rank * stride % count visits every offset once
+    stride = int(count * 0.618) | 1
+    while math.gcd(stride, count) != 1:
+        stride += 2
+    return stride
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def explicit_created_at(*models):
+    # bulk_create would replace the generated timestamps with now()
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic social graph for benchmarks: users with power-law follower counts, '
+        'posts, tags, comments, replies and likes, written with bulk_create. The counters, home feeds, trending '
+        'scores, tag index and search tables are filled in afterwards, like the write paths would have done.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create.')
+        parser.add_argument('--posts', type=int, default=10000, help='Posts to create.')
+        parser.add_argument('--follows', type=float, default=20, help='Average users followed by each user.')
+        parser.add_argument('--likes', type=float, default=10, help='Average likes per post.')
+        parser.add_argument('--comments', type=float, default=2, help='Average comments per post.')
+        parser.add_argument('--replies', type=float, default=0.5, help='Average replies per comment.')
+        parser.add_argument('--comment-likes', type=float, default=1, help='Average likes per comment.')
+        parser.add_argument('--tags', type=int, default=200, help='Size of the tag vocabulary.')
+        parser.add_argument('--max-tags', type=int, default=5, help='Maximum tags per post.')
+        parser.add_argument('--alpha', type=float, default=1.0, help='Exponent of the power-law popularity.')
+        parser.add_argument('--days', type=int, default=365, help='The posts are spread over this many days.')
+        parser.add_argument('--password', default='Benchmark123@', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT.')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, to generate the same data again.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('At least 2 users are needed.')
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+
+        with explicit_created_at(Profile, Follow, Post, PostLike, Comment, CommentLike):
+            self.run_step('users', self.create_users)
+            self.run_step('follows', self.create_follows)
+            self.run_step('tags', self.create_tags)
+            self.run_step('posts', self.create_posts)
+            self.run_step('comments', self.create_comments)
+            self.run_step('replies', self.create_replies)
+            self.run_step('post likes', self.create_post_likes)
+            self.run_step('comment likes', self.create_comment_likes)
+        self.run_step('counters', lambda: call_command('rebuild_counters', stdout=StringIO()))
+        self.run_step('home feeds', self.fan_out_posts)
+        self.run_step('trending scores', lambda: recompute_scores(batch_size=self.batch_size))
+        self.run_step('tag index', rebuild_tag_index)
+        self.run_step('people search', self.index_trigrams)
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def run_step(self, label, step):
+        start = time.perf_counter()
+        with transaction.atomic():
+            created = step()
+        suffix = f': {created} rows' if created is not None else ''
+        self.stdout.write(f'{label}{suffix} ({time.perf_counter() - start:.1f}s)')
+
+    def bulk_create(self, model, objs, ignore_conflicts=False) -> int:
+        count = 0
+        for batch in batched(objs, self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+            count += len(batch)
+        return count
+
+    def sample_ids(self, id_range, k) -> list:
+        """
+        Draw `k` ids of the rows created in `id_range` (first id, last id) with
+        power-law popularity; the popular ones are spread over the range.
+        """
+        first_id, last_id = id_range
+        count = last_id - first_id + 1
+        stride = get_stride(count)
+        return [
+            first_id + (zipf_rank(self.rng, count, self.options['alpha']) - 1) * stride % count
+            for _ in range(k)
+        ]
+
+    def load_rows(self, model, ids, *fields) -> list:
+        # (id, *fields) of each drawn id; ids missing from the range are skipped
+        rows = {row[0]: row for row in model.objects.filter(pk__in=set(ids)).values_list('pk', *fields)}
+        return [rows[pk] for pk in ids if pk in rows]
+
+    @staticmethod
+    def extend_range(id_range, objs):
+        ids = [obj.pk for obj in objs]
+        if not ids:
+            return id_range
+        if id_range is None:
+            return min(ids), max(ids)
+        return min(id_range[0], *ids), max(id_range[1], *ids)
+
+    def random_time(self, after):
+        return after + (self.now - after) * self.rng.random()
+
+    def random_text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def create_users(self):
+        first_id = (User.objects.aggregate(last_id=Max('id'))['last_id'] or 0) + 1
+        password = make_password(self.options['password'])
+        users = [
+            User(
+                username=f'bench{first_id + i}', email=f'bench{first_id + i}@example.com', password=password,
+                date_joined=self.random_time(self.start - timedelta(days=30)),
+            )
+            for i in range(self.options['users'])
+        ]
+        self.bulk_create(User, users)
+        self.bulk_create(Profile, (
+            Profile(
+                user_id=user.id, created_at=user.date_joined,
+                name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'[:20],
+            )
+            for user in users
+        ))
+        self.users = [(user.id, user.date_joined) for user in users]
+        # how often users are followed and how often they post both follow a power law,
+        # independently: the most followed users are not also the most active ones
+        self.popular_users = self.rng.sample(self.users, len(self.users))
+        self.active_users = self.rng.sample(self.users, len(self.users))
+        self.user_weights = zipf_cum_weights(len(self.users), self.options['alpha'])
+        return len(users)
+
+    def create_follows(self):
+        self.first_follow_id = (Follow.objects.aggregate(last_id=Max('id'))['last_id'] or 0) + 1
+
+        def follows():
+            for follower_id, joined in self.users:
+                count = min(round(self.rng.expovariate(1 / self.options['follows'])), len(self.users) - 1)
+                followed = self.rng.choices(self.popular_users, cum_weights=self.user_weights, k=count)
+                for followed_id in {user_id for user_id, _ in followed if user_id != follower_id}:
+                    yield Follow(follower_id=follower_id, followed_id=followed_id, created_at=self.random_time(joined))
+
+        return self.bulk_create(Follow, follows())
+
+    def create_tags(self):
+        names = [f'{WORDS[i % len(WORDS)]}{i // len(WORDS) or ""}' for i in range(self.options['tags'])]
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        self.tags = list(Tag.objects.filter(name__in=names).values_list('id', flat=True))
+        self.tag_weights = zipf_cum_weights(len(self.tags), self.options['alpha'])
+        return len(self.tags)
+
+    def create_posts(self):
+        # only the range of the new ids is kept, the later steps sample from it
+        self.post_ids = None
+        for batch in batched(range(self.options['posts']), self.batch_size):
+            authors = self.rng.choices(self.active_users, cum_weights=self.user_weights, k=len(batch))
+            posts = [
+                Post(
+                    author_id=author_id, title=self.random_text(4)[:45].capitalize(), content=self.random_text(30),
+                    created_at=self.random_time(max(joined, self.start)),
+                )
+                for author_id, joined in authors
+            ]
+            Post.objects.bulk_create(posts)
+            self.post_ids = self.extend_range(self.post_ids, posts)
+            post_tags = []
+            for post in posts:
+                tag_count = self.rng.randint(0, self.options['max_tags']) if self.tags else 0
+                for tag_id in set(self.rng.choices(self.tags, cum_weights=self.tag_weights, k=tag_count)):
+                    post_tags.append(Post.tags.through(post_id=post.id, tag_id=tag_id))
+            self.bulk_create(Post.tags.through, post_tags)
+        return self.options['posts']
+
+    def create_comments(self):
+        self.comment_ids = None
+        if self.post_ids is None:
+            return 0
+        count = round(self.options['posts'] * self.options['comments'])
+        for batch in batched(range(count), self.batch_size):
+            posts = self.load_rows(Post, self.sample_ids(self.post_ids, len(batch)), 'created_at')
+            comments = [
+                Comment(
+                    post_id=post_id, author_id=self.rng.choice(self.users)[0], content=self.random_text(12),
+                    created_at=self.random_time(created_at),
+                )
+                for post_id, created_at in posts
+            ]
+            Comment.objects.bulk_create(comments)
+            self.comment_ids = self.extend_range(self.comment_ids, comments)
+        return count
+
+    def create_replies(self):
+        if self.comment_ids is None:
+            return 0
+        # one level deep: the parent is the root of the thread
+        top_level = self.comment_ids
+        count = round((top_level[1] - top_level[0] + 1) * self.options['replies'])
+        for batch in batched(range(count), self.batch_size):
+            parents = self.load_rows(Comment, self.sample_ids(top_level, len(batch)), 'post_id', 'created_at')
+            replies = [
+                Comment(
+                    post_id=post_id, parent_id=parent_id, root_id=parent_id,
+                    path=get_key(Comment(pk=parent_id)), author_id=self.rng.choice(self.users)[0],
+                    content=self.random_text(8), created_at=self.random_time(created_at),
+                )
+                for parent_id, post_id, created_at in parents
+            ]
+            Comment.objects.bulk_create(replies)
+            self.comment_ids = self.extend_range(self.comment_ids, replies)
+        return count
+
+    def create_likes(self, like_model, target_model, target_field, id_range, average):
+        if id_range is None:
+            return 0
+        count = round((id_range[1] - id_range[0] + 1) * average)
+        for batch in batched(range(count), self.batch_size):
+            liked = self.load_rows(target_model, self.sample_ids(id_range, len(batch)), 'created_at')
+            users = self.rng.choices(self.users, k=len(liked))
+            # a user drawn twice for the same target is dropped by the unique constraint
+            like_model.objects.bulk_create([
+                like_model(user_id=user_id, created_at=self.random_time(created_at), **{f'{target_field}_id': target_id})
+                for (target_id, created_at), (user_id, _) in zip(liked, users)
+            ], ignore_conflicts=True)
+        return like_model.objects.filter(**{f'{target_field}_id__gte': id_range[0]}).count()
+
+    def create_post_likes(self):
+        return self.create_likes(PostLike, Post, 'post', self.post_ids, self.options['likes'])
+
+    def create_comment_likes(self):
+        return self.create_likes(CommentLike, Comment, 'comment', self.comment_ids, self.options['comment_likes'])
+
+    def fan_out_posts(self):
+        if self.post_ids is None:
+            return 0
+        # the same rows posts/feed.py fans out on write, in a single INSERT ... SELECT
+        quote = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {quote(FeedItem._meta.db_table)} (user_id, post_id, author_id, created_at) "
+            f"SELECT f.follower_id, p.id, p.author_id, p.created_at "
+            f"FROM {quote(Post._meta.db_table)} p "
+            f"INNER JOIN {quote(Follow._meta.db_table)} f ON f.followed_id = p.author_id "
+            f"INNER JOIN {quote(Profile._meta.db_table)} pr ON pr.user_id = p.author_id "
+            f"WHERE p.id >= %s AND f.id >= %s AND pr.total_followers <= %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.post_ids[0], self.first_follow_id, settings.FEED_FANOUT_LIMIT])
+            return cursor.rowcount
+
+    def index_trigrams(self):
+        if not uses_trigram_table(connection.alias):
+            return None
+        profiles = Profile.objects.filter(user_id__gte=self.users[0][0]).values_list('user_id', 'user__username', 'name')
+        return self.bulk_create(UserTrigram, (
+            UserTrigram(user_id=user_id, trigram=trigram)
+            for user_id, username, name in profiles.iterator(chunk_size=self.batch_size)
+            for trigram in get_trigrams(username, name)
+        ))
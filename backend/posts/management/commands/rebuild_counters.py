@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from posts.models import Post, Tag, PostLike, Comment, CommentLike
+from accounts.models import Profile, Follow
+
+
+# (model, counter field, source model, source field, outer field)
+COUNTERS = [
+    (Post, 'total_likes', PostLike, 'post', 'pk'),
+    (Post, 'total_comments', Comment, 'post', 'pk'),
+    (Post, 'total_tags', Post.tags.through, 'post', 'pk'),
+    (Comment, 'total_likes', CommentLike, 'comment', 'pk'),
+    (Comment, 'total_replies', Comment, 'parent', 'pk'),
+    (Tag, 'total_posts', Post.tags.through, 'tag', 'pk'),
+    (Profile, 'total_followers', Follow, 'followed', 'user_id'),
+    (Profile, 'total_following', Follow, 'follower', 'user_id'),
+    (Profile, 'total_posts', Post, 'author', 'user_id'),
+]
+
+
+def count_rows(model, field, outer_field):
+    rows = model.objects.filter(**{field: OuterRef(outer_field)}).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(rows), 0)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized like/comment/reply/tag/follow/post counters from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only verify the counters and fail if any of them is out of date, without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        total_mismatches = 0
+        for model, counter, source, field, outer_field in COUNTERS:
+            expected = count_rows(source, field, outer_field)
+            label = f'{model.__name__}.{counter}'
+            with transaction.atomic():
+                mismatches = model.objects.annotate(expected=expected).exclude(**{counter: F('expected')})
+                count = mismatches.count()
+                if count and not options['check']:
+                    model.objects.filter(pk__in=mismatches.values('pk')).update(**{counter: expected})
+            total_mismatches += count
+            self.stdout.write(f'{label}: {count} out of date')
+
+        if options['check'] and total_mismatches:
+            raise CommandError(f'{total_mismatches} counters are out of date.')
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {total_mismatches} counters.'))
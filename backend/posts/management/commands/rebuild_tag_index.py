@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from posts.tags import rebuild_tag_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the posts by tag and the related tags tables from the tags of the posts. '
+        'Run it after writing Post.tags rows without the ORM signals, e.g. bulk inserts.'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_tag_index()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the tag index with {count} related tag pairs.'))
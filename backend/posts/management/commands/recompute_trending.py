@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from posts.trending import recompute_scores, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the trending scores of the posts from their recent likes and comments. '
+        'Run it periodically (e.g. hourly from cron) to correct the drift of the incremental updates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per query.')
+
+    def handle(self, *args, **options):
+        count = recompute_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {count} trending scores.'))
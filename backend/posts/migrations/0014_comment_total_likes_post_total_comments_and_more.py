@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, field, outer_field='pk'):
+    rows = model.objects.filter(**{field: OuterRef(outer_field)}).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(rows), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostLike = apps.get_model('posts', 'PostLike')
+    Comment = apps.get_model('posts', 'Comment')
+    CommentLike = apps.get_model('posts', 'CommentLike')
+    Profile = apps.get_model('accounts', 'Profile')
+    Follow = apps.get_model('accounts', 'Follow')
+
+    Post.objects.update(
+        total_likes=count_rows(PostLike, 'post'),
+        total_comments=count_rows(Comment, 'post'),
+        total_tags=count_rows(Post.tags.through, 'post'),
+    )
+    Comment.objects.update(total_likes=count_rows(CommentLike, 'comment'))
+    Profile.objects.update(
+        total_followers=count_rows(Follow, 'followed', 'user_id'),
+        total_following=count_rows(Follow, 'follower', 'user_id'),
+        total_posts=count_rows(Post, 'author', 'user_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_profile_total_followers_profile_total_following_and_more'),
+        ('posts', '0013_post_edited'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='total_likes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='total_comments',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='total_likes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='total_tags',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_feeds(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FeedItem = apps.get_model('posts', 'FeedItem')
+    Follow = apps.get_model('accounts', 'Follow')
+    Profile = apps.get_model('accounts', 'Profile')
+
+    fanout_authors = Profile.objects.filter(total_followers__lte=settings.FEED_FANOUT_LIMIT).values('user_id')
+    follows = Follow.objects.filter(followed__in=fanout_authors).values_list('follower_id', 'followed_id')
+    for follower_id, followed_id in follows.iterator():
+        posts = Post.objects.filter(author_id=followed_id).order_by('-created_at')[:settings.FEED_BACKFILL_SIZE]
+        FeedItem.objects.bulk_create([
+            FeedItem(user_id=follower_id, post_id=post_id, author_id=followed_id, created_at=created_at)
+            for post_id, created_at in posts.values_list('id', 'created_at')
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0012_profile_total_followers_profile_total_following_and_more'),
+        ('posts', '0014_comment_total_likes_post_total_comments_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='posts.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='posts_feedi_user_id_0bc7b1_idx'), models.Index(fields=['user', 'author'], name='posts_feedi_user_id_6e4bfe_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations, DatabaseError
+
+# frozen copies of the posts.search DDL as of this migration
+
+POSTGRES_SEARCH_SQL = [
+    """
+    ALTER TABLE posts_post ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS posts_post_search_vector_idx ON posts_post USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_TABLE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        title, content, content='posts_post', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_SEARCH_TRIGGERS_SQL = {
+    'posts_post_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+    'posts_post_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    'posts_post_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS posts_post_fts_update AFTER UPDATE OF title, content ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO posts_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
+
+def install(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_SEARCH_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute(SQLITE_SEARCH_TABLE_SQL)
+            except DatabaseError:
+                # this SQLite build has no FTS5, searches use icontains
+                return
+            for sql in SQLITE_SEARCH_TRIGGERS_SQL.values():
+                cursor.execute(sql)
+            cursor.execute("INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')")
+
+
+def uninstall(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS posts_post_search_vector_idx")
+            cursor.execute("ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector")
+        elif schema_editor.connection.vendor == 'sqlite':
+            for name in SQLITE_SEARCH_TRIGGERS_SQL:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute("DROP TABLE IF EXISTS posts_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_author_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
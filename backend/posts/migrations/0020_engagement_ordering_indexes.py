@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_trendingscore'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-total_likes', '-id'], name='posts_comme_post_id_51745b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-total_likes', '-id'], name='posts_post_total_l_e662db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-total_comments', '-id'], name='posts_post_total_c_b49549_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_engagement_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_posts', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TagPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='total_posts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-total_posts', '-id'], name='posts_tag_total_p_946505_idx'),
+        ),
+        migrations.AddField(
+            model_name='tagposting',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_postings', to='posts.post'),
+        ),
+        migrations.AddField(
+            model_name='tagposting',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='posts.tag'),
+        ),
+        migrations.AddField(
+            model_name='tagpair',
+            name='related',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_pairs', to='posts.tag'),
+        ),
+        migrations.AddField(
+            model_name='tagpair',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairs', to='posts.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='tagposting',
+            index=models.Index(fields=['tag', '-created_at', '-post'], name='posts_tagpo_tag_id_06723f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagposting',
+            unique_together={('tag', 'post')},
+        ),
+        migrations.AddIndex(
+            model_name='tagpair',
+            index=models.Index(fields=['tag', '-total_posts', '-related'], name='posts_tagpa_tag_id_f17da9_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='tagpair',
+            unique_together={('tag', 'related')},
+        ),
+    ]
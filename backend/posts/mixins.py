@@ -1,4 +1,7 @@
 from accounts.serializers import ProfileSimpleSerializer
+from accounts.viewer import ViewerFieldsMixin
+from core.fields import BulkPrimaryKeyRelatedField
+from posts.models import Tag
 from rest_framework import serializers
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
@@ -10,13 +13,10 @@ max_post_editable_time = 12
 
 class PostValidationMixin:
     def validate_tags(self, value):
-        if self.instance:
-            current_tags_count = self.instance.tags.all().count()
-            if current_tags_count + len(value) > max_tags_allowed:
-                raise serializers.ValidationError({'detail': f"A post can't have more than {max_tags_allowed} tags."})
-        else:
-            if len(value) > max_tags_allowed:
-                raise serializers.ValidationError({'detail': f"A post can't have more than {max_tags_allowed} tags."})
+        # the tags replace the current ones, so only the new list counts; the
+        # limit_tags receiver checks it again in the transaction that writes them
+        if len(set(value)) > max_tags_allowed:
+            raise serializers.ValidationError({'detail': f"A post can't have more than {max_tags_allowed} tags."})
         return value
 
     def validate_edited(self, instance):
@@ -40,13 +40,67 @@ class PostSerializerMixin(serializers.ModelSerializer):
     # 'nested_tags' field is just to be see the tags and return them serialized 
     # 'tags' field expects a list of tag ids, and it's what we use as 'input'
     author = ProfileSimpleSerializer(source='author.profile', required=False)
+    tags = BulkPrimaryKeyRelatedField(many=True, queryset=Tag.objects.all(), write_only=True, required=False)
     nested_tags = serializers.SerializerMethodField(read_only=True)
     
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # plans the queryset from the declared fields, so a page of posts is
+        # serialized with a fixed number of queries instead of one per row
+        fields = cls.Meta.fields
+        if 'author' in fields:
+            queryset = queryset.select_related('author__profile')
+        if 'nested_tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        return queryset
+
     @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_nested_tags(self, obj) -> List[str]:
         from posts.serializers import TagSerializer
         tags = obj.tags.all()
         serializer = TagSerializer(tags, many=True)
         return serializer.data
-    
-    
\ No newline at end of file
+
+
+class AuthoredViewerFieldsMixin(ViewerFieldsMixin, serializers.Serializer):
+    """
+    Viewer fields of a liked and authored object (posts, comments). The likes of
+    the viewer are read from `like_model`, whose `like_field` points to the object.
+    """
+    is_liked = serializers.SerializerMethodField(help_text='Whether you like it.')
+    is_following_author = serializers.SerializerMethodField(help_text='Whether you follow the author.')
+    is_own = serializers.SerializerMethodField(help_text='Whether you are the author.')
+
+    like_model = None
+    like_field = None
+
+    @property
+    def liked_key(self) -> str:
+        return f'liked_{self.like_field}s'
+
+    def load_liked(self, viewer, pks):
+        lookup = f'{self.like_field}_id'
+        return self.like_model.objects.filter(user=viewer, **{f'{lookup}__in': pks}).values_list(lookup, flat=True)
+
+    def resolve_viewer_fields(self, objects):
+        self.resolve_viewer_flags(self.liked_key, [obj.pk for obj in objects], self.load_liked)
+
+    def get_is_liked(self, obj) -> bool:
+        return self.get_viewer_flag(self.liked_key, obj.pk, self.load_liked)
+
+    def get_is_following_author(self, obj) -> bool:
+        return self.viewer_follows(obj.author_id)
+
+    def get_is_own(self, obj) -> bool:
+        return self.is_viewer(obj.author_id)
+
+    def add_viewer_fields(self, representations):
+        liked = self.resolve_viewer_flags(self.liked_key, [data['id'] for data in representations], self.load_liked)
+        for data in representations:
+            author_id = data['author']['user']['id']
+            data.update(
+                is_liked=liked.get(data['id'], False),
+                is_following_author=self.viewer_follows(author_id),
+                is_own=self.is_viewer(author_id),
+            )
+        ProfileSimpleSerializer(context=self.context).add_viewer_fields([data['author'] for data in representations])
@@ -1,35 +1,48 @@
 from django.db import models
 from django.conf import settings
+from core.mixins import CounterFieldsMixin
 
 
 User = settings.AUTH_USER_MODEL
 # Create your models here.
 
-class Tag(models.Model):
+class Tag(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=25, unique=True)
+    # posts using the tag, kept up to date by posts/tags.py
+    total_posts = models.PositiveIntegerField(default=0)
+
+    counter_fields = ('total_posts',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_posts', '-id']),
+        ]
     
-class Post(models.Model):
+class Post(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=45)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     tags = models.ManyToManyField(Tag, related_name='posts')
     created_at = models.DateTimeField(auto_now_add=True)
     edited = models.BooleanField(default=False)
+    # denormalized counters, kept up to date by the receivers in posts/signals.py
+    total_likes = models.PositiveIntegerField(default=0)
+    total_comments = models.PositiveIntegerField(default=0)
+    total_tags = models.PositiveIntegerField(default=0)
+
+    counter_fields = ('total_likes', 'total_comments', 'total_tags')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['author', '-created_at', '-id']),
+            # ?ordering=-total_likes / -total_comments
+            models.Index(fields=['-total_likes', '-id']),
+            models.Index(fields=['-total_comments', '-id']),
+        ]
         
     def __str__(self) -> str:
         return self.title
-
-    @property
-    def total_likes(self)  -> int:
-        return self.likes.count()
-    
-    @property
-    def total_comments(self) -> int:
-        return self.comments.count()
-
-    @property
-    def total_tags(self) -> int:
-        return self.tags.count()        
     
 
 class PostLike(models.Model):
@@ -38,24 +51,40 @@ class PostLike(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id']),
+        ]
         
     def __str__(self) -> str:
         return f'{self.user} liked the {self.post} post'  
 
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # reply threads, see posts/threads.py
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='descendants')
+    path = models.CharField(max_length=255, blank=True, default='')
+    total_likes = models.PositiveIntegerField(default=0)
+    total_replies = models.PositiveIntegerField(default=0)
+
+    counter_fields = ('total_likes', 'total_replies')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id']),
+            models.Index(fields=['post', '-total_likes', '-id']),
+            models.Index(fields=['post', 'parent', '-created_at', '-id']),
+            models.Index(fields=['parent', 'created_at', 'id']),
+            models.Index(fields=['root', 'path', 'id']),
+        ]
     
     def __str__(self) -> str:
         return f'Comment | {self.author} -> {self.post}'
 
-    @property
-    def total_likes(self) -> int:
-        return self.likes.count()
-
 
 class CommentLike(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments_liked')
@@ -63,7 +92,70 @@ class CommentLike(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     class Meta:
         unique_together = ('user', 'comment')
+        indexes = [
+            models.Index(fields=['comment', '-created_at', '-id']),
+        ]
             
     def __str__(self) -> str:
         return f'{self.user} liked the {self.comment} comment'
 
+
+
+class FeedItem(models.Model):
+    # materialized home feed: one row per (reader, post) filled on write by posts/feed.py
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='feed_items')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post} in the feed of {self.user}'
+
+
+class TrendingScore(models.Model):
+    # time-decayed weight of the post, its likes and comments, see posts/trending.py
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    score = models.FloatField()
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post} trending score {self.score}'
+
+
+class TagPosting(models.Model):
+    # posts of a tag by recency, filled by posts/tags.py when tags are added to a post
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='postings')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tag_postings')
+    created_at = models.DateTimeField()
+    class Meta:
+        unique_together = ('tag', 'post')
+        indexes = [
+            models.Index(fields=['tag', '-created_at', '-post']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.post} tagged {self.tag}'
+
+
+class TagPair(models.Model):
+    # posts using both tags, stored in both directions, see posts/tags.py
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='pairs')
+    related = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='related_pairs')
+    total_posts = models.PositiveIntegerField(default=0)
+    class Meta:
+        unique_together = ('tag', 'related')
+        indexes = [
+            models.Index(fields=['tag', '-total_posts', '-related']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.tag} and {self.related} in {self.total_posts} posts'
@@ -0,0 +1,129 @@
+import re
+from functools import lru_cache
+from django.db import connections, DatabaseError
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Full-text search over the post title and content.
+# PostgreSQL: a generated `search_vector` tsvector column on posts_post with a
+# GIN index, so the database keeps it up to date on every write.
+# SQLite: an FTS5 external content table kept in sync by triggers.
+# Any other database falls back to the old `icontains` lookups.
+
+SEARCH_CONFIG = 'english'
+SQLITE_FTS_TABLE = 'posts_post_fts'
+
+POSTGRES_SEARCH_SQL = [
+    f"""
+    ALTER TABLE posts_post ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS posts_post_search_vector_idx ON posts_post USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        title, content, content='posts_post', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_SEARCH_TRIGGERS_SQL = {
+    f'{SQLITE_FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {SQLITE_FTS_TABLE}_insert AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+    f'{SQLITE_FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {SQLITE_FTS_TABLE}_delete AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    f'{SQLITE_FTS_TABLE}_update': f"""
+        CREATE TRIGGER {SQLITE_FTS_TABLE}_update AFTER UPDATE OF title, content ON posts_post BEGIN
+            INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
+
+def install_search_backend(connection):
+    """Create the search column/table if the database supports it."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRES_SEARCH_SQL:
+                cursor.execute(sql)
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute(SQLITE_SEARCH_TABLE_SQL)
+            except DatabaseError:
+                # this SQLite build has no FTS5, searches use icontains
+                return
+    repair_search_backend(connection)
+
+
+def repair_search_backend(connection):
+    """
+    Recreate the SQLite triggers that keep the FTS5 table in sync. Migrations
+    that rebuild the posts_post table drop them, so this runs after every migrate.
+    """
+    has_sqlite_fts.cache_clear()
+    if connection.vendor != 'sqlite' or SQLITE_FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'posts_post'")
+        existing_triggers = {row[0] for row in cursor.fetchall()}
+        missing_triggers = [name for name in SQLITE_SEARCH_TRIGGERS_SQL if name not in existing_triggers]
+        for name in missing_triggers:
+            cursor.execute(SQLITE_SEARCH_TRIGGERS_SQL[name])
+        if missing_triggers:
+            cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+
+@lru_cache(maxsize=None)
+def has_sqlite_fts(alias) -> bool:
+    return SQLITE_FTS_TABLE in connections[alias].introspection.table_names()
+
+
+def get_search_terms(value) -> list:
+    return re.findall(r'[^\W_]+', value.lower())
+
+
+def search_posts(queryset, value):
+    """
+    Filter the posts matching every term of `value` (the last characters of each
+    term may be missing, so prefixes match) and annotate them with `search_rank`.
+    """
+    terms = get_search_terms(value)
+    vendor = connections[queryset.db].vendor
+    if terms and vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        matches = RawSQL(
+            f"\"posts_post\".\"search_vector\" @@ to_tsquery('{SEARCH_CONFIG}', %s)", [tsquery],
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank(\"posts_post\".\"search_vector\", to_tsquery('{SEARCH_CONFIG}', %s))", [tsquery],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    if terms and vendor == 'sqlite' and has_sqlite_fts(queryset.db):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        matches = RawSQL(
+            f"\"posts_post\".\"id\" IN (SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s)", [match],
+            output_field=BooleanField(),
+        )
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f"(SELECT -bm25({SQLITE_FTS_TABLE}, 2.0, 1.0) FROM {SQLITE_FTS_TABLE} "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = \"posts_post\".\"id\")", [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(search_rank=rank)
+
+    return queryset.filter(
+        Q(title__icontains=value) | Q(content__icontains=value)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -1,21 +1,37 @@
 from typing import List
+from django.db import transaction
 from rest_framework import serializers
 from posts.models import Post, Tag, Comment, CommentLike, PostLike
 from accounts.serializers import ProfileSimpleSerializer
-from posts.mixins import PostValidationMixin, PostSerializerMixin
+from posts.mixins import PostValidationMixin, PostSerializerMixin, AuthoredViewerFieldsMixin
+from accounts.viewer import ViewerFieldsListSerializer
+from posts import threads
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ['id', 'name']
 
 
-class PostSerializer(PostValidationMixin, PostSerializerMixin, serializers.ModelSerializer):        
+class RelatedTagSerializer(serializers.ModelSerializer):
+    posts_together = serializers.IntegerField(read_only=True, help_text='Posts using both tags.')
+
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'total_posts', 'posts_together']
+
+
+class PostSerializer(PostValidationMixin, PostSerializerMixin, AuthoredViewerFieldsMixin, serializers.ModelSerializer):        
+    like_model = PostLike
+    like_field = 'post'
+
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'content', 'author', 'tags', 'nested_tags', 'created_at', 'total_likes', 'total_tags', 'total_comments', 'edited'
+            'id', 'title', 'content', 'author', 'tags', 'nested_tags', 'created_at', 'total_likes', 'total_tags', 'total_comments', 'edited',
+            'is_liked', 'is_following_author', 'is_own',
         ]    
+        list_serializer_class = ViewerFieldsListSerializer
         extra_kwargs = {
             'id': {'read_only': True},
             'created_at': {'read_only': True},
@@ -23,15 +39,20 @@ class PostSerializer(PostValidationMixin, PostSerializerMixin, serializers.Model
             'tags': {'write_only': True, 'required': False}, 
             'nested_tags': {'read_only': True},
             'edited': {'read_only': True},
+            'total_likes': {'read_only': True},
+            'total_tags': {'read_only': True},
+            'total_comments': {'read_only': True},
         }
     
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         validated_data['author'] = request.user
-        tags = validated_data.pop('tags')
+        tags = validated_data.pop('tags', [])
         post = Post.objects.create(**validated_data)
-        for tag in tags:
-                post.tags.add(tag)
+        # a single INSERT for every tag, the post is rolled back if limit_tags refuses them
+        post.tags.add(*tags)
+        post.total_tags = len({tag.pk for tag in tags})
         return post
     
 
@@ -50,8 +71,12 @@ class PostUpdateSerializer(PostValidationMixin, PostSerializerMixin, serializers
             'title': {'required': False},
             'content': {'required': False},
             'edited': {'read_only': True},
+            'total_likes': {'read_only': True},
+            'total_tags': {'read_only': True},
+            'total_comments': {'read_only': True},
         }
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         instance.title = validated_data.get('title', instance.title)
         instance.content = validated_data.get('content', instance.content)
@@ -60,6 +85,8 @@ class PostUpdateSerializer(PostValidationMixin, PostSerializerMixin, serializers
         if tags is not None:
             instance.tags.set(tags)
         instance.save()
+        if tags is not None:
+            instance.refresh_from_db(fields=['total_tags'])
         return instance
 
 
@@ -71,18 +98,40 @@ class PostDeleteSerializer(serializers.ModelSerializer):
         ]    
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(AuthoredViewerFieldsMixin, serializers.ModelSerializer):
     author = ProfileSimpleSerializer(source='author.profile', required=False)
+    depth = serializers.SerializerMethodField()
+    like_model = CommentLike
+    like_field = 'comment'
     
     class Meta:
         model = Comment
-        fields = ['id', 'content', 'post', 'author', 'created_at', 'total_likes']
+        fields = [
+            'id', 'content', 'post', 'parent', 'depth', 'author', 'created_at', 'total_likes', 'total_replies',
+            'is_liked', 'is_following_author', 'is_own',
+        ]
+        list_serializer_class = ViewerFieldsListSerializer
         extra_kwargs = {
             'id': {'read_only': True},
             'created_at': {'read_only': True},
             'author': {'read_only': True},
             'post': {'required': False},
+            'parent': {'required': False},
+            'total_likes': {'read_only': True},
+            'total_replies': {'read_only': True},
         }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('author__profile')
+
+    def get_depth(self, obj) -> int:
+        return threads.get_depth(obj)
+
+    def validate_parent(self, value):
+        if value is not None and threads.get_depth(value) + 1 > threads.MAX_DEPTH:
+            raise serializers.ValidationError(f'A thread can not be deeper than {threads.MAX_DEPTH} replies.')
+        return value
     
     def create(self, validated_data):
         request = self.context.get('request')
@@ -91,6 +140,23 @@ class CommentSerializer(serializers.ModelSerializer):
         return comment
     
     
+class CommentThreadSerializer(CommentSerializer):
+    replies = CommentSerializer(source='first_replies', many=True, read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, replies=threads.REPLIES_PER_COMMENT):
+        replies_queryset = super().setup_eager_loading(Comment.objects.all())
+        return threads.prefetch_first_replies(super().setup_eager_loading(queryset), replies_queryset, replies)
+
+    def resolve_viewer_fields(self, comments):
+        # the replies of the page too, instead of one query per thread
+        replies = [reply for comment in comments for reply in getattr(comment, 'first_replies', [])]
+        super().resolve_viewer_fields([*comments, *replies])
+    
+    
 class CommentLikeSerializer(serializers.ModelSerializer):
     profile = ProfileSimpleSerializer(source='user.profile', required=False)
 
@@ -100,6 +166,10 @@ class CommentLikeSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'profile': {'read_only':True, 'required': False},
         }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('user__profile')
         
     def validate(self, data):
         request = self.context.get('request')
@@ -121,6 +191,10 @@ class PostLikeSerializer(serializers.ModelSerializer):
             'profile': {'read_only':True, 'required': False},
         }
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('user__profile')
+
     def validate(self, data):
         request = self.context.get('request')
         data['user'] = request.user
@@ -129,3 +203,11 @@ class PostLikeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'detail': 'You are already liking this post.'})
         return data
 
+
+class BulkLikeSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+
+
+class BulkLikeResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.CharField()
@@ -1,11 +1,249 @@
-from posts.models import Post
+from posts.models import Tag, Post, PostLike, Comment, CommentLike
+from posts import feed
+from posts import search
+from posts import trending
+from posts import tags
+from posts import threads
+from posts.mixins import max_tags_allowed
+from core.cache import bump_version, forget_related_id
+from accounts.models import Profile, Follow
 from django.core.exceptions import ValidationError
-from django.db.models.signals import m2m_changed
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db import connections
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete, post_migrate
 from django.dispatch import receiver
 
 @receiver(m2m_changed, sender=Post.tags.through)
-def limit_tags(sender, instance, action, pk_set, **kwargs):
-    if action == "pre_add":
-        if instance.tags.count() + len(pk_set) > 30:
-            raise ValidationError("A post can't have more than 30 tags.")
+def limit_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() only sends the tags the post doesn't have yet, a single count covers the whole batch
+    if action == "pre_add" and not reverse:
+        if sender.objects.filter(post_id=instance.pk).count() + len(pk_set) > max_tags_allowed:
+            raise ValidationError(f"A post can't have more than {max_tags_allowed} tags.")
 
+
+# denormalized counters
+# every write is a single UPDATE with an F() expression, so concurrent
+# requests never overwrite each other's increments.
+
+def refresh_total_tags(post_ids):
+    tags_count = Post.tags.through.objects.filter(post_id=OuterRef('pk')).order_by().values('post_id').annotate(count=Count('pk')).values('count')
+    Post.objects.filter(pk__in=post_ids).update(total_tags=Coalesce(Subquery(tags_count), 0))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_total_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_total_tags([instance.pk])
+    elif action == 'post_add':
+        Post.objects.filter(pk__in=pk_set).update(total_tags=F('total_tags') + 1)
+    elif action == 'post_remove':
+        refresh_total_tags(pk_set)
+    elif action == 'pre_clear':
+        instance.posts.update(total_tags=F('total_tags') - 1)
+
+
+@receiver(pre_delete, sender=Tag)
+def decrement_total_tags(sender, instance, **kwargs):
+    # the cascade deletes the Post.tags rows without m2m_changed; the tag index
+    # rows of the tag cascade too
+    instance.posts.update(total_tags=F('total_tags') - 1)
+
+
+@receiver(post_save, sender=Post)
+def increment_total_posts(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.filter(user_id=instance.author_id).update(total_posts=F('total_posts') + 1)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_total_posts(sender, instance, **kwargs):
+    Profile.objects.filter(user_id=instance.author_id).update(total_posts=F('total_posts') - 1)
+
+
+@receiver(post_save, sender=PostLike)
+def increment_post_total_likes(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(total_likes=F('total_likes') + 1)
+
+
+@receiver(post_delete, sender=PostLike)
+def decrement_post_total_likes(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(total_likes=F('total_likes') - 1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_total_comments(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(total_comments=F('total_comments') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_total_comments(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(total_comments=F('total_comments') - 1)
+
+
+@receiver(post_save, sender=Comment)
+def increment_total_replies(sender, instance, created, **kwargs):
+    if created and instance.parent_id is not None:
+        Comment.objects.filter(pk=instance.parent_id).update(total_replies=F('total_replies') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_total_replies(sender, instance, **kwargs):
+    if instance.parent_id is not None:
+        Comment.objects.filter(pk=instance.parent_id).update(total_replies=F('total_replies') - 1)
+
+
+@receiver(post_save, sender=CommentLike)
+def increment_comment_total_likes(sender, instance, created, **kwargs):
+    if created:
+        Comment.objects.filter(pk=instance.comment_id).update(total_likes=F('total_likes') + 1)
+
+
+@receiver(post_delete, sender=CommentLike)
+def decrement_comment_total_likes(sender, instance, **kwargs):
+    Comment.objects.filter(pk=instance.comment_id).update(total_likes=F('total_likes') - 1)
+
+
+# comment threads (see posts/threads.py)
+
+@receiver(pre_save, sender=Comment)
+def place_comment_in_thread(sender, instance, **kwargs):
+    if instance._state.adding:
+        threads.set_thread_fields(instance)
+
+
+# home feed
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill_feed(instance.follower_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Follow)
+def purge_feed(sender, instance, **kwargs):
+    feed.purge_feed(instance.follower_id, instance.followed_id)
+
+
+# trending scores (see posts/trending.py)
+
+@receiver(post_save, sender=Post)
+def create_trending_score(sender, instance, created, **kwargs):
+    if created:
+        trending.create_scores([(instance.pk, instance.created_at)])
+
+
+@receiver(post_save, sender=PostLike)
+def add_like_weight(sender, instance, created, **kwargs):
+    if created:
+        trending.add_weight([instance.post_id], trending.LIKE_WEIGHT)
+
+
+@receiver(post_delete, sender=PostLike)
+def remove_like_weight(sender, instance, **kwargs):
+    trending.add_weight([instance.post_id], -trending.LIKE_WEIGHT)
+
+
+@receiver(post_save, sender=Comment)
+def add_comment_weight(sender, instance, created, **kwargs):
+    if created:
+        trending.add_weight([instance.post_id], trending.COMMENT_WEIGHT)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_weight(sender, instance, **kwargs):
+    trending.add_weight([instance.post_id], -trending.COMMENT_WEIGHT)
+
+
+# tag index (see posts/tags.py)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_index(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action == 'post_add':
+            tags.add_tags(instance.pk, instance.created_at, pk_set)
+        elif action == 'pre_remove':
+            tags.remove_tags(instance.pk, pk_set)
+        elif action == 'pre_clear':
+            tags.remove_tags(instance.pk)
+        return
+    # tag.posts.add()/remove(): the pairs depend on the other tags of each post
+    if action == 'post_add':
+        for post_id, created_at in Post.objects.filter(pk__in=pk_set).values_list('id', 'created_at'):
+            tags.add_tags(post_id, created_at, {instance.pk})
+    elif action in ('pre_remove', 'pre_clear'):
+        post_ids = pk_set if action == 'pre_remove' else instance.posts.values_list('id', flat=True)
+        for post_id in list(post_ids):
+            tags.remove_tags(post_id, {instance.pk})
+
+
+@receiver(pre_delete, sender=Post)
+def remove_post_from_tag_index(sender, instance, **kwargs):
+    # the cascade deletes the Post.tags rows without m2m_changed
+    tags.remove_tags(instance.pk)
+
+
+# full-text search
+
+@receiver(post_migrate)
+def repair_search_backend(sender, using, **kwargs):
+    if sender.name == 'posts':
+        search.repair_search_backend(connections[using])
+
+
+# response cache invalidation (see core/cache.py)
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, created, **kwargs):
+    bump_version('post', instance.pk)
+    if created:
+        forget_related_id('post-author', instance.pk)
+        bump_version('user', instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    bump_version('post', instance.pk)
+    bump_version('user', instance.author_id)
+    forget_related_id('post-author', instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_') and action != 'pre_clear':
+        return
+    if not reverse:
+        bump_version('post', instance.pk)
+    elif action == 'pre_clear':
+        for post_id in instance.posts.values_list('id', flat=True):
+            bump_version('post', post_id)
+    elif pk_set:
+        for post_id in pk_set:
+            bump_version('post', post_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tag_posts(sender, instance, **kwargs):
+    # the posts embed their tags (nested_tags), e.g. a renamed tag
+    if kwargs.get('created'):
+        return
+    for post_id in instance.posts.values_list('id', flat=True):
+        bump_version('post', post_id)
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_engagement(sender, instance, **kwargs):
+    bump_version('post', instance.post_id)
@@ -0,0 +1,112 @@
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from posts.models import Post, Tag, TagPosting, TagPair
+
+# Tag index
+# Every tag added to or removed from a post updates, in the same transaction:
+#   - Tag.total_posts, the popularity of the tag
+#   - TagPosting, the posts of each tag by recency, read with a range scan over
+#     (tag, -created_at, -post) instead of sorting every post of the tag
+#   - TagPair, how many posts use two tags together (stored in both directions),
+#     so the related tags of a tag are a range scan over (tag, -total_posts)
+# `manage.py rebuild_tag_index` rebuilds all of them from Post.tags, e.g. after bulk inserts.
+
+Tagging = Post.tags.through
+
+
+def get_pair_filter(changed_ids, tag_ids) -> Q:
+    # ordered pairs of the post's tags with at least one changed tag
+    return (Q(tag_id__in=changed_ids, related_id__in=tag_ids) | Q(tag_id__in=tag_ids, related_id__in=changed_ids)) & ~Q(tag_id=F('related_id'))
+
+
+def add_tags(post_id, created_at, tag_ids):
+    """Index tags just added to a post."""
+    if not tag_ids:
+        return
+    Tag.objects.filter(pk__in=tag_ids).update(total_posts=F('total_posts') + 1)
+    TagPosting.objects.bulk_create(
+        [TagPosting(tag_id=tag_id, post_id=post_id, created_at=created_at) for tag_id in tag_ids], ignore_conflicts=True
+    )
+    post_tag_ids = set(Tagging.objects.filter(post_id=post_id).values_list('tag_id', flat=True))
+    pairs = [
+        TagPair(tag_id=tag_id, related_id=related_id)
+        for tag_id in post_tag_ids for related_id in post_tag_ids
+        if tag_id != related_id and (tag_id in tag_ids or related_id in tag_ids)
+    ]
+    if pairs:
+        TagPair.objects.bulk_create(pairs, ignore_conflicts=True)
+        TagPair.objects.filter(get_pair_filter(tag_ids, post_tag_ids)).update(total_posts=F('total_posts') + 1)
+
+
+def remove_tags(post_id, tag_ids=None):
+    """Unindex tags about to be removed from a post, all of them by default."""
+    post_tag_ids = set(Tagging.objects.filter(post_id=post_id).values_list('tag_id', flat=True))
+    tag_ids = post_tag_ids if tag_ids is None else post_tag_ids & set(tag_ids)
+    if not tag_ids:
+        return
+    Tag.objects.filter(pk__in=tag_ids).update(total_posts=F('total_posts') - 1)
+    TagPosting.objects.filter(post_id=post_id, tag_id__in=tag_ids).delete()
+    pairs = TagPair.objects.filter(get_pair_filter(tag_ids, post_tag_ids))
+    pairs.update(total_posts=F('total_posts') - 1)
+    pairs.filter(total_posts=0).delete()
+
+
+def filter_posts_by_tags(queryset, tag_ids):
+    """
+    Posts having every one of the tags: a single GROUP BY over Post.tags
+    instead of one join per tag.
+    """
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return queryset
+    if len(tag_ids) == 1:
+        return queryset.filter(tags=tag_ids.pop())
+    tagged = (
+        Tagging.objects.filter(tag_id__in=tag_ids).values('post_id')
+        .annotate(matches=Count('tag_id')).filter(matches=len(tag_ids)).values('post_id')
+    )
+    return queryset.filter(pk__in=tagged)
+
+
+def get_tag_posts(tag_id, queryset=None):
+    """Posts of a tag, most recent first."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    return (
+        queryset.filter(tag_postings__tag_id=tag_id)
+        .annotate(tagged_at=F('tag_postings__created_at')).order_by('-tagged_at', '-id')
+    )
+
+
+def get_related_tags(tag_id, queryset=None):
+    """Tags used together with a tag, the most frequent first."""
+    if queryset is None:
+        queryset = Tag.objects.all()
+    return (
+        queryset.filter(related_pairs__tag_id=tag_id)
+        .annotate(posts_together=F('related_pairs__total_posts')).order_by('-posts_together', '-id')
+    )
+
+
+@transaction.atomic
+def rebuild_tag_index() -> int:
+    """Rebuild the counters, postings and pairs from Post.tags, returns the number of pairs."""
+    posts_count = Tagging.objects.filter(tag_id=OuterRef('pk')).order_by().values('tag_id').annotate(count=Count('pk')).values('count')
+    Tag.objects.update(total_posts=Coalesce(Subquery(posts_count), 0))
+    quote = connection.ops.quote_name
+    tagging, post = quote(Tagging._meta.db_table), quote(Post._meta.db_table)
+    TagPosting.objects.all().delete()
+    TagPair.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(TagPosting._meta.db_table)} (tag_id, post_id, created_at) "
+            f"SELECT t.tag_id, t.post_id, p.created_at FROM {tagging} t INNER JOIN {post} p ON p.id = t.post_id"
+        )
+        cursor.execute(
+            f"INSERT INTO {quote(TagPair._meta.db_table)} (tag_id, related_id, total_posts) "
+            f"SELECT a.tag_id, b.tag_id, COUNT(*) FROM {tagging} a "
+            f"INNER JOIN {tagging} b ON b.post_id = a.post_id AND b.tag_id <> a.tag_id "
+            f"GROUP BY a.tag_id, b.tag_id"
+        )
+        return cursor.rowcount
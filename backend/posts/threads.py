@@ -0,0 +1,56 @@
+from django.db.models import Prefetch
+from posts.models import Comment
+
+# Comment threads (materialized path)
+# A reply stores its top-level comment (`root`) and `path`, the ids of its
+# ancestors from the root down, each padded to KEY_WIDTH digits and followed by
+# '/'. Top-level comments have no root and an empty path.
+# The replies under a comment, at any depth, are the rows of its root whose path
+# starts with the comment's own key, so a whole thread is read with one range
+# scan over (root, path, id), without a query per level.
+# Ordered by (path, id), every reply comes after its parent and the replies
+# to the same comment are in the order they were written.
+
+KEY_WIDTH = 10
+MAX_DEPTH = Comment._meta.get_field('path').max_length // (KEY_WIDTH + 1)
+REPLIES_PER_COMMENT = 3
+
+
+def get_key(comment) -> str:
+    """Path of the replies to `comment`."""
+    return f'{comment.path}{comment.pk:0{KEY_WIDTH}d}/'
+
+
+def get_depth(comment) -> int:
+    return len(comment.path) // (KEY_WIDTH + 1)
+
+
+def set_thread_fields(comment):
+    """Place a new reply under its parent, before it is inserted."""
+    parent = comment.parent
+    if parent is None:
+        comment.root, comment.path = None, ''
+        return
+    comment.root_id = parent.root_id or parent.pk
+    comment.path = get_key(parent)
+
+
+def get_replies(comment, queryset=None):
+    """Every reply under `comment`, at any depth, in thread order."""
+    if queryset is None:
+        queryset = Comment.objects.all()
+    replies = queryset.filter(root_id=comment.root_id or comment.pk)
+    if comment.root_id is not None:
+        replies = replies.filter(path__startswith=get_key(comment))
+    return replies.order_by('path', 'id')
+
+
+def prefetch_first_replies(queryset, replies_queryset=None, count=REPLIES_PER_COMMENT):
+    """
+    Attach the first `count` direct replies of each comment as `first_replies`,
+    with one more query for the whole page (a window function over the parents).
+    """
+    if replies_queryset is None:
+        replies_queryset = Comment.objects.all()
+    replies = replies_queryset.order_by('created_at', 'id')[:count]
+    return queryset.prefetch_related(Prefetch('replies', queryset=replies, to_attr='first_replies'))
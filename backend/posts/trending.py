@@ -0,0 +1,91 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Greatest, Ln
+from django.utils import timezone
+from posts.models import Post, PostLike, Comment, TrendingScore
+
+# Trending posts
+# The trending weight of a post is the sum of its events (the post itself, its
+# likes and comments), each one losing half of its weight every
+# TRENDING_HALF_LIFE hours. A row stores it as
+#     score = ln(weight at t) + t / tau      (t: seconds since EPOCH, tau = half-life / ln 2)
+# which is the same whenever it is computed, so rows written at different times
+# compare directly and the top-N is a read of the (-score, -post) index.
+# An event of weight w at time t is added with a single UPDATE:
+#     score = t / tau + ln(exp(score - t / tau) + w)
+# Dislikes and deleted comments subtract their weight at the time they happen,
+# which takes too much off old events; `manage.py recompute_trending` rebuilds
+# the scores from the rows of the last HORIZON half-lives.
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+POST_WEIGHT = 1.0
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+# older events weigh less than a millionth of a new one
+HORIZON = 20
+MIN_WEIGHT = 2.0 ** -HORIZON
+BATCH_SIZE = 1000
+
+
+def to_score_time(moment) -> float:
+    tau = settings.TRENDING_HALF_LIFE * 3600 / math.log(2)
+    return (moment - EPOCH).total_seconds() / tau
+
+
+def initial_score(created_at) -> float:
+    return to_score_time(created_at) + math.log(POST_WEIGHT)
+
+
+def create_scores(posts, batch_size=BATCH_SIZE):
+    """Add the rows of new posts, given as (id, created_at) pairs."""
+    TrendingScore.objects.bulk_create(
+        [TrendingScore(post_id=post_id, score=initial_score(created_at)) for post_id, created_at in posts],
+        batch_size=batch_size, ignore_conflicts=True,
+    )
+
+
+def add_weight(post_ids, weight, at=None):
+    now = Value(to_score_time(at or timezone.now()))
+    decayed_weight = Exp(F('score') - now)
+    TrendingScore.objects.filter(post_id__in=post_ids).update(
+        score=now + Ln(Greatest(decayed_weight + Value(float(weight)), Value(MIN_WEIGHT)))
+    )
+
+
+@transaction.atomic
+def recompute_scores(now=None, batch_size=BATCH_SIZE) -> int:
+    """Rebuild the scores from the posts, likes and comments. Returns the number of rows written."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_HALF_LIFE * HORIZON)
+    now_time, since_time = to_score_time(now), to_score_time(since)
+
+    # posts written without the signals, e.g. with bulk_create
+    missing = Post.objects.filter(trending__isnull=True).values_list('id', 'created_at')
+    create_scores(missing.iterator(chunk_size=batch_size), batch_size)
+
+    weights = defaultdict(float)
+    events = [
+        (Post.objects.filter(created_at__gte=since).values_list('id', 'created_at'), POST_WEIGHT),
+        (PostLike.objects.filter(created_at__gte=since).values_list('post_id', 'created_at'), LIKE_WEIGHT),
+        (Comment.objects.filter(created_at__gte=since).values_list('post_id', 'created_at'), COMMENT_WEIGHT),
+    ]
+    for rows, weight in events:
+        for post_id, created_at in rows.iterator(chunk_size=batch_size):
+            weights[post_id] += weight * math.exp(to_score_time(created_at) - now_time)
+    scores = {post_id: now_time + math.log(weight) for post_id, weight in weights.items()}
+
+    # rows still above the horizon only because of events older than it
+    recent_rows = TrendingScore.objects.filter(score__gt=since_time).values_list('post_id', 'post__created_at')
+    for post_id, created_at in recent_rows.iterator(chunk_size=batch_size):
+        if post_id not in scores:
+            scores[post_id] = initial_score(created_at)
+
+    TrendingScore.objects.bulk_update(
+        [TrendingScore(post_id=post_id, score=score) for post_id, score in scores.items()], ['score'],
+        batch_size=batch_size,
+    )
+    return len(scores)
@@ -5,6 +5,7 @@ urlpatterns = [
     # posts
     path('', views.post_list_create_view, name='post-list-create'),
     path('feed/', views.post_feed_view, name='post-feed-list'),
+    path('trending/', views.post_trending_view, name='post-trending-list'),
     path('<int:pk>/', views.post_detail_view, name='post-detail'),
     path('<int:pk>/update/', views.post_update_view, name='post-update'),
     path('<int:pk>/delete/', views.post_delete_view, name='post-delete'),
@@ -12,18 +13,26 @@ urlpatterns = [
 
     # tags
     path('tags/', views.tag_list_view, name='tag-list'),
+    path('tags/<int:pk>/related/', views.related_tag_list_view, name='related-tag-list'),
+    path('tags/<int:pk>/posts/', views.tag_post_list_view, name='tag-post-list'),
 
     # liking and disliking posts 
     path('<int:pk>/like/', views.like_post_view, name='like-post'),
     path('<int:pk>/dislike/', views.dislike_post_view, name='dislike-post'),
+    path('like/', views.bulk_like_post_view, name='bulk-like-post'),
+    path('dislike/', views.bulk_dislike_post_view, name='bulk-dislike-post'),
     
     # comments in posts
     path('<int:pk>/comments/', views.comment_list_create_view, name='comment-list-create'),
+    path('<int:pk>/comment-threads/', views.comment_thread_list_view, name='comment-thread-list'),
     path('comments/<int:pk>/', views.comment_detail_view, name='comment-detail'),
     path('comments/<int:pk>/delete/', views.comment_delete_view, name='comment-delete'),
     path('comments/<int:pk>/like-list/', views.comment_like_list_view, name='comment-like-list'),    
+    path('comments/<int:pk>/replies/', views.comment_reply_list_view, name='comment-reply-list'),
 
     # liking and disliking comments
     path('comments/<int:pk>/like/', views.like_comment_view, name='like-comment'),
     path('comments/<int:pk>/dislike/', views.dislike_comment_view, name='dislike-comment'),
+    path('comments/like/', views.bulk_like_comment_view, name='bulk-like-comment'),
+    path('comments/dislike/', views.bulk_dislike_comment_view, name='bulk-dislike-comment'),
 ]
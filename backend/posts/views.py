@@ -1,17 +1,34 @@
+from django.db.models import F
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status, permissions
 from rest_framework.views import Response
-from drf_spectacular.utils import extend_schema
+from rest_framework.exceptions import ValidationError
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from posts.models import Post, Tag, Comment, CommentLike, PostLike
 from posts import serializers
+from posts.feed import get_feed_queryset
+from posts.tags import get_tag_posts, get_related_tags
+from posts import threads
+from posts.likes import post_likes, comment_likes
 from accounts.serializers import MessageSerializer
 from posts.filters import PostFilter, TagFilter, CommentFilter, PostLikeFilter, CommentLikeFilter
 from accounts.permissions import IsObjectAuthor
+from core.pagination import KeysetPagination
+from core.cache import CachedRetrieveMixin, get_related_id
+from core.upsert import create_unique, delete_unique
 # Create your views here.
 
+MAX_REPLIES_PER_COMMENT = 10
+
 class PostListCreateView(generics.ListCreateAPIView):
     queryset = Post.objects.all()
     serializer_class = serializers.PostSerializer
     filterset_class = PostFilter
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        qs = super().get_queryset()
+        return self.get_serializer_class().setup_eager_loading(qs)
             
 post_list_create_view = PostListCreateView.as_view()
 
@@ -20,19 +37,50 @@ class PostFeedView(generics.ListAPIView):
     queryset = Post.objects.all()
     serializer_class = serializers.PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        user = self.request.user
-        followed_users = user.following.all().values('followed')
         qs = super().get_queryset()
-        return qs.filter(author__in=followed_users).order_by('-created_at')
+        qs = self.get_serializer_class().setup_eager_loading(qs)
+        return get_feed_queryset(self.request.user, qs)
         
 post_feed_view = PostFeedView.as_view()
 
 
-class PostDetailView(generics.RetrieveAPIView):
+@extend_schema(
+    summary="Trending Posts",
+    description="Posts ranked by their recent likes and comments, each one losing half of its weight every `TRENDING_HALF_LIFE` hours.",
+)
+class PostTrendingView(generics.ListAPIView):
     queryset = Post.objects.all()
     serializer_class = serializers.PostSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
+        # a range scan of the precomputed scores, see posts/trending.py
+        qs = qs.annotate(trending_score=F('trending__score')).filter(trending_score__isnull=False)
+        return qs.order_by('-trending_score', '-id')
+
+post_trending_view = PostTrendingView.as_view()
+
+
+class PostDetailView(CachedRetrieveMixin, generics.RetrieveAPIView):
+    queryset = Post.objects.all()
+    serializer_class = serializers.PostSerializer
+    
+    def get_queryset(self):
+        qs = super().get_queryset()
+        return self.get_serializer_class().setup_eager_loading(qs)
+
+    def get_cache_dependencies(self, pk):
+        author_id = get_related_id(
+            'post-author', pk, lambda: Post.objects.filter(pk=pk).values_list('author_id', flat=True).first()
+        )
+        if author_id is None:
+            return None
+        return [('post', pk), ('user', author_id)]
     
 post_detail_view = PostDetailView.as_view()
 
@@ -68,17 +116,13 @@ class LikePostView(generics.CreateAPIView):
     
     def create(self, request, *args, **kwargs):
         post_id = self.kwargs['pk']
-        if not Post.objects.filter(id=post_id).exists():
-            return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        request.data['post'] = post_id
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        if create_unique(PostLike, Post, post_id, user_id=request.user.id, post_id=post_id) is None:
+            if not Post.objects.filter(id=post_id).exists():
+                return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            raise ValidationError({'detail': ['You are already liking this post.']})
 
         message = MessageSerializer({'message': 'You have successfully liked the post.'})
-
-        headers = self.get_success_headers(serializer.data)
-        return Response(message.data, status=status.HTTP_201_CREATED, headers=headers)
+        return Response(message.data, status=status.HTTP_201_CREATED)
 
 like_post_view = LikePostView.as_view()
 
@@ -97,16 +141,12 @@ class DislikePostView(generics.DestroyAPIView):
     
     def destroy(self, request, *args, **kwargs):
         post_id = self.kwargs['pk']
-    
-        if not Post.objects.filter(id=post_id).exists():
-            return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        instance = PostLike.objects.filter(post_id=post_id, user=request.user.id)    
-        if not instance.exists():
+        if not delete_unique(PostLike, user_id=request.user.id, post_id=post_id):
+            if not Post.objects.filter(id=post_id).exists():
+                return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
             return Response({'detail': 'You were not liking this post.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        instance.first().delete()
-        message = MessageSerializer({'message': 'You have successfully disliked the post.'})
 
+        message = MessageSerializer({'message': 'You have successfully disliked the post.'})
         return Response(message.data, status=status.HTTP_200_OK)
             
 dislike_post_view = DislikePostView.as_view()
@@ -120,14 +160,48 @@ class TagListView(generics.ListAPIView):
 tag_list_view = TagListView.as_view()
 
 
+@extend_schema(
+    summary="Related Tags",
+    description="Tags used together with the tag, the ones sharing the most posts first.",
+)
+class RelatedTagListView(generics.ListAPIView):
+    queryset = Tag.objects.all()
+    serializer_class = serializers.RelatedTagSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return get_related_tags(self.kwargs['pk'], super().get_queryset())
+
+related_tag_list_view = RelatedTagListView.as_view()
+
+
+@extend_schema(
+    summary="Posts of a Tag",
+    description="Posts having the tag, most recent first.",
+)
+class TagPostListView(generics.ListAPIView):
+    queryset = Post.objects.all()
+    serializer_class = serializers.PostSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
+        return get_tag_posts(self.kwargs['pk'], qs)
+
+tag_post_list_view = TagPostListView.as_view()
+
+
 class CommentListCreateView(generics.ListCreateAPIView):
     queryset = Comment.objects.all()
     serializer_class = serializers.CommentSerializer
     filterset_class = CommentFilter
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         post_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(post_id=post_id)
         
     def perform_create(self, serializer):
@@ -136,11 +210,62 @@ class CommentListCreateView(generics.ListCreateAPIView):
             post = Post.objects.get(id=post_id)
         except Post.DoesNotExist:
             return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        parent = serializer.validated_data.get('parent')
+        if parent is not None and parent.post_id != post.id:
+            raise ValidationError({'parent': ['The comment belongs to another post.']})
         return serializer.save(author=self.request.user, post=post)
     
 comment_list_create_view = CommentListCreateView.as_view()
 
 
+@extend_schema(
+    summary="Comment Threads",
+    description=(
+        "Top-level comments of the post, each one with its first `replies` replies "
+        f"(default {threads.REPLIES_PER_COMMENT}, at most {MAX_REPLIES_PER_COMMENT}). "
+        "`total_replies` tells whether a comment has more of them."
+    ),
+    parameters=[OpenApiParameter('replies', int, description='Replies returned under each comment.')],
+)
+class CommentThreadListView(generics.ListAPIView):
+    queryset = Comment.objects.all()
+    serializer_class = serializers.CommentThreadSerializer
+    filterset_class = CommentFilter
+    pagination_class = KeysetPagination
+
+    def get_replies_count(self):
+        try:
+            count = int(self.request.query_params.get('replies', threads.REPLIES_PER_COMMENT))
+        except ValueError:
+            raise ValidationError({'replies': ['A valid integer is required.']})
+        return max(0, min(count, MAX_REPLIES_PER_COMMENT))
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs, self.get_replies_count())
+        return qs.filter(post_id=self.kwargs['pk'], parent__isnull=True)
+
+comment_thread_list_view = CommentThreadListView.as_view()
+
+
+@extend_schema(
+    summary="Comment Replies",
+    description="Every reply under the comment, at any depth. Each reply comes after its parent.",
+)
+class CommentReplyListView(generics.ListAPIView):
+    queryset = Comment.objects.all()
+    serializer_class = serializers.CommentSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        comment = get_object_or_404(Comment.objects.only('id', 'root_id', 'path'), pk=self.kwargs['pk'])
+        qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
+        return threads.get_replies(comment, qs)
+
+comment_reply_list_view = CommentReplyListView.as_view()
+
+
 class CommentDetailView(generics.RetrieveAPIView):
     queryset = Comment.objects.all()
     serializer_class = serializers.CommentSerializer
@@ -148,6 +273,7 @@ class CommentDetailView(generics.RetrieveAPIView):
     def get_queryset(self):
         comment_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(id=comment_id)
 
     
@@ -177,17 +303,13 @@ class LikeCommentView(generics.CreateAPIView):
     
     def create(self, request, *args, **kwargs):
         comment_id = self.kwargs['pk']
-        if not Comment.objects.filter(id=comment_id).exists():
-            return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        request.data['comment'] = comment_id
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        if create_unique(CommentLike, Comment, comment_id, user_id=request.user.id, comment_id=comment_id) is None:
+            if not Comment.objects.filter(id=comment_id).exists():
+                return Response({'detail': 'The post does not exist.'}, status=status.HTTP_404_NOT_FOUND)
+            raise ValidationError({'detail': ['You are already liking this comment.']})
 
         message = MessageSerializer({'message': 'You have successfully liked the comment.'})
-
-        headers = self.get_success_headers(serializer.data)
-        return Response(message.data, status=status.HTTP_201_CREATED, headers=headers)
+        return Response(message.data, status=status.HTTP_201_CREATED)
     
 
 like_comment_view = LikeCommentView.as_view()
@@ -207,16 +329,12 @@ class DislikeCommentView(generics.DestroyAPIView):
 
     def destroy(self, request, *args, **kwargs):
         comment_id = self.kwargs['pk']
-    
-        if not Comment.objects.filter(id=comment_id).exists():
-            return Response({'detail': 'The comment does not exist.'}, status=status.HTTP_404_NOT_FOUND)
-        instance = CommentLike.objects.filter(comment_id=comment_id, user=request.user.id)    
-        if not instance.exists():
+        if not delete_unique(CommentLike, user_id=request.user.id, comment_id=comment_id):
+            if not Comment.objects.filter(id=comment_id).exists():
+                return Response({'detail': 'The comment does not exist.'}, status=status.HTTP_404_NOT_FOUND)
             return Response({'detail': 'You were not liking this comment.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        instance.first().delete()
-        message = MessageSerializer({'message': 'You have successfully disliked the comment.'})
 
+        message = MessageSerializer({'message': 'You have successfully disliked the comment.'})
         return Response(message.data, status=status.HTTP_200_OK)
             
 dislike_comment_view = DislikeCommentView.as_view()
@@ -226,10 +344,12 @@ class CommentLikeListView(generics.ListAPIView):
     queryset = CommentLike.objects.all()
     serializer_class = serializers.CommentLikeSerializer
     filterset_class = CommentLikeFilter
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         comment_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(comment_id=comment_id)
         
 comment_like_list_view = CommentLikeListView.as_view()
@@ -239,10 +359,72 @@ class PostLikeListView(generics.ListAPIView):
     queryset = PostLike.objects.all()
     serializer_class = serializers.PostLikeSerializer
     filterset_class = PostLikeFilter
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         post_id = self.kwargs['pk']
         qs = super().get_queryset()
+        qs = self.get_serializer_class().setup_eager_loading(qs)
         return qs.filter(post_id=post_id)
         
-post_like_list_view = PostLikeListView.as_view()
\ No newline at end of file
+post_like_list_view = PostLikeListView.as_view()
+
+class BulkLikeView(generics.GenericAPIView):
+    serializer_class = serializers.BulkLikeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    writer = None
+    action = None
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = getattr(self.writer, self.action)(request.user, serializer.validated_data['ids'])
+        return Response(serializers.BulkLikeResultSerializer(results, many=True).data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Like several Posts",
+    description="Endpoint for liking a list of posts at once. Every id gets a status: `liked`, `already_liked` or `not_found`.",
+    responses={200: serializers.BulkLikeResultSerializer(many=True)},
+)
+class BulkLikePostView(BulkLikeView):
+    writer = post_likes
+    action = 'like'
+
+bulk_like_post_view = BulkLikePostView.as_view()
+
+
+@extend_schema(
+    summary="Dislike several Posts",
+    description="Endpoint for disliking a list of posts at once. Every id gets a status: `disliked`, `not_liked` or `not_found`.",
+    responses={200: serializers.BulkLikeResultSerializer(many=True)},
+)
+class BulkDislikePostView(BulkLikeView):
+    writer = post_likes
+    action = 'dislike'
+
+bulk_dislike_post_view = BulkDislikePostView.as_view()
+
+
+@extend_schema(
+    summary="Like several Comments",
+    description="Endpoint for liking a list of comments at once. Every id gets a status: `liked`, `already_liked` or `not_found`.",
+    responses={200: serializers.BulkLikeResultSerializer(many=True)},
+)
+class BulkLikeCommentView(BulkLikeView):
+    writer = comment_likes
+    action = 'like'
+
+bulk_like_comment_view = BulkLikeCommentView.as_view()
+
+
+@extend_schema(
+    summary="Dislike several Comments",
+    description="Endpoint for disliking a list of comments at once. Every id gets a status: `disliked`, `not_liked` or `not_found`.",
+    responses={200: serializers.BulkLikeResultSerializer(many=True)},
+)
+class BulkDislikeCommentView(BulkLikeView):
+    writer = comment_likes
+    action = 'dislike'
+
+bulk_dislike_comment_view = BulkDislikeCommentView.as_view()
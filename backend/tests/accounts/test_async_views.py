@@ -0,0 +1,30 @@
+from asgiref.sync import sync_to_async
+from rest_framework.test import APITestCase
+from django.test import AsyncClient
+from django.urls import reverse
+from tests.accounts.factories import UserFactory, FollowFactory
+
+
+class TestAsyncAccountViews(APITestCase):
+    def setUp(self) -> None:
+        self.user1 = UserFactory()
+        self.async_client = AsyncClient()
+        FollowFactory.create_batch(3, followed=self.user1)
+        FollowFactory.create_batch(2, follower=self.user1)
+
+    async def assertSameAsSyncView(self, async_name, name, args=(), data=None):
+        expected = await sync_to_async(self.client.get)(reverse(name, args=args), data)
+        response = await self.async_client.get(reverse(async_name, args=args), data)
+        self.assertEqual(response.status_code, expected.status_code)
+        # pagination links point to the async endpoints
+        self.assertEqual(response.content.decode().replace('/api/async/', '/api/'), expected.content.decode())
+        return response
+
+    async def test_profile_detail(self):
+        await self.assertSameAsSyncView('async-profile-detail', 'profile-detail', args=[self.user1.profile.id])
+
+    async def test_follower_and_followed_lists(self):
+        response = await self.assertSameAsSyncView('async-follower-list', 'follower-list', args=[self.user1.id])
+        self.assertEqual(len(response.json()['results']), 3)
+        response = await self.assertSameAsSyncView('async-followed-list', 'followed-list', args=[self.user1.id], data={'limit': 1})
+        self.assertEqual(len(response.json()['results']), 1)
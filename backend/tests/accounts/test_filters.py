@@ -67,6 +67,23 @@ class TestProfileFilter(APITestCase):
         self.assertNotContains(response, 'Jane Doe')
         self.assertNotContains(response, 'Paul2')
 
+    def test_search_field_ranks_exact_matches_first(self):
+        user3 = UserFactory(username='Paul')
+        params = {'search': 'paul'}
+        response = self.client.get(self.endoint_using_the_filter, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['results'][0]['id'], user3.profile.id)
+
+    def test_search_field_follows_username_updates(self):
+        user = self.profile1.user
+        user.username = 'Ringo'
+        user.save()
+        response = self.client.get(self.endoint_using_the_filter, {'search': 'ringo'})
+        self.assertContains(response, 'John Doe')
+        response = self.client.get(self.endoint_using_the_filter, {'search': 'Paul1'})
+        self.assertNotContains(response, 'John Doe')
+
 
 class TestFollowerFilter(APITestCase):
     def setUp(self) -> None:
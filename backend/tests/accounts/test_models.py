@@ -3,6 +3,12 @@ from accounts.models import User, Profile, Follow
 from tests.accounts.factories import UserFactory, FollowFactory
 from tests.posts.factories import PostFactory
 from django.core.exceptions import ValidationError
+from tests.utils import QueryPlanMixin
+from django.utils import timezone
+from unittest.mock import patch
+from django.core.cache import cache
+from accounts import graph
+from core.cache import bump_version
 
 class TestProfileFollowMethods(APITestCase):
     def setUp(self) -> None:
@@ -24,12 +30,21 @@ class TestProfileFollowMethods(APITestCase):
     def test_total_followers_property(self):
         FollowFactory(follower=self.user2, followed=self.prof1.user)
         count_followers = self.prof1.user.followers.all().count()
+        self.prof1.refresh_from_db()
         self.assertEqual(self.prof1.total_followers, count_followers)
      
     def test_total_following_property(self):
         FollowFactory(follower=self.prof1.user, followed=self.user2)
         count_following = self.prof1.user.following.all().count()
+        self.prof1.refresh_from_db()
         self.assertEqual(self.prof1.total_following, count_following)
+
+    def test_follow_counters_decremented_on_unfollow(self):
+        follow = FollowFactory(follower=self.prof1.user, followed=self.user2)
+        follow.delete()
+        self.prof1.refresh_from_db()
+        self.assertEqual(self.prof1.total_following, 0)
+        self.assertEqual(self.user2.profile.total_followers, 0)
                 
 
 class TestFollow(APITestCase):
@@ -47,4 +62,111 @@ class TestFollow(APITestCase):
             Follow.objects.create(
                 follower=self.user1,
                 followed=self.user1
-            )
\ No newline at end of file
+            )
+
+
+class TestFollowQueryPlans(QueryPlanMixin, APITestCase):
+    def setUp(self) -> None:
+        self.user = UserFactory()
+        self.ordering = ['-created_at', '-id']
+
+    def test_followers_list_uses_followed_created_at_index(self):
+        since = timezone.now() - timezone.timedelta(days=1)
+        queryset = Follow.objects.filter(followed=self.user, created_at__gte=since).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, Follow, ['followed', '-created_at', '-id'])
+
+    def test_followed_list_uses_follower_created_at_index(self):
+        queryset = Follow.objects.filter(follower=self.user).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, Follow, ['follower', '-created_at', '-id'])
+
+
+class TestFollowGraph(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        graph.adjacency_cache.clear()
+        self.users = UserFactory.create_batch(5)
+        self.ids = [user.id for user in self.users]
+        for follower, followed in [(0, 1), (0, 2), (1, 0), (1, 3), (2, 3), (2, 4), (3, 0)]:
+            FollowFactory(follower=self.users[follower], followed=self.users[followed])
+
+    def test_adjacency_is_sorted(self):
+        self.assertEqual(list(graph.get_following(self.ids[2])), [self.ids[3], self.ids[4]])
+        self.assertEqual(list(graph.get_followers(self.ids[0])), [self.ids[1], self.ids[3]])
+        self.assertEqual(list(graph.get_following(self.ids[4])), [])
+
+    def test_adjacency_of_many_users_is_loaded_with_one_query(self):
+        with self.assertNumQueries(1):
+            adjacency = graph.get_adjacency(graph.FOLLOWING, self.ids)
+        self.assertEqual(list(adjacency[self.ids[1]]), [self.ids[0], self.ids[3]])
+        with self.assertNumQueries(0):
+            graph.get_adjacency(graph.FOLLOWING, self.ids)
+
+    def test_follows_invalidate_the_adjacency(self):
+        graph.get_following(self.ids[4])
+        graph.get_followers(self.ids[1])
+        follow = FollowFactory(follower=self.users[4], followed=self.users[1])
+        self.assertEqual(list(graph.get_following(self.ids[4])), [self.ids[1]])
+        self.assertEqual(list(graph.get_followers(self.ids[1])), [self.ids[0], self.ids[4]])
+        follow.delete()
+        self.assertEqual(list(graph.get_following(self.ids[4])), [])
+        self.assertEqual(list(graph.get_followers(self.ids[1])), [self.ids[0]])
+
+    def test_version_bumped_by_another_process_reloads_the_adjacency(self):
+        graph.get_following(self.ids[0])
+        bump_version('follows', self.ids[0])
+        with self.assertNumQueries(1):
+            graph.get_following(self.ids[0])
+
+    def test_least_recently_used_entries_are_evicted(self):
+        adjacency_cache = graph.AdjacencyCache(max_ids=4, max_age=60)
+        adjacency_cache.set('a', 1, [1, 2])
+        adjacency_cache.set('b', 1, [3])
+        adjacency_cache.get('a', 1)
+        adjacency_cache.set('c', 1, [4, 5])
+        self.assertEqual(list(adjacency_cache.entries), ['a', 'c'])
+        self.assertEqual(adjacency_cache.size, 4)
+        self.assertIsNone(adjacency_cache.get('c', 2))
+        self.assertEqual(adjacency_cache.size, 2)
+
+    def test_lists_longer_than_the_cache_are_not_kept(self):
+        adjacency_cache = graph.AdjacencyCache(max_ids=2, max_age=60)
+        adjacency_cache.set('a', 1, [1, 2, 3])
+        self.assertIsNone(adjacency_cache.get('a', 1))
+        self.assertEqual(adjacency_cache.size, 0)
+
+    def test_entries_expire(self):
+        adjacency_cache = graph.AdjacencyCache(max_ids=10, max_age=60)
+        with patch('accounts.graph.time.monotonic', return_value=1000):
+            adjacency_cache.set('a', 1, [1])
+        with patch('accounts.graph.time.monotonic', return_value=1059):
+            self.assertEqual(adjacency_cache.get('a', 1), [1])
+        with patch('accounts.graph.time.monotonic', return_value=1061):
+            self.assertIsNone(adjacency_cache.get('a', 1))
+
+    def test_followed_by_does_not_load_the_followers(self):
+        graph.get_following(self.ids[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(graph.get_followed_by(self.ids[3], self.ids[0]), [self.ids[1], self.ids[2]])
+        self.assertNotIn((graph.FOLLOWERS, self.ids[3]), graph.adjacency_cache.entries)
+
+    def test_is_following(self):
+        self.assertEqual(
+            graph.is_following(self.ids[0], self.ids[1:]),
+            {self.ids[1]: True, self.ids[2]: True, self.ids[3]: False, self.ids[4]: False},
+        )
+
+    def test_is_mutual(self):
+        self.assertTrue(graph.is_mutual(self.ids[0], self.ids[1]))
+        self.assertFalse(graph.is_mutual(self.ids[0], self.ids[2]))
+        self.assertFalse(graph.is_mutual(self.ids[2], self.ids[4]))
+
+    def test_followed_by(self):
+        self.assertEqual(graph.get_followed_by(self.ids[3], self.ids[0]), [self.ids[1], self.ids[2]])
+        self.assertEqual(graph.get_followed_by(self.ids[3], self.ids[4]), [])
+
+    def test_suggestions_are_ranked_by_overlap(self):
+        # user 0 follows 1 and 2, who both follow 3; 2 also follows 4
+        self.assertEqual(graph.suggest_users(self.ids[0], 10), [(self.ids[3], 2), (self.ids[4], 1)])
+        self.assertEqual(graph.suggest_users(self.ids[0], 1), [(self.ids[3], 2)])
+        # neither the user nor the users already followed are suggested
+        self.assertEqual(graph.suggest_users(self.ids[3], 10), [(self.ids[1], 1), (self.ids[2], 1)])
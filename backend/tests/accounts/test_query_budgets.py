@@ -0,0 +1,32 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from tests.accounts.factories import UserFactory, FollowFactory
+from tests.utils import QueryBudgetMixin
+
+
+class TestAccountQueryBudgets(QueryBudgetMixin, APITestCase):
+    def test_user_list(self):
+        self.assertQueryBudget(reverse('user-list'), 2, UserFactory.create_batch)
+
+    def test_profile_list(self):
+        self.assertQueryBudget(reverse('profile-list'), 2, UserFactory.create_batch)
+
+    def test_follower_list(self):
+        user = UserFactory()
+        for name in ('follower-list', 'async-follower-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(
+                    reverse(name, args=[user.id]), 1,
+                    lambda count: FollowFactory.create_batch(count, followed=user),
+                )
+                user.followers.all().delete()
+
+    def test_followed_list(self):
+        user = UserFactory()
+        for name in ('followed-list', 'async-followed-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(
+                    reverse(name, args=[user.id]), 1,
+                    lambda count: FollowFactory.create_batch(count, follower=user),
+                )
+                user.following.all().delete()
@@ -142,6 +142,7 @@ class TestProfileSerializer(APITestCase):
         user = self.profile.user
         FollowFactory(followed=user)
         FollowFactory(followed=user)
+        self.profile.refresh_from_db()
         expected = {
             'total_followers': 2
         }
@@ -152,6 +153,7 @@ class TestProfileSerializer(APITestCase):
         user = self.profile.user
         FollowFactory(follower=user)
         FollowFactory(follower=user)
+        self.profile.refresh_from_db()
         expected = {
             'total_following': 2
         }
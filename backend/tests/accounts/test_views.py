@@ -2,10 +2,16 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from accounts.models import Profile, User
 from tests.accounts.factories import UserFactory, FollowFactory
+from tests.posts.factories import PostFactory
+from posts.models import FeedItem
+from tests.posts.factories import PostLikeFactory, CommentFactory, CommentLikeFactory, TagFactory
+import json
 from accounts.serializers import UserSerializer, ProfileSerializer, ProfileSimpleSerializer, UserCreationSerializer, FollowedSerializer, FollowerSerializer
 from django.urls import reverse
 from django.test import override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from accounts import graph
 import tempfile
 
 class TestUserDetailView(APITestCase):
@@ -183,6 +189,42 @@ class TestUserDeleteView(APITestCase):
         self.assertIn('You are not authorized to perform this action.', response.data['detail'])
         
 
+class TestUserExportView(APITestCase):
+    def setUp(self) -> None:
+        self.user = UserFactory()
+        self.url = reverse('user-export')
+        self.client.force_login(self.user)
+
+    def get_rows(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_streams_every_row_of_the_user(self):
+        post = PostFactory(author=self.user)
+        post.tags.add(TagFactory())
+        comment = CommentFactory(author=self.user)
+        PostLikeFactory(user=self.user)
+        CommentLikeFactory(user=self.user, comment=comment)
+        FollowFactory(follower=self.user)
+        FollowFactory(followed=self.user)
+        PostFactory()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.get_rows(response)
+        self.assertEqual(
+            [row['type'] for row in rows],
+            ['profile', 'post', 'post_tag', 'comment', 'post_like', 'comment_like', 'following', 'follower'],
+        )
+        self.assertEqual(rows[1]['id'], post.id)
+        self.assertEqual(rows[3]['post_id'], comment.post_id)
+
+    def test_unauthenticated(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class TestProfileDetailView(APITestCase):
     def setUp(self) -> None:
         user = UserFactory()
@@ -195,6 +237,80 @@ class TestProfileDetailView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_cached_response_is_invalidated_by_follows(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        FollowFactory(followed=self.profile.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_followers'], 1)
+
+
+class TestProfilePageView(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        graph.adjacency_cache.clear()
+        self.user = UserFactory()
+        self.profile = self.user.profile
+        self.url = reverse('profile-page', args=[self.profile.id])
+        self.viewer = UserFactory()
+        self.client.force_login(self.viewer)
+
+    def test_data_returned(self):
+        posts = PostFactory.create_batch(2, author=self.user)
+        PostFactory()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.profile.refresh_from_db()
+        self.assertEqual(response.data['profile'], ProfileSerializer(self.profile, context={'request': response.wsgi_request}).data)
+        self.assertEqual([post['id'] for post in response.data['posts']], [posts[1].id, posts[0].id])
+        self.assertIsNone(response.data['posts_next'])
+
+    def test_posts_next_continues_in_the_post_list(self):
+        posts = PostFactory.create_batch(12, author=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual([post['id'] for post in response.data['posts']], [post.id for post in reversed(posts[2:])])
+        response = self.client.get(response.data['posts_next'])
+        self.assertEqual([post['id'] for post in response.data['results']], [posts[1].id, posts[0].id])
+
+    def test_followed_by_people_the_viewer_follows(self):
+        followed = UserFactory.create_batch(4)
+        for user in followed:
+            FollowFactory(follower=self.viewer, followed=user)
+            FollowFactory(follower=user, followed=self.user)
+        FollowFactory(followed=self.user)
+        FollowFactory(followed=followed[1])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['followed_by_count'], 4)
+        self.assertEqual(len(response.data['followed_by']), 3)
+        self.assertEqual(response.data['followed_by'][0]['id'], followed[1].profile.id)
+
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual((response.data['followed_by'], response.data['followed_by_count']), ([], 0))
+
+    def test_cached_page_only_runs_the_viewer_queries(self):
+        PostFactory(author=self.user)
+        self.client.get(self.url)
+        # the session, the viewer and their likes of the posts, the follow graph is cached too
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['posts']), 1)
+
+    def test_new_posts_and_follows_invalidate_the_page(self):
+        self.client.get(self.url)
+        PostFactory(author=self.user)
+        FollowFactory(followed=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data['posts']), 1)
+        self.assertEqual(response.data['profile']['total_followers'], 1)
+
+    def test_missing_profile(self):
+        response = self.client.get(reverse('profile-page', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class TestProfileListView(APITestCase):
     def setUp(self) -> None:
@@ -312,6 +428,19 @@ class TestFollowUserView(APITestCase):
         self.assertEqual(str(response.data['detail'][0]), expected['detail'])
         self.assertEqual(self.user1.following.all().count(), 1)
         
+    def test_follow_user_updates_counters_and_feed(self):
+        post = PostFactory(author=self.user2)
+        url = reverse('follow-user', args=[self.user2.id])
+        self.client.post(url)
+        self.assertEqual(Profile.objects.get(user=self.user2).total_followers, 1)
+        self.assertEqual(Profile.objects.get(user=self.user1).total_following, 1)
+        self.assertTrue(FeedItem.objects.filter(user=self.user1, post=post).exists())
+
+        self.client.delete(reverse('unfollow-user', args=[self.user2.id]))
+        self.assertEqual(Profile.objects.get(user=self.user2).total_followers, 0)
+        self.assertEqual(Profile.objects.get(user=self.user1).total_following, 0)
+        self.assertFalse(FeedItem.objects.filter(user=self.user1).exists())
+
     def test_follow_yourself_fails(self):
         url = reverse('follow-user', args=[self.user1.id])
         response = self.client.post(url)
@@ -375,12 +504,19 @@ class TestFollowerListView(APITestCase):
     def test_list_all_followers_users_of_a_user(self):
         response = self.client.get(reverse('follower-list', args=[self.user1.id]))
         expected = []
-        for follow in self.all_followers:
+        for follow in reversed(self.all_followers):
             follow_serialized = FollowerSerializer(instance=follow, context={'request': response.wsgi_request})
             expected.append(follow_serialized.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['results'], expected)
 
+    def test_profiles_tell_whether_the_viewer_follows_them(self):
+        cache.clear()
+        graph.adjacency_cache.clear()
+        FollowFactory(follower=self.user1, followed=self.all_followers[0].follower)
+        response = self.client.get(reverse('follower-list', args=[self.user1.id]))
+        self.assertEqual([data['profile']['is_following'] for data in response.data['results']], [False, False, True])
+
 class TestFollowedListView(APITestCase):
     def setUp(self) -> None:
         self.user1 = UserFactory()
@@ -392,10 +528,58 @@ class TestFollowedListView(APITestCase):
     def test_list_all_followed_users_of_a_user(self):
         response = self.client.get(reverse('followed-list', args=[self.user1.id]))
         expected = []
-        for follow in self.all_following:
+        for follow in reversed(self.all_following):
             follow_serialized = FollowedSerializer(instance=follow, context={'request': response.wsgi_request})
             expected.append(follow_serialized.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['results'], expected)
         
         
+
+
+class TestUserSuggestionListView(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        graph.adjacency_cache.clear()
+        self.user = UserFactory()
+        self.followed = UserFactory.create_batch(2)
+        self.suggested = UserFactory.create_batch(2)
+        for user in self.followed:
+            FollowFactory(follower=self.user, followed=user)
+            FollowFactory(follower=user, followed=self.suggested[0])
+        FollowFactory(follower=self.followed[0], followed=self.suggested[1])
+        FollowFactory(follower=self.suggested[1], followed=self.user)
+        self.url = reverse('user-suggestion-list')
+        self.client.force_login(self.user)
+
+    def test_data_returned(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([profile['id'] for profile in response.data], [user.profile.id for user in self.suggested])
+        self.assertEqual([profile['followed_by_count'] for profile in response.data], [2, 1])
+        self.assertEqual([profile['follows_you'] for profile in response.data], [False, True])
+
+    def test_friends_of_friends_are_read_without_joins(self):
+        # the session, the viewer, two follow lists (followed, followed by them),
+        # which of the suggested users follow the viewer and the profiles
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+        # the follow lists are cached
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_limit(self):
+        response = self.client.get(self.url, {'limit': 1})
+        self.assertEqual(len(response.data), 1)
+        response = self.client.get(self.url, {'limit': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_followed_users_are_not_suggested(self):
+        self.client.post(reverse('follow-user', args=[self.suggested[0].id]))
+        response = self.client.get(self.url)
+        self.assertEqual([profile['id'] for profile in response.data], [self.suggested[1].profile.id])
+
+    def test_unauthenticated(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,15 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from core.cache import check_shared_cache
+
+
+class TestCheckSharedCache(SimpleTestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_memory_cache_with_several_workers_fails(self):
+        check_shared_cache(1)
+        with self.assertRaisesMessage(ImproperlyConfigured, '4 worker processes can not share a local memory cache'):
+            check_shared_cache(4)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}})
+    def test_shared_cache_with_several_workers(self):
+        check_shared_cache(4)
@@ -0,0 +1,56 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.metrics import HISTOGRAMS
+from tests.posts.factories import PostFactory
+
+
+@override_settings(METRICS_ENABLED=True)
+class TestMetricsMiddleware(APITestCase):
+    def setUp(self) -> None:
+        for histogram in HISTOGRAMS.values():
+            histogram.clear()
+        PostFactory.create_batch(2)
+
+    def get_metrics(self, **headers):
+        response = self.client.get(reverse('metrics'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get(reverse('post-list-create'))
+        self.client.get(reverse('post-list-create'))
+        self.client.get(reverse('tag-list'))
+        metrics = self.get_metrics()
+        self.assertIn('http_request_duration_seconds_count{endpoint="post-list-create"} 2', metrics)
+        self.assertIn('http_request_duration_seconds_count{endpoint="tag-list"} 1', metrics)
+        self.assertIn('# TYPE http_request_queries histogram', metrics)
+
+    def test_query_count_and_serializer_time_are_recorded(self):
+        self.client.get(reverse('post-list-create'))
+        queries, = HISTOGRAMS['queries'].values['post-list-create'][2:]
+        self.assertGreater(queries, 0)
+        serializer_time, = HISTOGRAMS['serializer_time'].values['post-list-create'][2:]
+        self.assertGreater(serializer_time, 0)
+        size, = HISTOGRAMS['size'].values['post-list-create'][2:]
+        self.assertGreater(size, 0)
+
+    def test_server_timing_header_is_optional(self):
+        response = self.client.get(reverse('post-list-create'))
+        self.assertNotIn('Server-Timing', response)
+        with self.settings(METRICS_SERVER_TIMING=True):
+            response = self.client.get(reverse('post-list-create'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token_is_required_when_set(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.get_metrics(Authorization='Bearer secret')
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_endpoint_is_hidden_when_disabled(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,138 @@
+import threading
+from unittest import skipUnless
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from core.postgresql_pool import pool as pools
+from core.postgresql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.usable = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(SimpleTestCase):
+    def create_pool(self, **kwargs):
+        self.opened = []
+
+        def connect():
+            connection = FakeConnection()
+            self.opened.append(connection)
+            return connection
+        return ConnectionPool(connect, **kwargs)
+
+    def test_min_size_connections_are_opened_upfront(self):
+        pool = self.create_pool(min_size=2, max_size=4)
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(pool.get_stats()['idle'], 2)
+
+    def test_returned_connections_are_reused(self):
+        pool = self.create_pool(min_size=0, max_size=2)
+        connection = pool.getconn()
+        pool.putconn(connection)
+        self.assertIs(pool.getconn(), connection)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.get_stats()['checkouts'], 2)
+
+    def test_getconn_waits_for_a_free_connection(self):
+        pool = self.create_pool(min_size=0, max_size=1, timeout=5)
+        connection = pool.getconn()
+        threading.Timer(0.05, pool.putconn, [connection]).start()
+        self.assertIs(pool.getconn(), connection)
+        self.assertEqual(pool.get_stats()['waits'], 1)
+
+    def test_getconn_times_out_when_the_pool_is_exhausted(self):
+        pool = self.create_pool(min_size=0, max_size=1, timeout=0.01)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_unusable_connections_are_replaced(self):
+        pool = self.create_pool(min_size=1, max_size=1, check=lambda connection: connection.usable)
+        self.opened[0].usable = False
+        connection = pool.getconn()
+        self.assertIsNot(connection, self.opened[0])
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(pool.get_stats()['size'], 1)
+
+    def test_connections_that_can_not_be_reset_are_closed(self):
+        pool = self.create_pool(min_size=0, max_size=1, reset=lambda connection: False)
+        connection = pool.getconn()
+        pool.putconn(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.get_stats()['size'], 0)
+
+    def test_close_closes_idle_connections(self):
+        pool = self.create_pool(min_size=2, max_size=2)
+        connection = pool.getconn()
+        pool.close()
+        pool.putconn(connection)
+        self.assertTrue(all(connection.closed for connection in self.opened))
+        self.assertEqual(pool.get_stats()['size'], 0)
+
+
+class TestPoolRegistry(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(pools.close_pool, 'registry-test')
+
+    def test_a_pool_is_replaced_when_the_connection_parameters_change(self):
+        first = pools.get_pool('registry-test', pools.get_params_key({'database': 'app'}), lambda: ConnectionPool(FakeConnection, min_size=1))
+        idle = first._idle[0]
+        self.assertIs(pools.get_pool('registry-test', pools.get_params_key({'database': 'app'}), None), first)
+
+        second = pools.get_pool('registry-test', pools.get_params_key({'database': 'test_app'}), lambda: ConnectionPool(FakeConnection, min_size=0))
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertTrue(idle.closed)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'the pooled backend needs PostgreSQL')
+class TestPooledBackend(TransactionTestCase):
+    def create_wrapper(self):
+        from core.postgresql_pool.base import DatabaseWrapper
+        settings_dict = {**connection.settings_dict, 'POOL': {'min_size': 1, 'max_size': 2}}
+        wrapper = DatabaseWrapper(settings_dict, alias='pooled-backend-test')
+        self.addCleanup(pools.close_pool, 'pooled-backend-test')
+        return wrapper
+
+    def execute(self, wrapper, sql):
+        with wrapper.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+
+    def test_connections_go_back_to_the_pool_between_requests(self):
+        wrapper = self.create_wrapper()
+        backend_pid = self.execute(wrapper, 'SELECT pg_backend_pid()')
+        wrapper.settings_dict['CONN_MAX_AGE'] = 0
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(wrapper.connection)
+        self.assertEqual(pools.get_pool_stats()['pooled-backend-test']['idle'], 1)
+        self.assertEqual(self.execute(wrapper, 'SELECT pg_backend_pid()'), backend_pid)
+        wrapper.close_if_unusable_or_obsolete()
+
+    def test_close_closes_the_pooled_connections(self):
+        wrapper = self.create_wrapper()
+        self.execute(wrapper, 'SELECT 1')
+        pool = wrapper.connection_pool
+        raw_connection = wrapper.connection
+        wrapper.close()
+        self.assertTrue(pool.closed)
+        self.assertTrue(raw_connection.closed)
+        self.assertNotIn('pooled-backend-test', pools.get_pool_stats())
+
+    def test_a_new_database_name_gets_a_new_pool(self):
+        wrapper = self.create_wrapper()
+        self.execute(wrapper, 'SELECT 1')
+        first_pool = wrapper.connection_pool
+        wrapper.settings_dict['CONN_MAX_AGE'] = 0
+        wrapper.close_if_unusable_or_obsolete()
+        wrapper.settings_dict['NAME'] = 'postgres'
+        self.assertEqual(self.execute(wrapper, 'SELECT current_database()'), 'postgres')
+        self.assertIsNot(wrapper.connection_pool, first_pool)
+        self.assertTrue(first_pool.closed)
+        wrapper.close()
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from posts.serializers import CommentSerializer
+from tests.posts.factories import PostFactory, CommentFactory
+from tests.utils import QueryBudgetMixin
+
+
+class TestQueryBudgetMixin(QueryBudgetMixin, APITestCase):
+    page_sizes = (1, 10)
+
+    def setUp(self) -> None:
+        self.post = PostFactory()
+        self.url = reverse('comment-list-create', args=[self.post.id])
+
+    def create_comments(self, count):
+        CommentFactory.create_batch(count, post=self.post)
+
+    def test_n_plus_one_fails_with_the_repeated_sql(self):
+        with patch.object(CommentSerializer, 'setup_eager_loading', lambda queryset: queryset):
+            with self.assertRaises(AssertionError) as context:
+                self.assertQueryBudget(self.url, 10, self.create_comments)
+        message = str(context.exception)
+        self.assertIn('for a page of 1 and', message)
+        self.assertIn('9x SELECT', message)
+        self.assertIn('accounts_profile', message)
+
+    def test_over_budget_fails_with_every_query(self):
+        with self.assertRaises(AssertionError) as context:
+            self.assertQueryBudget(self.url, 0, self.create_comments)
+        message = str(context.exception)
+        self.assertIn('the budget is 0', message)
+        self.assertIn('posts_comment', message)
+
+    def test_budget_per_page_size(self):
+        self.assertQueryBudget(self.url, {1: 1, 10: 1}, self.create_comments)
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete
+from rest_framework.test import APITestCase
+from core.upsert import create_unique, delete_unique, insert_returning, delete_returning
+from posts.models import Post, PostLike
+from tests.accounts.factories import UserFactory
+from tests.posts.factories import PostFactory, PostLikeFactory
+
+
+class TestUpsert(APITestCase):
+    def setUp(self) -> None:
+        self.user = UserFactory()
+        self.posts = PostFactory.create_batch(3)
+
+    def test_insert_returning_skips_existing_rows_and_missing_parents(self):
+        PostLikeFactory(user=self.user, post=self.posts[0])
+        pks = [post.pk for post in self.posts] + [self.posts[-1].pk + 1]
+        likes = insert_returning(PostLike, Post, pks, parent_field='post', user_id=self.user.pk)
+        self.assertEqual(sorted(like.post_id for like in likes), [self.posts[1].pk, self.posts[2].pk])
+        self.assertEqual(PostLike.objects.filter(user=self.user).count(), 3)
+
+    def test_delete_returning_returns_the_deleted_rows(self):
+        likes = [PostLikeFactory(user=self.user, post=post) for post in self.posts[:2]]
+        rows = delete_returning(PostLike, fields=['post_id'], user_id=self.user.pk, post_id__in=[post.pk for post in self.posts])
+        self.assertEqual(sorted(rows), [(like.pk, like.post_id) for like in likes])
+        self.assertEqual(delete_returning(PostLike, user_id=self.user.pk), [])
+
+    def test_create_unique_returns_none_for_an_existing_row(self):
+        like = create_unique(PostLike, Post, self.posts[0].pk, user_id=self.user.pk, post_id=self.posts[0].pk)
+        self.assertEqual(PostLike.objects.get().pk, like.pk)
+        self.assertIsNone(create_unique(PostLike, Post, self.posts[0].pk, user_id=self.user.pk, post_id=self.posts[0].pk))
+
+    def test_delete_unique_sends_post_delete_with_the_deleted_row(self):
+        like = PostLikeFactory(user=self.user, post=self.posts[0])
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append((instance.pk, instance.post_id))
+
+        post_delete.connect(receiver, sender=PostLike)
+        self.addCleanup(post_delete.disconnect, receiver, sender=PostLike)
+        self.assertTrue(delete_unique(PostLike, user_id=self.user.pk, post_id=self.posts[0].pk))
+        self.assertFalse(delete_unique(PostLike, user_id=self.user.pk, post_id=self.posts[0].pk))
+        self.assertEqual(deleted, [(like.pk, like.post_id)])
@@ -0,0 +1,76 @@
+from asgiref.sync import sync_to_async
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.test import AsyncClient
+from django.urls import reverse
+from tests.posts.factories import PostFactory, TagFactory, PostLikeFactory, CommentFactory, CommentLikeFactory
+from tests.accounts.factories import UserFactory, FollowFactory
+
+
+class TestAsyncPostViews(APITestCase):
+    def setUp(self) -> None:
+        self.user1 = UserFactory()
+        self.client.force_login(self.user1)
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user1)
+
+        self.post = PostFactory()
+        self.post.tags.set(TagFactory.create_batch(2))
+        PostFactory.create_batch(3)
+        FollowFactory(follower=self.user1, followed=self.post.author)
+        self.comment = CommentFactory(post=self.post)
+        PostLikeFactory.create_batch(2, post=self.post)
+        CommentLikeFactory(comment=self.comment)
+
+    async def assertSameAsSyncView(self, async_name, name, args=(), data=None):
+        expected = await sync_to_async(self.client.get)(reverse(name, args=args), data)
+        response = await self.async_client.get(reverse(async_name, args=args), data)
+        self.assertEqual(response.status_code, expected.status_code)
+        # pagination links point to the async endpoints
+        self.assertEqual(response.content.decode().replace('/api/async/', '/api/'), expected.content.decode())
+        return response
+
+    async def test_post_list(self):
+        response = await self.assertSameAsSyncView('async-post-list', 'post-list-create', data={'limit': 2})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNotNone(response.json()['next'])
+
+    async def test_post_list_with_count(self):
+        response = await self.assertSameAsSyncView('async-post-list', 'post-list-create', data={'limit': 2, 'count': 'true'})
+        self.assertEqual(response.json()['count'], 4)
+
+    async def test_post_list_with_offset_and_filters(self):
+        await self.assertSameAsSyncView('async-post-list', 'post-list-create', data={'offset': 1, 'limit': 2})
+        await self.assertSameAsSyncView('async-post-list', 'post-list-create', data={'search_post': self.post.title})
+
+    async def test_post_feed(self):
+        response = await self.assertSameAsSyncView('async-post-feed-list', 'post-feed-list')
+        self.assertEqual(len(response.json()['results']), 1)
+
+    async def test_post_detail(self):
+        response = await self.assertSameAsSyncView('async-post-detail', 'post-detail', args=[self.post.id])
+        self.assertIn('ETag', response)
+        response = await self.async_client.get(
+            reverse('async-post-detail', args=[self.post.id]), headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_post_detail_of_a_non_existing_post_fails(self):
+        await self.assertSameAsSyncView('async-post-detail', 'post-detail', args=[100])
+
+    async def test_comment_list_and_detail(self):
+        await self.assertSameAsSyncView('async-comment-list', 'comment-list-create', args=[self.post.id])
+        await self.assertSameAsSyncView('async-comment-detail', 'comment-detail', args=[self.comment.id])
+
+    async def test_like_lists(self):
+        await self.assertSameAsSyncView('async-post-like-list', 'post-like-list', args=[self.post.id])
+        await self.assertSameAsSyncView('async-comment-like-list', 'comment-like-list', args=[self.comment.id])
+
+    async def test_feed_requires_authentication(self):
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get(reverse('async-post-feed-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_write_methods_are_not_allowed(self):
+        response = await self.async_client.post(reverse('async-post-list'), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
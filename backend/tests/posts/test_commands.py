@@ -0,0 +1,201 @@
+import json
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from tests.posts.factories import PostFactory, PostLikeFactory, CommentFactory, TagFactory
+from tests.accounts.factories import FollowFactory
+from posts.models import Post, Tag, PostLike, Comment, FeedItem, TrendingScore, TagPosting, TagPair
+from posts.management.commands.benchmark import Command as BenchmarkCommand
+from posts.trending import initial_score
+from posts.export import export_user_data
+from accounts.models import Profile, User, Follow
+
+
+class TestRebuildCountersCommand(APITestCase):
+    def setUp(self) -> None:
+        self.post = PostFactory()
+        PostLikeFactory.create_batch(2, post=self.post)
+        CommentFactory(post=self.post)
+        FollowFactory(followed=self.post.author)
+
+    def test_check_passes_when_counters_are_up_to_date(self):
+        out = StringIO()
+        call_command('rebuild_counters', '--check', stdout=out)
+        self.assertIn('Post.total_likes: 0 out of date', out.getvalue())
+
+    def test_check_fails_when_counters_are_out_of_date(self):
+        Post.objects.filter(id=self.post.id).update(total_likes=0)
+        with self.assertRaisesMessage(CommandError, '1 counters are out of date.'):
+            call_command('rebuild_counters', '--check', stdout=StringIO())
+
+    def test_rebuild_fixes_counters(self):
+        Post.objects.filter(id=self.post.id).update(total_likes=7, total_comments=0)
+        Profile.objects.filter(user=self.post.author).update(total_followers=0, total_posts=5)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        profile = Profile.objects.get(user=self.post.author)
+        self.assertEqual(self.post.total_likes, 2)
+        self.assertEqual(self.post.total_comments, 1)
+        self.assertEqual(profile.total_followers, 1)
+        self.assertEqual(profile.total_posts, 1)
+
+
+class TestRebuildTagIndexCommand(APITestCase):
+    def setUp(self) -> None:
+        self.tags = TagFactory.create_batch(3)
+        PostFactory().tags.add(*self.tags)
+        PostFactory().tags.add(*self.tags[:2])
+
+    def get_index(self):
+        return (
+            list(Tag.objects.order_by('pk').values_list('pk', 'total_posts')),
+            sorted(TagPosting.objects.values_list('tag_id', 'post_id', 'created_at')),
+            sorted(TagPair.objects.values_list('tag_id', 'related_id', 'total_posts')),
+        )
+
+    def test_rebuild_matches_the_incremental_index(self):
+        index = self.get_index()
+        TagPair.objects.all().delete()
+        TagPosting.objects.all().delete()
+        Tag.objects.update(total_posts=0)
+        out = StringIO()
+        call_command('rebuild_tag_index', stdout=out)
+        self.assertIn('Rebuilt the tag index with 6 related tag pairs.', out.getvalue())
+        self.assertEqual(self.get_index(), index)
+
+
+class TestExportUserDataCommand(APITestCase):
+    def setUp(self) -> None:
+        self.user = PostFactory().author
+        PostFactory.create_batch(2, author=self.user)
+        PostLikeFactory(user=self.user)
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_user_data', self.user.email, stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['type'] for row in rows], ['profile', 'post', 'post', 'post', 'post_like'])
+
+    def test_export_to_a_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as output:
+            out = StringIO()
+            call_command('export_user_data', str(self.user.id), f'--output={output.name}', '--chunk-size=2', stdout=out)
+            self.assertEqual(len(output.read().splitlines()), 5)
+        self.assertIn('Exported 5 rows', out.getvalue())
+
+    def test_unknown_user_fails(self):
+        with self.assertRaisesMessage(CommandError, 'The user nobody@example.com does not exist.'):
+            call_command('export_user_data', 'nobody@example.com', stdout=StringIO())
+
+    def test_rows_are_read_as_they_are_written(self):
+        lines = export_user_data(self.user, chunk_size=1)
+        with self.assertNumQueries(1):
+            next(lines)
+        self.assertEqual(len(list(lines)), 4)
+
+
+class TestRecomputeTrendingCommand(APITestCase):
+    def setUp(self) -> None:
+        self.posts = PostFactory.create_batch(3)
+        PostLikeFactory.create_batch(2, post=self.posts[0])
+        CommentFactory(post=self.posts[1])
+
+    def get_scores(self):
+        return dict(TrendingScore.objects.values_list('post_id', 'score'))
+
+    def test_recompute_matches_the_incremental_scores(self):
+        scores = self.get_scores()
+        call_command('recompute_trending', stdout=StringIO())
+        for post_id, score in self.get_scores().items():
+            self.assertAlmostEqual(score, scores[post_id], places=3)
+
+    def test_recompute_fixes_scores_out_of_date(self):
+        scores = self.get_scores()
+        TrendingScore.objects.update(score=0)
+        out = StringIO()
+        call_command('recompute_trending', stdout=out)
+        self.assertIn('Recomputed 3 trending scores.', out.getvalue())
+        for post_id, score in self.get_scores().items():
+            self.assertAlmostEqual(score, scores[post_id], places=3)
+
+    def test_recompute_adds_missing_scores(self):
+        post = Post.objects.bulk_create([Post(author=self.posts[0].author, title='Title', content='Content')])[0]
+        self.assertFalse(TrendingScore.objects.filter(post=post).exists())
+        call_command('recompute_trending', stdout=StringIO())
+        self.assertAlmostEqual(self.get_scores()[post.id], initial_score(post.created_at), places=6)
+
+
+def generate_social_graph(**options):
+    options = {'users': 20, 'posts': 60, 'follows': 4, 'likes': 2, 'comments': 1, 'replies': 0.5, 'tags': 10, 'seed': 1, **options}
+    call_command('generate_social_graph', stdout=StringIO(), **options)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestGenerateSocialGraphCommand(APITestCase):
+    def test_generates_the_requested_rows(self):
+        generate_social_graph()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Profile.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.filter(parent__isnull=True).count(), 60)
+        self.assertEqual(Comment.objects.filter(parent__isnull=False).count(), 30)
+        self.assertGreater(Follow.objects.count(), 0)
+        # duplicated (user, post) pairs are dropped
+        self.assertLessEqual(PostLike.objects.count(), 120)
+        self.assertGreater(PostLike.objects.count(), 0)
+
+    def test_timestamps_are_spread_over_time(self):
+        generate_social_graph(days=30)
+        self.assertGreater(len(set(Post.objects.values_list('created_at', flat=True))), 1)
+        for comment in Comment.objects.select_related('post', 'parent'):
+            self.assertGreaterEqual(comment.created_at, comment.post.created_at)
+            if comment.parent is not None:
+                self.assertGreaterEqual(comment.created_at, comment.parent.created_at)
+                self.assertEqual(comment.post_id, comment.parent.post_id)
+
+    def test_counters_and_feeds_match_the_rows(self):
+        generate_social_graph()
+        call_command('rebuild_counters', '--check', stdout=StringIO())
+        # one feed row per post and follower of its author, like the fan-out on write
+        self.assertEqual(FeedItem.objects.count(), Post.objects.filter(author__followers__isnull=False).count())
+        self.assertEqual(TrendingScore.objects.count(), Post.objects.count())
+
+    def test_users_can_log_in(self):
+        generate_social_graph(password='Secret123@')
+        user = User.objects.first()
+        self.assertTrue(user.check_password('Secret123@'))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TestBenchmarkCommand(APITestCase):
+    def setUp(self) -> None:
+        generate_social_graph()
+
+    def run_benchmark(self, *args):
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            stderr = StringIO()
+            call_command('benchmark', '--requests=2', '--warmup=0', f'--output={output.name}', *args, stdout=StringIO(), stderr=stderr)
+            return json.load(output), stderr.getvalue()
+
+    def test_every_endpoint_is_benchmarked_without_errors(self):
+        report, stderr = self.run_benchmark()
+        self.assertEqual(stderr, '')
+        url_names = {label.split()[1] for label in report['endpoints']}
+        self.assertEqual(url_names, BenchmarkCommand().get_url_names())
+        for label, result in report['endpoints'].items():
+            self.assertEqual(result['errors'], 0, f'{label}: {result["statuses"]}')
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+
+    def test_writes_are_rolled_back(self):
+        counts = [model.objects.count() for model in (User, Post, PostLike, Comment, Follow)]
+        self.run_benchmark()
+        self.assertEqual([model.objects.count() for model in (User, Post, PostLike, Comment, Follow)], counts)
+
+    def test_only_selected_endpoints(self):
+        report, _ = self.run_benchmark('--endpoint=post-detail', '--endpoint=follower-list')
+        self.assertEqual(set(report['endpoints']), {'GET post-detail', 'GET follower-list'})
+        self.assertEqual(report['endpoints']['GET post-detail']['statuses'], {'200': 2})
@@ -51,6 +51,78 @@ class TestPostFilter(APITestCase):
         self.assertContains(response, 'potato and salmon')
         self.assertNotContains(response, 'salmon and pineapple')
     
+    def test_search_post_field_matches_word_prefixes(self):
+        params = {'search_post': 'pota'}
+        response = self.client.get(self.endpoint_using_the_filter, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'potato and salmon')
+        self.assertNotContains(response, 'salmon and pineapple')
+
+    def test_search_post_field_matches_all_words(self):
+        params = {'search_post': 'salmon pineapple'}
+        response = self.client.get(self.endpoint_using_the_filter, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'salmon and pineapple')
+        self.assertNotContains(response, 'potato and salmon')
+
+    def test_search_post_field_follows_post_updates(self):
+        self.post2.title = 'grilled tuna'
+        self.post2.save()
+        response = self.client.get(self.endpoint_using_the_filter, {'search_post': 'tuna'})
+        self.assertContains(response, 'grilled tuna')
+        response = self.client.get(self.endpoint_using_the_filter, {'search_post': 'pineapple'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_search_post_ordering_by_rank(self):
+        post3 = PostFactory(title='salmon salmon salmon', content='salmon')
+        params = {'search_post': 'salmon', 'ordering': 'rank'}
+        response = self.client.get(self.endpoint_using_the_filter, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['results'][0]['id'], post3.id)
+
+    def test_search_post_ordering_by_rank_paginates(self):
+        PostFactory.create_batch(3, title='salmon')
+        params = {'search_post': 'salmon', 'ordering': 'rank', 'limit': 2}
+        seen = []
+        response = self.client.get(self.endpoint_using_the_filter, params)
+        while True:
+            seen += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_ordering_by_total_likes_and_total_comments(self):
+        PostLikeFactory(post=self.post1)
+        CommentFactory.create_batch(2, post=self.post2)
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-total_likes'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.post1.id, self.post2.id])
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-total_comments'})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.post2.id, self.post1.id])
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-created_at'})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.post2.id, self.post1.id])
+
+    def test_ordering_by_total_likes_paginates(self):
+        posts = PostFactory.create_batch(3)
+        for likes, post in enumerate(posts, start=1):
+            PostLikeFactory.create_batch(likes, post=post)
+        params = {'ordering': '-total_likes', 'limit': 2}
+        seen = []
+        response = self.client.get(self.endpoint_using_the_filter, params)
+        while True:
+            seen += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, [posts[2].id, posts[1].id, posts[0].id, self.post2.id, self.post1.id])
+
+    def test_invalid_ordering_fails(self):
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_tags_filter_field(self):
         params = {'tags': [self.tags[0].id, self.tags[1].id]}
         response = self.client.get(self.endpoint_using_the_filter, params)
@@ -58,6 +130,18 @@ class TestPostFilter(APITestCase):
         self.assertContains(response, 'potato and salmon')
         self.assertNotContains(response, 'salmon and pineapple')
     
+    def test_tags_filter_field_with_one_tag(self):
+        response = self.client.get(self.endpoint_using_the_filter, {'tags': [self.tags[1].id]})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.post2.id, self.post1.id])
+
+    def test_tags_filter_field_with_unknown_tag_fails(self):
+        response = self.client.get(self.endpoint_using_the_filter, {'tags': [self.tags[0].id, 0]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_author_filter_field(self):
+        response = self.client.get(self.endpoint_using_the_filter, {'author': self.post2.author_id})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.post2.id])
+
     def test_created_at_filter_field(self):        
         self.post1.created_at += timezone.timedelta(days=10)
         self.post1.save()
@@ -83,6 +167,12 @@ class TestTagFilter(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertContains(response, 'Shell')
         self.assertNotContains(response, 'Paul')
+
+    def test_ordering_by_most_used(self):
+        PostFactory().tags.add(self.tag2)
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-total_posts'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['id'] for tag in response.data['results']], [self.tag2.id, self.tag1.id])
         
         
 class TestCommentFilter(APITestCase):
@@ -120,6 +210,14 @@ class TestCommentFilter(APITestCase):
         self.assertContains(response, 'content 1')
         self.assertNotContains(response, 'content 2')
         
+    def test_ordering_by_total_likes(self):
+        CommentLikeFactory(comment=self.comment1)
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-total_likes'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['id'] for comment in response.data['results']], [self.comment1.id, self.comment2.id])
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-created_at'})
+        self.assertEqual([comment['id'] for comment in response.data['results']], [self.comment2.id, self.comment1.id])
+
     def test_created_at_filter_field(self):        
         self.comment2.created_at += timezone.timedelta(days=10)
         self.comment2.save()
@@ -146,6 +244,13 @@ class TestPostLikeFilter(APITestCase):
         self.like2 = PostLikeFactory(post=post, user=self.user2)
         self.endpoint_using_the_filter = reverse('post-like-list', args=[post.id])
     
+    def test_ordering_by_most_recent(self):
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-created_at'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([like['id'] for like in response.data['results']], [self.like2.id, self.like1.id])
+        response = self.client.get(self.endpoint_using_the_filter, {'ordering': '-total_likes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_search_user_field_filtering_by_username(self):
         params = {'search_user': 'ne'}
         response = self.client.get(self.endpoint_using_the_filter, params)
@@ -1,6 +1,9 @@
 from rest_framework.test import APITestCase, APITransactionTestCase
 from tests.posts.factories import PostFactory, PostLikeFactory, TagFactory, CommentFactory, CommentLikeFactory
 from django.core.exceptions import ValidationError
+from posts.models import Post, PostLike, Comment, CommentLike, Tag, TagPosting, TagPair
+from tests.utils import QueryPlanMixin
+from django.utils import timezone
 
 
 class TestPost(APITransactionTestCase):
@@ -10,17 +13,57 @@ class TestPost(APITransactionTestCase):
     def test_return_total_likes(self):
         for c in range(3):
             PostLikeFactory(post=self.post)
+        self.post.refresh_from_db()
         self.assertEqual(self.post.total_likes, 3)
         
     def test_return_total_tags(self):
         tags = TagFactory.create_batch(3)    
         self.post.tags.set(tags)
+        self.post.refresh_from_db()
         self.assertEqual(self.post.total_tags, 3)
         
+    def test_deleting_a_tag_updates_total_tags(self):
+        tags = TagFactory.create_batch(3)
+        self.post.tags.set(tags)
+        other_post = PostFactory()
+        other_post.tags.set(tags[:1])
+        tags[0].delete()
+        Tag.objects.filter(pk=tags[1].pk).delete()
+        self.post.refresh_from_db()
+        other_post.refresh_from_db()
+        self.assertEqual(self.post.total_tags, 1)
+        self.assertEqual(other_post.total_tags, 0)
+
     def test_return_total_comments(self):
         for c in range(3):
             CommentFactory(post=self.post)
+        self.post.refresh_from_db()
         self.assertEqual(self.post.total_comments, 3)
+    
+    def test_total_likes_decremented_on_dislike(self):
+        likes = PostLikeFactory.create_batch(2, post=self.post)
+        likes[0].delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 1)
+
+    def test_total_tags_updated_on_remove_and_clear(self):
+        tags = TagFactory.create_batch(3)
+        self.post.tags.set(tags)
+        self.post.tags.remove(tags[0])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_tags, 2)
+        tags[1].posts.clear()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_tags, 1)
+
+    def test_save_does_not_overwrite_counters(self):
+        stale_post = Post.objects.get(id=self.post.id)
+        PostLikeFactory(post=self.post)
+        stale_post.title = 'new title'
+        stale_post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'new title')
+        self.assertEqual(self.post.total_likes, 1)
         
     def test_post_with_more_than_30_tags_fails(self):
         tags30 = TagFactory.create_batch(30)
@@ -31,6 +74,60 @@ class TestPost(APITransactionTestCase):
         self.assertEqual(self.post.tags.all().count(),30)
                 
 
+class TestTagIndex(APITestCase):
+    def setUp(self) -> None:
+        self.tags = TagFactory.create_batch(3)
+        self.post = PostFactory()
+
+    def get_pairs(self):
+        return {(tag_id, related_id): total for tag_id, related_id, total in TagPair.objects.values_list('tag_id', 'related_id', 'total_posts')}
+
+    def get_total_posts(self):
+        return [tag.total_posts for tag in Tag.objects.filter(pk__in=[tag.pk for tag in self.tags]).order_by('pk')]
+
+    def test_adding_tags_updates_counters_postings_and_pairs(self):
+        a, b, c = self.tags
+        self.post.tags.add(a, b)
+        PostFactory().tags.add(a, b, c)
+        self.post.tags.add(c)
+        self.assertEqual(self.get_total_posts(), [2, 2, 2])
+        self.assertEqual(TagPosting.objects.filter(post=self.post).count(), 3)
+        self.assertEqual(self.get_pairs(), {
+            (a.pk, b.pk): 2, (b.pk, a.pk): 2, (a.pk, c.pk): 2, (c.pk, a.pk): 2, (b.pk, c.pk): 2, (c.pk, b.pk): 2,
+        })
+
+    def test_removing_tags_updates_counters_postings_and_pairs(self):
+        a, b, c = self.tags
+        self.post.tags.add(a, b, c)
+        PostFactory().tags.add(a, b)
+        self.post.tags.remove(c)
+        self.assertEqual(self.get_total_posts(), [2, 2, 0])
+        self.assertEqual(self.get_pairs(), {(a.pk, b.pk): 2, (b.pk, a.pk): 2})
+        self.post.tags.clear()
+        self.assertEqual(self.get_total_posts(), [1, 1, 0])
+        self.assertEqual(self.get_pairs(), {(a.pk, b.pk): 1, (b.pk, a.pk): 1})
+        self.assertFalse(TagPosting.objects.filter(post=self.post).exists())
+
+    def test_set_and_reverse_changes_update_the_index(self):
+        a, b, c = self.tags
+        self.post.tags.set([a, b])
+        self.post.tags.set([b, c])
+        self.assertEqual(self.get_pairs(), {(b.pk, c.pk): 1, (c.pk, b.pk): 1})
+        a.posts.add(self.post)
+        self.assertEqual(self.get_total_posts(), [1, 1, 1])
+        self.assertEqual(self.get_pairs()[(a.pk, c.pk)], 1)
+        c.posts.clear()
+        self.assertEqual(self.get_total_posts(), [1, 1, 0])
+        self.assertEqual(self.get_pairs(), {(a.pk, b.pk): 1, (b.pk, a.pk): 1})
+
+    def test_deleting_a_post_removes_it_from_the_index(self):
+        self.post.tags.add(*self.tags)
+        self.post.delete()
+        self.assertEqual(self.get_total_posts(), [0, 0, 0])
+        self.assertFalse(TagPair.objects.exists())
+        self.assertFalse(TagPosting.objects.exists())
+
+
 class TestComment(APITestCase):
     def setUp(self) -> None:
         self.comment = CommentFactory()
@@ -38,6 +135,53 @@ class TestComment(APITestCase):
     def test_return_total_likes(self):
         for c in range(3):
             CommentLikeFactory(comment=self.comment)
+        self.comment.refresh_from_db()
         self.assertEqual(self.comment.total_likes, 3)
-        
-    
\ No newline at end of file
+
+
+class TestQueryPlans(QueryPlanMixin, APITestCase):
+    def setUp(self) -> None:
+        self.post = PostFactory()
+        self.ordering = ['-created_at', '-id']
+
+    def test_posts_by_author_use_author_created_at_index(self):
+        queryset = Post.objects.filter(author=self.post.author).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, Post, ['author', '-created_at', '-id'])
+
+    def test_comments_of_a_post_use_post_created_at_index(self):
+        since = timezone.now() - timezone.timedelta(days=1)
+        queryset = Comment.objects.filter(post=self.post, created_at__gte=since).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, Comment, ['post', '-created_at', '-id'])
+
+    def test_likes_of_a_post_use_post_created_at_index(self):
+        queryset = PostLike.objects.filter(post=self.post).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, PostLike, ['post', '-created_at', '-id'])
+
+    def test_likes_of_a_comment_use_comment_created_at_index(self):
+        queryset = CommentLike.objects.filter(comment=CommentFactory(post=self.post)).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, CommentLike, ['comment', '-created_at', '-id'])
+
+    def test_posts_ordered_by_engagement_use_counter_indexes(self):
+        for counter in ('total_likes', 'total_comments'):
+            queryset = Post.objects.order_by(f'-{counter}', '-id')[:10]
+            self.assertUsesIndex(queryset, Post, [f'-{counter}', '-id'])
+
+    def test_comments_of_a_post_ordered_by_likes_use_post_total_likes_index(self):
+        queryset = Comment.objects.filter(post=self.post).order_by('-total_likes', '-id')[:10]
+        self.assertUsesIndex(queryset, Comment, ['post', '-total_likes', '-id'])
+
+    def test_posts_of_a_tag_use_tag_created_at_index(self):
+        queryset = TagPosting.objects.filter(tag=TagFactory()).order_by('-created_at', '-post')[:10]
+        self.assertUsesIndex(queryset, TagPosting, ['tag', '-created_at', '-post'])
+
+    def test_related_tags_use_tag_total_posts_index(self):
+        queryset = TagPair.objects.filter(tag=TagFactory()).order_by('-total_posts', '-related')[:10]
+        self.assertUsesIndex(queryset, TagPair, ['tag', '-total_posts', '-related'])
+
+    def test_replies_of_a_thread_use_root_path_index(self):
+        queryset = Comment.objects.filter(root=CommentFactory(post=self.post)).order_by('path', 'id')[:10]
+        self.assertUsesIndex(queryset, Comment, ['root', 'path', 'id'])
+
+    def test_top_level_comments_use_post_parent_created_at_index(self):
+        queryset = Comment.objects.filter(post=self.post, parent__isnull=True).order_by(*self.ordering)[:10]
+        self.assertUsesIndex(queryset, Comment, ['post', 'parent', '-created_at', '-id'])
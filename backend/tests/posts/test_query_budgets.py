@@ -0,0 +1,113 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from tests.posts.factories import PostFactory, TagFactory, PostLikeFactory, CommentFactory, CommentLikeFactory
+from tests.accounts.factories import UserFactory, FollowFactory
+from tests.utils import QueryBudgetMixin
+from posts.models import Post, Tag
+
+
+class TestPostQueryBudgets(QueryBudgetMixin, APITestCase):
+    def setUp(self) -> None:
+        self.tags = TagFactory.create_batch(3)
+        self.post = PostFactory()
+        self.comment = CommentFactory(post=self.post)
+
+    def create_posts(self, count, **kwargs):
+        for post in PostFactory.create_batch(count, **kwargs):
+            post.tags.set(self.tags)
+
+    def test_post_list(self):
+        self.post.delete()
+        for name in ('post-list-create', 'async-post-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(reverse(name), 2, self.create_posts)
+                Post.objects.all().delete()
+                self.assertQueryBudget(reverse(name), 2, self.create_posts, data={'ordering': '-total_likes'})
+                Post.objects.all().delete()
+
+    def test_post_list_with_viewer_fields(self):
+        self.post.delete()
+        self.client.force_authenticate(UserFactory())
+        # + the viewer's likes of the page and the users they follow
+        self.assertQueryBudget(reverse('post-list-create'), 4, self.create_posts)
+
+    def test_post_list_filtered_by_tags(self):
+        self.post.delete()
+        tag_ids = [tag.id for tag in self.tags]
+        # + validating the tag ids
+        self.assertQueryBudget(reverse('post-list-create'), 3, self.create_posts, data={'tags': tag_ids})
+
+    def test_tag_post_list(self):
+        self.post.delete()
+        self.assertQueryBudget(reverse('tag-post-list', args=[self.tags[0].id]), 2, self.create_posts)
+
+    def test_related_tag_list(self):
+        def create_tags(count):
+            for tag in TagFactory.create_batch(count):
+                PostFactory().tags.add(self.tags[0], tag)
+
+        self.assertQueryBudget(reverse('related-tag-list', args=[self.tags[0].id]), 1, create_tags)
+
+    def test_post_trending_list(self):
+        self.post.delete()
+        self.assertQueryBudget(reverse('post-trending-list'), 2, self.create_posts)
+
+    def test_post_feed(self):
+        user, author = UserFactory(), UserFactory()
+        FollowFactory(follower=user, followed=author)
+        self.client.force_authenticate(user)
+        for name in ('post-feed-list', 'async-post-feed-list'):
+            with self.subTest(name):
+                # + the viewer's likes of the page and the users they follow (the follow graph)
+                self.assertQueryBudget(reverse(name), 5, lambda count: self.create_posts(count, author=author))
+                Post.objects.filter(author=author).delete()
+
+    def test_comment_list(self):
+        self.comment.delete()
+        for name in ('comment-list-create', 'async-comment-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(
+                    reverse(name, args=[self.post.id]), 1,
+                    lambda count: CommentFactory.create_batch(count, post=self.post),
+                )
+                self.post.comments.all().delete()
+
+    def test_comment_thread_list(self):
+        self.comment.delete()
+
+        def create_threads(count):
+            for comment in CommentFactory.create_batch(count, post=self.post):
+                CommentFactory.create_batch(2, post=self.post, parent=comment)
+
+        self.assertQueryBudget(reverse('comment-thread-list', args=[self.post.id]), 2, create_threads)
+        # the likes of the replies are loaded with the ones of the page
+        self.client.force_authenticate(UserFactory())
+        self.assertQueryBudget(reverse('comment-thread-list', args=[self.post.id]), 4, create_threads)
+
+    def test_comment_reply_list(self):
+        self.assertQueryBudget(
+            reverse('comment-reply-list', args=[self.comment.id]), 2,
+            lambda count: CommentFactory.create_batch(count, post=self.post, parent=self.comment),
+        )
+
+    def test_post_like_list(self):
+        for name in ('post-like-list', 'async-post-like-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(
+                    reverse(name, args=[self.post.id]), 1,
+                    lambda count: PostLikeFactory.create_batch(count, post=self.post),
+                )
+                self.post.likes.all().delete()
+
+    def test_comment_like_list(self):
+        for name in ('comment-like-list', 'async-comment-like-list'):
+            with self.subTest(name):
+                self.assertQueryBudget(
+                    reverse(name, args=[self.comment.id]), 1,
+                    lambda count: CommentLikeFactory.create_batch(count, comment=self.comment),
+                )
+                self.comment.likes.all().delete()
+
+    def test_tag_list(self):
+        Tag.objects.all().delete()
+        self.assertQueryBudget(reverse('tag-list'), 2, TagFactory.create_batch)
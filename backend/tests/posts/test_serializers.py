@@ -96,9 +96,9 @@ class TestPostUpdateSerializer(APITestCase):
         self.assertEqual(data['tags'], [tag.id for tag in self.post.tags.all()])
         self.assertTrue(self.post.edited)
         
-    def test_update_post_adding_more_than_max_tags_allowed_tags_fails(self):
+    def test_update_post_with_more_than_max_tags_allowed_tags_fails(self):
         self.post.tags.add(TagFactory())
-        tags = [tag.id for tag in TagFactory.create_batch(max_tags_allowed)]
+        tags = [tag.id for tag in TagFactory.create_batch(max_tags_allowed + 1)]
         data = {
             'title': 'Updated title',
             'content': 'Updated content',
@@ -109,6 +109,15 @@ class TestPostUpdateSerializer(APITestCase):
             serializer.is_valid(raise_exception=True)
         self.assertEqual(self.post.tags.all().count(), 1)
 
+    def test_update_post_replaces_the_tags(self):
+        self.post.tags.add(TagFactory())
+        tags = [tag.id for tag in TagFactory.create_batch(max_tags_allowed)]
+        serializer = PostUpdateSerializer(instance=self.post, data={'tags': tags}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.assertEqual(sorted(self.post.tags.values_list('id', flat=True)), tags)
+        self.assertEqual(self.post.total_tags, max_tags_allowed)
+
     def test_update_post_already_updated_fails(self):
         data = {
             'title': 'Updated title',
@@ -3,12 +3,20 @@ from posts.mixins import max_tags_allowed, max_post_editable_time
 from tests.posts.factories import PostFactory, TagFactory, PostLikeFactory, CommentFactory, CommentLikeFactory
 from tests.accounts.factories import UserFactory, FollowFactory
 
-from posts.models import Post, Tag, Comment
+from posts.models import Post, Tag, Comment, FeedItem, TrendingScore
+from posts import trending
+from posts.likes import post_likes
+from posts import threads
 from posts.serializers import PostSerializer, TagSerializer, CommentSerializer, CommentLikeSerializer, PostLikeSerializer, ProfileSimpleSerializer
 from django.urls import reverse
 from rest_framework import status
 from django.utils import timezone
 from unittest.mock import patch
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from accounts import graph
 
 
 class TestPostListCreateView(APITestCase):
@@ -37,7 +45,7 @@ class TestPostListCreateView(APITestCase):
         PostFactory.create_batch(3)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        serializer = PostSerializer(Post.objects.all(), many=True, context={'request': response.wsgi_request})
+        serializer = PostSerializer(Post.objects.order_by('-created_at', '-id'), many=True, context={'request': response.wsgi_request})
         self.assertEqual(response.data['results'], serializer.data)
 
     def test_create_post_with_more_than_max_tags_allowed_tags_fails(self):
@@ -53,6 +61,23 @@ class TestPostListCreateView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data, expected)
 
+    def test_create_post_looks_up_counts_and_inserts_the_tags_once(self):
+        tags = TagFactory.create_batch(max_tags_allowed)
+        data = {'title': 'title 1', 'content': 'content', 'tags': [tag.id for tag in tags]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_tags'], max_tags_allowed)
+        sql = [query['sql'] for query in queries]
+        self.assertEqual(len([query for query in sql if query.startswith('SELECT') and 'FROM "posts_tag" WHERE' in query]), 1)
+        self.assertEqual(len([query for query in sql if 'COUNT(*)' in query and '"posts_post_tags"' in query]), 1)
+        self.assertEqual(len([query for query in sql if query.startswith('INSERT') and '"posts_post_tags"' in query]), 1)
+
+    def test_create_post_without_tags(self):
+        response = self.client.post(self.url, data={'title': 'title 1', 'content': 'content'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['total_tags'], 0)
+
     def test_create_post_successfully(self):
         data = {
             'title': 'title 1',
@@ -86,6 +111,53 @@ class TestPostListCreateView(APITestCase):
         self.assertEqual(
             [tag.id for tag in post_created.tags.all()], data['tags'])
 
+    def test_list_uses_constant_number_of_queries(self):
+        def count_list_queries(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url, {'limit': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+            return len(queries)
+
+        for post in PostFactory.create_batch(10):
+            post.tags.set(self.tags)
+        self.assertEqual(count_list_queries(1), count_list_queries(10))
+
+    def test_cursor_pagination_walks_all_pages(self):
+        posts = PostFactory.create_batch(5)
+        seen = []
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            seen += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, [post.id for post in reversed(posts)])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([post['id'] for post in response.data['results']], [posts[2].id, posts[1].id])
+
+    def test_offset_pagination_is_still_supported(self):
+        posts = PostFactory.create_batch(3)
+        response = self.client.get(self.url, {'limit': 1, 'offset': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([post['id'] for post in response.data['results']], [posts[1].id])
+
+    def test_count_is_only_returned_on_request(self):
+        PostFactory.create_batch(3)
+        response = self.client.get(self.url, {'limit': 1})
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(self.url, {'limit': 1, 'count': 'true'})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get(response.data['next']).data['count'], 3)
+
+    def test_invalid_cursor_fails(self):
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class TestPostFeedView(APITestCase):
     def setUp(self) -> None:
@@ -102,9 +174,121 @@ class TestPostFeedView(APITestCase):
         
         response = self.client.get(reverse('post-feed-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0], PostSerializer(post1, context={'request': response.wsgi_request}).data)
 
+    def test_feed_is_ordered_by_most_recent_posts(self):
+        posts = PostFactory.create_batch(3, author=self.followed_user)
+        response = self.client.get(reverse('post-feed-list'))
+        self.assertEqual([post['id'] for post in response.data['results']], [post.id for post in reversed(posts)])
+
+    def test_following_a_user_backfills_the_feed_with_their_posts(self):
+        post = PostFactory(author=self.another_user)
+        FollowFactory(follower=self.user1, followed=self.another_user)
+        response = self.client.get(reverse('post-feed-list'))
+        self.assertEqual([post['id'] for post in response.data['results']], [post.id])
+
+    def test_unfollowing_a_user_removes_their_posts_from_the_feed(self):
+        PostFactory(author=self.followed_user)
+        self.user1.following.get(followed=self.followed_user).delete()
+        response = self.client.get(reverse('post-feed-list'))
+        self.assertEqual(response.data['results'], [])
+        self.assertFalse(FeedItem.objects.filter(user=self.user1).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_posts_of_authors_over_the_fanout_limit_are_pulled(self):
+        fanned_out_post = PostFactory(author=self.followed_user)
+        FeedItem.objects.all().delete()
+        another_followed_user = FollowFactory(follower=self.user1).followed
+        pulled_post = PostFactory(author=another_followed_user)
+        PostFactory(author=self.another_user)
+        self.assertFalse(FeedItem.objects.exists())
+        response = self.client.get(reverse('post-feed-list'))
+        self.assertEqual([post['id'] for post in response.data['results']], [pulled_post.id, fanned_out_post.id])
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_posts_pulled_while_over_the_fanout_limit_stay_when_back_under(self):
+        follow = FollowFactory(followed=self.followed_user)
+        fanned_out_post = PostFactory(author=self.followed_user)
+        # a third follower takes the author over the limit, nothing is backfilled
+        new_follower = UserFactory()
+        FollowFactory(follower=new_follower, followed=self.followed_user)
+        pulled_post = PostFactory(author=self.followed_user)
+        self.assertFalse(FeedItem.objects.filter(user=new_follower).exists())
+        self.assertFalse(FeedItem.objects.filter(post=pulled_post).exists())
+
+        follow.delete()
+        for user in (self.user1, new_follower):
+            self.client.force_login(user)
+            response = self.client.get(reverse('post-feed-list'))
+            self.assertEqual([post['id'] for post in response.data['results']], [pulled_post.id, fanned_out_post.id])
+
+    def test_feed_pages_follow_the_cursor(self):
+        posts = PostFactory.create_batch(3, author=self.followed_user)
+        response = self.client.get(reverse('post-feed-list'), {'limit': 2})
+        self.assertNotIn('count', response.data)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([post['id'] for post in response.data['results']], [posts[0].id])
+
+
+class TestPostTrendingView(APITestCase):
+    def setUp(self) -> None:
+        self.url = reverse('post-trending-list')
+        self.user1 = UserFactory()
+        self.client.force_login(self.user1)
+        self.posts = PostFactory.create_batch(3)
+
+    def get_ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data['results']]
+
+    def test_posts_without_likes_or_comments_are_ordered_by_most_recent(self):
+        self.assertEqual(self.get_ids(), [post.id for post in reversed(self.posts)])
+
+    def test_likes_and_comments_raise_a_post(self):
+        self.client.post(reverse('like-post', args=[self.posts[0].id]))
+        self.assertEqual(self.get_ids()[0], self.posts[0].id)
+        CommentFactory(post=self.posts[1])
+        self.assertEqual(self.get_ids()[0], self.posts[1].id)
+        self.client.post(reverse('bulk-like-post'), {'ids': [self.posts[2].id]}, format='json')
+        PostLikeFactory(post=self.posts[2])
+        self.assertEqual(self.get_ids()[0], self.posts[2].id)
+
+    def test_dislike_takes_back_the_weight_of_the_like(self):
+        score = TrendingScore.objects.get(post=self.posts[0]).score
+        self.client.post(reverse('like-post', args=[self.posts[0].id]))
+        self.assertGreater(TrendingScore.objects.get(post=self.posts[0]).score, score)
+        self.client.delete(reverse('dislike-post', args=[self.posts[0].id]))
+        self.assertAlmostEqual(TrendingScore.objects.get(post=self.posts[0]).score, score, places=3)
+        self.client.post(reverse('bulk-like-post'), {'ids': [self.posts[0].id]}, format='json')
+        self.client.post(reverse('bulk-dislike-post'), {'ids': [self.posts[0].id]}, format='json')
+        self.assertAlmostEqual(TrendingScore.objects.get(post=self.posts[0]).score, score, places=3)
+
+    @override_settings(TRENDING_HALF_LIFE=24)
+    def test_weights_decay_by_half_every_half_life(self):
+        now = timezone.now()
+        old_post, new_post = self.posts[:2]
+        Post.objects.filter(id__in=[old_post.id, new_post.id]).update(created_at=now - timezone.timedelta(days=30))
+        trending.recompute_scores(now)
+        # 2 likes from a day ago weigh as much as 1 like now
+        trending.add_weight([old_post.id], trending.LIKE_WEIGHT * 2, at=now - timezone.timedelta(hours=24))
+        trending.add_weight([new_post.id], trending.LIKE_WEIGHT, at=now)
+        old_score, new_score = (TrendingScore.objects.get(post=post).score for post in (old_post, new_post))
+        self.assertAlmostEqual(old_score, new_score, places=6)
+
+    def test_deleted_posts_are_not_listed(self):
+        self.posts[2].delete()
+        self.assertEqual(self.get_ids(), [self.posts[1].id, self.posts[0].id])
+
+    def test_cursor_pagination_walks_the_ranking(self):
+        self.client.post(reverse('like-post', args=[self.posts[0].id]))
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual([post['id'] for post in response.data['results']], [self.posts[0].id, self.posts[2].id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([post['id'] for post in response.data['results']], [self.posts[1].id])
+        self.assertIsNone(response.data['next'])
+
 
 class TestPostDetailView(APITestCase):
     def setUp(self) -> None:
@@ -120,6 +304,73 @@ class TestPostDetailView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_matching_etag_returns_not_modified(self):
+        post = PostFactory()
+        url = reverse('post-detail', args=[post.id])
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_response_is_invalidated_by_likes_and_profile_changes(self):
+        post = PostFactory()
+        url = reverse('post-detail', args=[post.id])
+        etag = self.client.get(url)['ETag']
+
+        PostLikeFactory(post=post)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_likes'], 1)
+
+        post.author.profile.name = 'new name'
+        post.author.profile.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['author']['name'], 'new name')
+
+    def test_viewer_fields_are_not_shared_through_the_cache(self):
+        cache.clear()
+        graph.adjacency_cache.clear()
+        post = PostFactory()
+        url = reverse('post-detail', args=[post.id])
+        PostLikeFactory(post=post, user=self.user1)
+        FollowFactory(follower=self.user1, followed=post.author)
+        response = self.client.get(url)
+        self.assertEqual((response.data['is_liked'], response.data['is_following_author'], response.data['is_own']), (True, True, False))
+        self.assertTrue(response.data['author']['is_following'])
+
+        self.client.force_login(post.author)
+        other_response = self.client.get(url)
+        self.assertEqual((other_response.data['is_liked'], other_response.data['is_following_author'], other_response.data['is_own']), (False, False, True))
+        self.assertTrue(other_response.data['author']['is_own'])
+        self.assertNotEqual(other_response['ETag'], response['ETag'])
+
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertEqual((response.data['is_liked'], response.data['is_following_author'], response.data['is_own']), (False, False, False))
+
+    def test_cached_response_is_invalidated_by_a_renamed_tag(self):
+        post = PostFactory()
+        post.tags.set(self.tags[:1])
+        url = reverse('post-detail', args=[post.id])
+        etag = self.client.get(url)['ETag']
+
+        self.tags[0].name = 'renamed'
+        self.tags[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in response.data['nested_tags']], ['renamed'])
+
+    def test_deleted_post_is_not_served_from_cache(self):
+        post = PostFactory()
+        url = reverse('post-detail', args=[post.id])
+        self.client.get(url)
+        post.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class TestPostUpdateView(APITestCase):
     def setUp(self) -> None:
@@ -258,7 +509,7 @@ class TestPostLikeListView(APITestCase):
             all_postlikes.append(PostLikeFactory(post=self.post))
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        serializer = PostLikeSerializer(all_postlikes, many=True, context={'request': response.wsgi_request})
+        serializer = PostLikeSerializer(reversed(all_postlikes), many=True, context={'request': response.wsgi_request})
         self.assertEqual(response.data['results'], serializer.data)
 
 
@@ -290,6 +541,16 @@ class TestLikePostView(APITestCase):
         self.assertEqual(str(response.data['detail'][0]), expected['detail'])
         self.assertEqual(self.post.likes.all().count(), 1)
 
+    def test_like_post_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        like_queries = [query['sql'] for query in queries if 'posts_postlike' in query['sql']]
+        self.assertEqual(len(like_queries), 1)
+        self.assertIn('ON CONFLICT DO NOTHING', like_queries[0])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 1)
+
     def test_like_post_with_pk_of_a_non_existing_post_fails(self):
         invalid_pk = 10
         url = reverse('like-post', args=[invalid_pk])
@@ -320,6 +581,17 @@ class TestDislikePostView(APITestCase):
         self.post.refresh_from_db()
         self.assertEqual(self.post.likes.all().count(), 0)
 
+    def test_dislike_post_is_a_single_delete(self):
+        PostLikeFactory(user=self.user1, post=self.post)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        like_queries = [query['sql'] for query in queries if 'posts_postlike' in query['sql']]
+        self.assertEqual(len(like_queries), 1)
+        self.assertTrue(like_queries[0].startswith('DELETE'))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.total_likes, 0)
+
     def test_dislike_post_that_is_not_liked_fails(self):
         response = self.client.delete(self.url)
         expected = {
@@ -339,6 +611,112 @@ class TestDislikePostView(APITestCase):
         self.assertEqual(response.data, expected)
 
 
+class TestBulkLikePostView(APITestCase):
+    def setUp(self) -> None:
+        self.user1 = UserFactory()
+        self.posts = PostFactory.create_batch(3)
+        self.client.force_login(self.user1)
+        self.like_url = reverse('bulk-like-post')
+        self.dislike_url = reverse('bulk-dislike-post')
+
+    def test_bulk_like_posts_returns_a_status_per_id(self):
+        PostLikeFactory(user=self.user1, post=self.posts[0])
+        invalid_pk = 100
+        ids = [post.id for post in self.posts] + [invalid_pk]
+        response = self.client.post(self.like_url, {'ids': ids}, format='json')
+        expected = [
+            {'id': self.posts[0].id, 'status': 'already_liked'},
+            {'id': self.posts[1].id, 'status': 'liked'},
+            {'id': self.posts[2].id, 'status': 'liked'},
+            {'id': invalid_pk, 'status': 'not_found'},
+        ]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected)
+        for post in self.posts:
+            post.refresh_from_db()
+            self.assertEqual(post.total_likes, 1)
+            self.assertEqual(post.likes.filter(user=self.user1).count(), 1)
+
+    def test_bulk_dislike_posts_returns_a_status_per_id(self):
+        PostLikeFactory(user=self.user1, post=self.posts[0])
+        PostLikeFactory(user=self.user1, post=self.posts[1])
+        other_like = PostLikeFactory(post=self.posts[0])
+        invalid_pk = 100
+        ids = [post.id for post in self.posts] + [invalid_pk]
+        response = self.client.post(self.dislike_url, {'ids': ids}, format='json')
+        expected = [
+            {'id': self.posts[0].id, 'status': 'disliked'},
+            {'id': self.posts[1].id, 'status': 'disliked'},
+            {'id': self.posts[2].id, 'status': 'not_liked'},
+            {'id': invalid_pk, 'status': 'not_found'},
+        ]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, expected)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].total_likes, 1)
+        self.assertEqual(list(self.posts[0].likes.all()), [other_like])
+        self.posts[1].refresh_from_db()
+        self.assertEqual(self.posts[1].total_likes, 0)
+
+    def test_bulk_like_uses_constant_number_of_queries(self):
+        def count_queries(url, posts):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, {'ids': [post.id for post in posts]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        posts = PostFactory.create_batch(20)
+        self.assertEqual(count_queries(self.like_url, self.posts[:1]), count_queries(self.like_url, posts))
+        self.assertEqual(count_queries(self.dislike_url, self.posts[:1]), count_queries(self.dislike_url, posts))
+
+    def test_bulk_like_counts_only_the_rows_it_inserted(self):
+        post = self.posts[0]
+        get_targets = post_likes.get_targets
+
+        def like_concurrently(ids):
+            # another request likes the post between the read and the write
+            targets = get_targets(ids)
+            PostLikeFactory(user=self.user1, post=post)
+            return targets
+
+        with patch.object(post_likes, 'get_targets', like_concurrently):
+            response = self.client.post(self.like_url, {'ids': [post.id]}, format='json')
+        self.assertEqual(response.data, [{'id': post.id, 'status': 'already_liked'}])
+        post.refresh_from_db()
+        self.assertEqual(post.total_likes, 1)
+
+    def test_bulk_dislike_counts_only_the_rows_it_deleted(self):
+        post = self.posts[0]
+        like = PostLikeFactory(user=self.user1, post=post)
+        get_targets = post_likes.get_targets
+
+        def dislike_concurrently(ids):
+            targets = get_targets(ids)
+            like.delete()
+            return targets
+
+        with patch.object(post_likes, 'get_targets', dislike_concurrently):
+            response = self.client.post(self.dislike_url, {'ids': [post.id]}, format='json')
+        self.assertEqual(response.data, [{'id': post.id, 'status': 'not_liked'}])
+        post.refresh_from_db()
+        self.assertEqual(post.total_likes, 0)
+
+    def test_bulk_like_invalidates_cached_post_detail(self):
+        url = reverse('post-detail', args=[self.posts[0].id])
+        self.assertEqual(self.client.get(url).data['total_likes'], 0)
+        self.client.post(self.like_url, {'ids': [self.posts[0].id]}, format='json')
+        self.assertEqual(self.client.get(url).data['total_likes'], 1)
+
+    def test_bulk_like_without_ids_fails(self):
+        response = self.client.post(self.like_url, {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_like_requires_authentication(self):
+        self.client.logout()
+        response = self.client.post(self.like_url, {'ids': [self.posts[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class TestTagListView(APITestCase):
     def setUp(self) -> None:
         self.url = reverse('tag-list')
@@ -351,6 +729,60 @@ class TestTagListView(APITestCase):
         self.assertEqual(response.data['results'], serializer.data)
 
 
+class TestRelatedTagListView(APITestCase):
+    def setUp(self) -> None:
+        self.tags = TagFactory.create_batch(4)
+        self.url = reverse('related-tag-list', args=[self.tags[0].id])
+
+    def test_related_tags_are_ordered_by_posts_together(self):
+        a, b, c, d = self.tags
+        PostFactory().tags.add(a, b, c)
+        PostFactory().tags.add(a, c)
+        PostFactory().tags.add(b, d)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag['id'], tag['total_posts'], tag['posts_together']) for tag in response.data['results']],
+            [(c.id, 2, 2), (b.id, 2, 1)],
+        )
+
+    def test_tag_without_posts_has_no_related_tags(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+
+class TestTagPostListView(APITestCase):
+    def setUp(self) -> None:
+        self.tag = TagFactory()
+        self.url = reverse('tag-post-list', args=[self.tag.id])
+        self.posts = PostFactory.create_batch(3)
+        for post in self.posts:
+            post.tags.add(self.tag)
+        PostFactory()
+
+    def get_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data['results']], response.data['next']
+
+    def test_posts_of_the_tag_are_ordered_by_most_recent(self):
+        ids, _ = self.get_ids(self.url)
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_pages_follow_each_other(self):
+        ids, next_url = self.get_ids(self.url, limit=2)
+        self.assertEqual(ids, [self.posts[2].id, self.posts[1].id])
+        ids, next_url = self.get_ids(next_url)
+        self.assertEqual(ids, [self.posts[0].id])
+        self.assertIsNone(next_url)
+
+    def test_removed_tag_removes_the_post(self):
+        self.posts[1].tags.remove(self.tag)
+        ids, _ = self.get_ids(self.url)
+        self.assertEqual(ids, [self.posts[2].id, self.posts[0].id])
+
+
 class TestCommentListCreateView(APITestCase):
     def setUp(self) -> None:
         self.user1 = UserFactory()
@@ -364,7 +796,7 @@ class TestCommentListCreateView(APITestCase):
             all_tags.append(CommentFactory(post=self.post))
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        serializer = CommentSerializer(all_tags, many=True, context={'request': response.wsgi_request})
+        serializer = CommentSerializer(reversed(all_tags), many=True, context={'request': response.wsgi_request})
         self.assertEqual(response.data['results'], serializer.data)
 
     def test_create_comment_successfully(self):
@@ -388,6 +820,98 @@ class TestCommentListCreateView(APITestCase):
         self.assertTrue(Comment.objects.filter(id=response.data['id']).exists())
 
 
+class TestCommentThreads(APITestCase):
+    def setUp(self) -> None:
+        self.user1 = UserFactory()
+        self.client.force_login(self.user1)
+        self.post = PostFactory()
+        self.comment = CommentFactory(post=self.post)
+
+    def reply(self, parent, **data):
+        url = reverse('comment-list-create', args=[parent.post_id])
+        response = self.client.post(url, {'content': 'reply', 'parent': parent.id, **data})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Comment.objects.get(id=response.data['id'])
+
+    def get_ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [comment['id'] for comment in response.data['results']]
+
+    def test_reply_is_placed_under_its_parent(self):
+        reply = self.reply(self.comment)
+        nested_reply = self.reply(reply)
+        self.assertEqual((reply.root_id, reply.path), (self.comment.id, f'{self.comment.id:010d}/'))
+        self.assertEqual(nested_reply.root_id, self.comment.id)
+        self.assertEqual(nested_reply.path, f'{self.comment.id:010d}/{reply.id:010d}/')
+        response = self.client.get(reverse('comment-detail', args=[nested_reply.id]))
+        self.assertEqual((response.data['parent'], response.data['depth']), (reply.id, 2))
+
+    def test_total_replies_counts_the_direct_replies(self):
+        reply = self.reply(self.comment)
+        self.reply(self.comment)
+        self.reply(reply)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.total_replies, 2)
+        reply.delete()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.total_replies, 1)
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 2)
+
+    def test_reply_to_a_comment_of_another_post_fails(self):
+        other_post = PostFactory()
+        url = reverse('comment-list-create', args=[other_post.id])
+        response = self.client.post(url, {'content': 'reply', 'parent': self.comment.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'parent': ['The comment belongs to another post.']})
+
+    def test_reply_beyond_the_maximum_depth_fails(self):
+        deepest = self.reply(self.comment)
+        Comment.objects.filter(id=deepest.id).update(path=f'{self.comment.id:010d}/' * threads.MAX_DEPTH)
+        url = reverse('comment-list-create', args=[self.post.id])
+        response = self.client.post(url, {'content': 'reply', 'parent': deepest.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'parent': [f'A thread can not be deeper than {threads.MAX_DEPTH} replies.']})
+
+    def test_replies_list_the_whole_subtree_in_thread_order(self):
+        first, second = self.reply(self.comment), self.reply(self.comment)
+        first_reply, second_reply = self.reply(first), self.reply(second)
+        nested = self.reply(first_reply)
+        self.reply(CommentFactory(post=self.post))
+        url = reverse('comment-reply-list', args=[self.comment.id])
+        self.assertEqual(self.get_ids(url), [first.id, second.id, first_reply.id, nested.id, second_reply.id])
+        self.assertEqual(self.get_ids(reverse('comment-reply-list', args=[first.id])), [first_reply.id, nested.id])
+        # pages follow each other
+        response = self.client.get(url, {'limit': 3})
+        next_page = self.client.get(response.data['next'])
+        self.assertEqual([comment['id'] for comment in next_page.data['results']], [nested.id, second_reply.id])
+
+    def test_replies_of_a_missing_comment(self):
+        response = self.client.get(reverse('comment-reply-list', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_threads_list_top_level_comments_with_their_first_replies(self):
+        replies = [self.reply(self.comment) for _ in range(4)]
+        self.reply(replies[0])
+        other = CommentFactory(post=self.post)
+        response = self.client.get(reverse('comment-thread-list', args=[self.post.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([comment['id'] for comment in response.data['results']], [other.id, self.comment.id])
+        thread = response.data['results'][1]
+        self.assertEqual(thread['total_replies'], 4)
+        self.assertEqual([reply['id'] for reply in thread['replies']], [reply.id for reply in replies[:3]])
+        self.assertEqual(thread['replies'][0]['total_replies'], 1)
+        self.assertEqual(response.data['results'][0]['replies'], [])
+
+    def test_threads_replies_parameter(self):
+        replies = [self.reply(self.comment) for _ in range(2)]
+        url = reverse('comment-thread-list', args=[self.post.id])
+        response = self.client.get(url, {'replies': 1})
+        self.assertEqual([reply['id'] for reply in response.data['results'][0]['replies']], [replies[0].id])
+        response = self.client.get(url, {'replies': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class TestCommentDetailView(APITestCase):
     def setUp(self) -> None:
         self.user1 = UserFactory()
@@ -500,6 +1024,28 @@ class TestDislikecommentView(APITestCase):
         self.assertEqual(response.data, expected)
 
 
+class TestBulkLikeCommentView(APITestCase):
+    def setUp(self) -> None:
+        self.user1 = UserFactory()
+        self.comments = CommentFactory.create_batch(2)
+        self.client.force_login(self.user1)
+
+    def test_bulk_like_and_dislike_comments(self):
+        ids = [comment.id for comment in self.comments]
+        response = self.client.post(reverse('bulk-like-comment'), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data], ['liked', 'liked'])
+        self.comments[0].refresh_from_db()
+        self.assertEqual(self.comments[0].total_likes, 1)
+
+        response = self.client.post(reverse('bulk-dislike-comment'), {'ids': ids[:1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'id': ids[0], 'status': 'disliked'}])
+        self.comments[0].refresh_from_db()
+        self.assertEqual(self.comments[0].total_likes, 0)
+        self.assertEqual(self.comments[1].likes.count(), 1)
+
+
 class TestCommentLikeListView(APITestCase):
     def setUp(self) -> None:
         self.user1 = UserFactory()
@@ -513,5 +1059,56 @@ class TestCommentLikeListView(APITestCase):
             all_commentlikes.append(CommentLikeFactory(comment=self.comment))
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        serializer = CommentLikeSerializer(all_commentlikes, many=True, context={'request': response.wsgi_request})
+        serializer = CommentLikeSerializer(reversed(all_commentlikes), many=True, context={'request': response.wsgi_request})
         self.assertEqual(response.data['results'], serializer.data)
+
+
+class TestViewerFields(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        graph.adjacency_cache.clear()
+        self.user = UserFactory()
+        self.client.force_login(self.user)
+        self.followed = UserFactory()
+        FollowFactory(follower=self.user, followed=self.followed)
+        self.liked_post = PostFactory()
+        PostLikeFactory(post=self.liked_post, user=self.user)
+        self.followed_post = PostFactory(author=self.followed)
+        self.own_post = PostFactory(author=self.user)
+
+    def get_fields(self, results):
+        return {data['id']: (data['is_liked'], data['is_following_author'], data['is_own']) for data in results}
+
+    def test_post_list(self):
+        response = self.client.get(reverse('post-list-create'))
+        self.assertEqual(self.get_fields(response.data['results']), {
+            self.liked_post.id: (True, False, False),
+            self.followed_post.id: (False, True, False),
+            self.own_post.id: (False, False, True),
+        })
+
+    def test_anonymous_viewer(self):
+        self.client.logout()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('post-list-create'))
+        self.assertEqual(set(self.get_fields(response.data['results']).values()), {(False, False, False)})
+
+    def test_comment_threads_and_their_replies(self):
+        comment = CommentFactory(post=self.liked_post, author=self.followed)
+        reply = CommentFactory(post=self.liked_post, parent=comment, author=self.user)
+        CommentLikeFactory(comment=reply, user=self.user)
+        response = self.client.get(reverse('comment-thread-list', args=[self.liked_post.id]))
+        thread = response.data['results'][0]
+        self.assertEqual(self.get_fields([thread]), {comment.id: (False, True, False)})
+        self.assertEqual(self.get_fields(thread['replies']), {reply.id: (True, False, True)})
+        self.assertEqual(thread['author']['is_following'], True)
+
+    def test_profile_page_posts(self):
+        PostLikeFactory(post=self.followed_post, user=self.user)
+        url = reverse('profile-page', args=[self.followed.profile.id])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(self.get_fields(response.data['posts']), {self.followed_post.id: (True, True, False)})
+        self.client.force_login(self.followed)
+        response = self.client.get(url)
+        self.assertEqual(self.get_fields(response.data['posts']), {self.followed_post.id: (False, False, True)})
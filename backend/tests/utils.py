@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+def get_index_name(model, fields) -> str:
+    return next(index.name for index in model._meta.indexes if index.fields == fields)
+
+
+def get_query_plan(queryset) -> str:
+    # the tables are tiny in tests, so PostgreSQL would prefer a sequential scan
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+class QueryPlanMixin:
+    def assertUsesIndex(self, queryset, model, fields):
+        """Fail unless the plan of `queryset` uses the index of `model` on `fields`."""
+        self.assertIn(get_index_name(model, fields), get_query_plan(queryset))
+
+
+PAGE_SIZES = (1, 10, 100)
+
+
+def normalize_sql(sql) -> str:
+    # queries that only differ in their parameters are the same query of a loop
+    sql = re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+    return re.sub(r'\?(, \?)+', '?', sql)
+
+
+class QueryBudgetMixin:
+    """
+    Checks a list endpoint against a query budget at each page size of `page_sizes`.
+
+    The test fails, listing the SQL, when a page needs more than `max_queries`
+    queries or when the number of queries grows with the page size (an N+1).
+    """
+    page_sizes = PAGE_SIZES
+
+    @classmethod
+    def setUpClass(cls):
+        # the factories create a user per row, hashing their passwords would
+        # dominate the run
+        fast_hasher = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+        fast_hasher.enable()
+        cls.addClassCleanup(fast_hasher.disable)
+        super().setUpClass()
+
+    def assertQueryBudget(self, url, max_queries, create_rows, data=None):
+        """
+        `create_rows(n)` adds n more rows to the list behind `url`. `max_queries`
+        is an int, or a dict with the budget of each page size.
+        """
+        captured = {}
+        created = 0
+        for page_size in self.page_sizes:
+            create_rows(page_size - created)
+            created = page_size
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {**(data or {}), 'limit': page_size})
+            self.assertEqual(response.status_code, 200, f'GET {url}?limit={page_size}')
+            self.assertEqual(len(response.data['results']), page_size, f'GET {url}?limit={page_size}')
+            captured[page_size] = [query['sql'] for query in queries]
+
+        smallest, largest = min(captured), max(captured)
+        if len(captured[largest]) > len(captured[smallest]):
+            repeated = Counter(map(normalize_sql, captured[largest])) - Counter(map(normalize_sql, captured[smallest]))
+            lines = [
+                f'GET {url} runs {len(captured[smallest])} queries for a page of {smallest} '
+                f'and {len(captured[largest])} for a page of {largest}. Queries added by the extra rows:'
+            ]
+            lines += [f'  {count}x {sql}' for sql, count in repeated.most_common()]
+            self.fail('\n'.join(lines))
+
+        for page_size, sqls in captured.items():
+            budget = max_queries[page_size] if isinstance(max_queries, dict) else max_queries
+            if len(sqls) > budget:
+                lines = [f'GET {url}?limit={page_size} runs {len(sqls)} queries, the budget is {budget}:']
+                lines += [f'  {sql}' for sql in sqls]
+                self.fail('\n'.join(lines))